@@ -120,6 +120,9 @@ def app_config(database):
             "elasticsearch.url": "https://localhost/warehouse",
             "files.backend": "warehouse.packaging.services.LocalFileStorage",
             "docs.backend": "warehouse.packaging.services.LocalFileStorage",
+            "sitemap.backend": (
+                "warehouse.sitemap.services.LocalSitemapStorage"
+            ),
             "mail.backend": "warehouse.email.services.SMTPEmailSender",
             "files.url": "http://localhost:7000/",
             "sessions.secret": "123456",
@@ -10,6 +10,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import pretend
+import pytest
+
+from warehouse.admin import flags
+
 from ...common.db.admin import AdminFlagFactory
 
 
@@ -22,3 +27,123 @@ class TestAdminFlag:
         AdminFlagFactory(id='this-flag-is-enabled')
 
         assert db_request.flags.enabled('this-flag-is-enabled')
+
+    def test_notifications(self, db_request):
+        flag = AdminFlagFactory(id='notify-me', notify=True)
+        AdminFlagFactory(id='not-enabled', enabled=False, notify=True)
+        AdminFlagFactory(id='no-notify')
+
+        assert db_request.flags.notifications() == [flag]
+
+
+class TestFlagCache:
+
+    def test_caches_flags(self, db_request):
+        AdminFlagFactory(
+            id='cached-flag', description='A flag', notify=True,
+        )
+        now = [0]
+        cache = flags.FlagCache(ttl=30, clock=lambda: now[0])
+        db_request.registry["warehouse.admin.flags.cache"] = cache
+
+        assert db_request.flags.enabled('cached-flag')
+        assert db_request.flags.notifications() == [
+            flags.FlagState('cached-flag', 'A flag', True, True),
+        ]
+
+        db_request.db.query(flags.AdminFlag).delete()
+
+        assert db_request.flags.enabled('cached-flag')
+
+        now[0] = 30
+
+        assert not db_request.flags.enabled('cached-flag')
+        assert db_request.flags.notifications() == []
+
+    def test_invalidate(self, db_request):
+        cache = flags.FlagCache()
+        assert 'new-flag' not in cache.get(db_request.db)
+
+        AdminFlagFactory(id='new-flag')
+        assert 'new-flag' not in cache.get(db_request.db)
+
+        cache.invalidate()
+        assert 'new-flag' in cache.get(db_request.db)
+
+
+def test_get_flag_without_cache(db_request):
+    flag = AdminFlagFactory(id='uncached-flag')
+
+    assert flags.get_flag({}, db_request.db, 'uncached-flag') is flag
+
+
+def test_store_flag_changes():
+    session = pretend.stub(
+        new={flags.AdminFlag(id='changed-flag')},
+        dirty=set(),
+        deleted=set(),
+        info={},
+    )
+
+    flags.store_flag_changes(pretend.stub(), session, pretend.stub())
+
+    assert session.info == {"warehouse.admin.flags.changed": True}
+
+
+def test_store_flag_changes_ignores_other_objects():
+    session = pretend.stub(
+        new={object()},
+        dirty=set(),
+        deleted=set(),
+        info={},
+    )
+
+    flags.store_flag_changes(pretend.stub(), session, pretend.stub())
+
+    assert session.info == {}
+
+
+@pytest.mark.parametrize("changed", [True, False])
+def test_invalidate_flag_cache(changed):
+    cache = pretend.stub(invalidate=pretend.call_recorder(lambda: None))
+    config = pretend.stub(registry={"warehouse.admin.flags.cache": cache})
+    session = pretend.stub(
+        info={"warehouse.admin.flags.changed": True} if changed else {},
+    )
+
+    flags.invalidate_flag_cache(config, session)
+
+    assert session.info == {}
+    assert cache.invalidate.calls == ([pretend.call()] if changed else [])
+
+
+def test_invalidate_flag_cache_no_cache():
+    config = pretend.stub(registry={})
+    session = pretend.stub(info={"warehouse.admin.flags.changed": True})
+
+    flags.invalidate_flag_cache(config, session)
+
+    assert session.info == {}
+
+
+@pytest.mark.parametrize("url", [None, "redis://localhost:6379/0"])
+def test_includeme(monkeypatch, url):
+    redis_conn = pretend.stub()
+    get_redis = pretend.call_recorder(lambda url: redis_conn)
+    monkeypatch.setattr(flags, "get_redis", get_redis)
+    settings = {} if url is None else {"celery.scheduler_url": url}
+    config = pretend.stub(
+        registry={},
+        get_settings=lambda: settings,
+        add_request_method=pretend.call_recorder(lambda *a, **kw: None),
+    )
+
+    flags.includeme(config)
+
+    cache = config.registry["warehouse.admin.flags.cache"]
+    assert isinstance(cache, flags.FlagCache)
+    assert cache.redis_conn is (None if url is None else redis_conn)
+    assert get_redis.calls == ([] if url is None else [pretend.call(url)])
+    assert config.add_request_method.calls == [
+        pretend.call(flags.Flags, name='flags', reify=True),
+    ]
@@ -10,7 +10,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import pretend
 import pytest
 
 from pyramid.httpexceptions import HTTPBadRequest
@@ -45,7 +44,9 @@ class TestProjectList:
             key=lambda j: (j.submitted_date, j.id),
             reverse=True,
         )
-        db_request.GET["page"] = "2"
+        db_request.GET["after"] = "{:%Y-%m-%dT%H:%M:%S.%f},{}".format(
+            journals[24].submitted_date, journals[24].id,
+        )
         result = views.journals_list(db_request)
 
         assert result == {
@@ -53,11 +54,11 @@ class TestProjectList:
             "query": None,
         }
 
-    def test_with_invalid_page(self):
-        request = pretend.stub(params={"page": "not an integer"})
+    def test_with_invalid_page(self, db_request):
+        db_request.GET["after"] = "not a cursor"
 
         with pytest.raises(HTTPBadRequest):
-            views.journals_list(request)
+            views.journals_list(db_request)
 
     def test_query_basic(self, db_request):
         project0 = ProjectFactory.create()
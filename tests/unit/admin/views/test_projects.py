@@ -278,7 +278,9 @@ class TestProjectJournalsList:
             reverse=True,
         )
         db_request.matchdict["project_name"] = project.normalized_name
-        db_request.GET["page"] = "2"
+        db_request.GET["after"] = "{:%Y-%m-%dT%H:%M:%S.%f},{}".format(
+            journals[24].submitted_date, journals[24].id,
+        )
         result = views.journals_list(project, db_request)
 
         assert result == {
@@ -290,7 +292,7 @@ class TestProjectJournalsList:
     def test_with_invalid_page(self, db_request):
         project = ProjectFactory.create()
         db_request.matchdict["project_name"] = project.normalized_name
-        db_request.GET["page"] = "not an integer"
+        db_request.GET["before"] = "not a cursor"
 
         with pytest.raises(HTTPBadRequest):
             views.journals_list(project, db_request)
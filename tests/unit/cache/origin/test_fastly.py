@@ -85,13 +85,91 @@ class TestPurgeKey:
         ]
 
 
+class TestPurgeKeys:
+
+    def test_purges_successfully(self, monkeypatch):
+        monkeypatch.setattr(fastly, "PURGE_BATCH_SIZE", 2)
+        task = pretend.stub()
+        cacher = pretend.stub(purge_keys=pretend.call_recorder(lambda k: None))
+        request = pretend.stub(
+            find_service=pretend.call_recorder(lambda iface: cacher),
+            log=pretend.stub(
+                info=pretend.call_recorder(lambda *args, **kwargs: None),
+            )
+        )
+
+        fastly.purge_keys(task, request, ["one", "two", "three"])
+
+        assert request.find_service.calls == [pretend.call(IOriginCache)]
+        assert cacher.purge_keys.calls == [
+            pretend.call(["one", "two"]),
+            pretend.call(["three"]),
+        ]
+        assert request.log.info.calls == [
+            pretend.call('Purging %s', "one two"),
+            pretend.call('Purging %s', "three"),
+        ]
+
+    @pytest.mark.parametrize(
+        "exception_type",
+        [
+            requests.ConnectionError,
+            requests.HTTPError,
+            requests.Timeout,
+            fastly.UnsuccessfulPurge,
+        ],
+    )
+    def test_retries_failed_batches(self, monkeypatch, exception_type):
+        monkeypatch.setattr(fastly, "PURGE_BATCH_SIZE", 2)
+        exc = exception_type()
+
+        class Cacher:
+            @staticmethod
+            @pretend.call_recorder
+            def purge_keys(keys):
+                if "three" in keys:
+                    raise exc
+
+        class Task:
+            @staticmethod
+            @pretend.call_recorder
+            def retry(args, exc):
+                raise celery.exceptions.Retry
+
+        task = Task()
+        cacher = Cacher()
+        request = pretend.stub(
+            find_service=pretend.call_recorder(lambda iface: cacher),
+            log=pretend.stub(
+                info=pretend.call_recorder(lambda *args, **kwargs: None),
+                error=pretend.call_recorder(lambda *args, **kwargs: None),
+            )
+        )
+
+        with pytest.raises(celery.exceptions.Retry):
+            fastly.purge_keys(task, request, ["one", "two", "three", "four"])
+
+        assert cacher.purge_keys.calls == [
+            pretend.call(["one", "two"]),
+            pretend.call(["three", "four"]),
+        ]
+        assert task.retry.calls == [
+            pretend.call(args=(["three", "four"],), exc=exc),
+        ]
+        assert request.log.error.calls == [
+            pretend.call(
+                'Error purging %s: %s', "three four", str(exception_type()),
+            ),
+        ]
+
+
 class TestFastlyCache:
 
     def test_verify_service(self):
         assert verifyClass(IOriginCache, fastly.FastlyCache)
 
     def test_create_service(self):
-        purge_key = pretend.stub(delay=pretend.stub())
+        purge_keys = pretend.stub(delay=pretend.stub())
         request = pretend.stub(
             registry=pretend.stub(
                 settings={
@@ -99,13 +177,13 @@ class TestFastlyCache:
                     "origin_cache.service_id": "the service id",
                 },
             ),
-            task=lambda f: purge_key,
+            task=lambda f: purge_keys,
         )
         cacher = fastly.FastlyCache.create_service(None, request)
         assert isinstance(cacher, fastly.FastlyCache)
         assert cacher.api_key == "the api key"
         assert cacher.service_id == "the service id"
-        assert cacher._purger is purge_key.delay
+        assert cacher._purger is purge_keys.delay
 
     def test_adds_surrogate_key(self):
         request = pretend.stub()
@@ -175,9 +253,10 @@ class TestFastlyCache:
             purger=purge_delay,
         )
 
-        cacher.purge(["one", "two"])
+        cacher.purge({"two", "one"})
+        cacher.purge(set())
 
-        assert purge_delay.calls == [pretend.call("one"), pretend.call("two")]
+        assert purge_delay.calls == [pretend.call(["one", "two"])]
 
     def test_purge_key_ok(self, monkeypatch):
         cacher = fastly.FastlyCache(
@@ -236,3 +315,49 @@ class TestFastlyCache:
             ),
         ]
         assert response.raise_for_status.calls == [pretend.call()]
+
+    def test_purge_keys_ok(self, monkeypatch):
+        cacher = fastly.FastlyCache(
+            api_key="an api key",
+            service_id="the-service-id",
+            purger=None,
+        )
+
+        response = pretend.stub(
+            raise_for_status=pretend.call_recorder(lambda: None),
+            json=lambda: {"one": "1-abc", "two": "2-def"},
+        )
+        requests_post = pretend.call_recorder(lambda *a, **kw: response)
+        monkeypatch.setattr(requests, "post", requests_post)
+
+        cacher.purge_keys(["one", "two"])
+
+        assert requests_post.calls == [
+            pretend.call(
+                "https://api.fastly.com/service/the-service-id/purge",
+                headers={
+                    "Accept": "application/json",
+                    "Fastly-Key": "an api key",
+                    "Fastly-Soft-Purge": "1",
+                    "Surrogate-Key": "one two",
+                },
+            ),
+        ]
+        assert response.raise_for_status.calls == [pretend.call()]
+
+    @pytest.mark.parametrize("result", [{"one": "1-abc"}, {}])
+    def test_purge_keys_unsuccessful(self, monkeypatch, result):
+        cacher = fastly.FastlyCache(
+            api_key="an api key",
+            service_id="the-service-id",
+            purger=None,
+        )
+
+        response = pretend.stub(
+            raise_for_status=pretend.call_recorder(lambda: None),
+            json=lambda: result,
+        )
+        monkeypatch.setattr(requests, "post", lambda *a, **kw: response)
+
+        with pytest.raises(fastly.UnsuccessfulPurge):
+            cacher.purge_keys(["one", "two"])
@@ -0,0 +1,198 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pretend
+import pytest
+
+from sqlalchemy import event
+
+from warehouse.classifiers import cache
+from warehouse.classifiers.models import Classifier
+
+from ...common.db.classifiers import ClassifierFactory
+from ...common.db.packaging import ProjectFactory, ReleaseFactory
+
+
+class TestClassifiers:
+
+    def test_snapshot(self, db_session):
+        valid = ClassifierFactory.create(classifier="A :: B")
+        deprecated = ClassifierFactory.create(
+            classifier="A :: C", deprecated=True,
+        )
+
+        classifiers = cache.load_classifiers(db_session)
+
+        assert classifiers.names == frozenset(["A :: B", "A :: C"])
+        assert classifiers.deprecated == frozenset(["A :: C"])
+        assert classifiers.by_name == {
+            "A :: B": cache.ClassifierState(valid.id, "A :: B", False),
+            "A :: C": cache.ClassifierState(deprecated.id, "A :: C", True),
+        }
+
+    def test_attach_without_querying(self, db_session):
+        ClassifierFactory.create(classifier="A :: B")
+        ClassifierFactory.create(classifier="A :: C")
+        classifiers = cache.load_classifiers(db_session)
+        release = ReleaseFactory.create(project=ProjectFactory.create())
+        db_session.flush()
+        db_session.expunge_all()
+
+        queries = []
+
+        def record(conn, cursor, statement, *args):
+            queries.append(statement)
+
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            attached = classifiers.attach(db_session, ["A :: C", "A :: B"])
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        assert queries == []
+        assert [c.classifier for c in attached] == ["A :: B", "A :: C"]
+        assert all(c in db_session for c in attached)
+
+        release = db_session.merge(release)
+        release._classifiers = attached
+        db_session.flush()
+        db_session.refresh(release)
+
+        assert release.classifiers == ["A :: B", "A :: C"]
+
+
+class TestClassifierCache:
+
+    def test_caches_until_expired(self, db_session):
+        now = [0]
+        classifier_cache = cache.ClassifierCache(10, clock=lambda: now[0])
+
+        first = classifier_cache.get(db_session)
+        ClassifierFactory.create(classifier="A :: B")
+
+        now[0] = 9
+        assert classifier_cache.get(db_session) is first
+        assert first.names == frozenset()
+
+        now[0] = 10
+        assert classifier_cache.get(db_session).names == frozenset(["A :: B"])
+
+    def test_invalidate(self, db_session):
+        classifier_cache = cache.ClassifierCache(10, clock=lambda: 0)
+
+        first = classifier_cache.get(db_session)
+        classifier_cache.invalidate()
+
+        assert classifier_cache.get(db_session) is not first
+
+    def test_invalidates_other_processes(self, db_session):
+        import fakeredis
+        redis_conn = fakeredis.FakeStrictRedis()
+        now = [0]
+        admin = cache.ClassifierCache(
+            10, redis_conn=redis_conn, clock=lambda: now[0],
+        )
+        upload = cache.ClassifierCache(
+            10, redis_conn=redis_conn, clock=lambda: now[0],
+        )
+
+        assert upload.get(db_session).names == frozenset()
+        ClassifierFactory.create(classifier="A :: B")
+        admin.invalidate()
+        now[0] = upload.check_interval
+
+        assert upload.get(db_session).names == frozenset(["A :: B"])
+        redis_conn.flushall()
+
+
+class TestGetClassifiers:
+
+    def test_without_cache(self, db_request):
+        ClassifierFactory.create(classifier="A :: B")
+        db_request.registry = pretend.stub(get=lambda key: None)
+
+        assert cache.get_classifiers(db_request).names == \
+            frozenset(["A :: B"])
+
+    def test_with_cache(self):
+        result = pretend.stub()
+        classifier_cache = pretend.stub(
+            get=pretend.call_recorder(lambda session: result),
+        )
+        request = pretend.stub(
+            db=pretend.stub(),
+            registry={"warehouse.classifiers.cache": classifier_cache},
+        )
+
+        assert cache.get_classifiers(request) is result
+        assert classifier_cache.get.calls == [pretend.call(request.db)]
+
+
+class TestClassifierChanges:
+
+    @pytest.mark.parametrize("attr", ["new", "dirty", "deleted"])
+    def test_store_classifier_changes(self, attr):
+        session = pretend.stub(
+            info={}, new=set(), dirty=set(), deleted={object()},
+            is_modified=lambda obj, include_collections: True,
+        )
+        setattr(session, attr, getattr(session, attr) | {
+            Classifier(classifier="A :: B"),
+        })
+
+        cache.store_classifier_changes(
+            pretend.stub(), session, pretend.stub(),
+        )
+
+        assert session.info == {"warehouse.classifiers.changed": True}
+
+    def test_store_classifier_collection_changes(self):
+        session = pretend.stub(
+            info={}, new=set(), deleted=set(),
+            dirty={Classifier(classifier="A :: B")},
+            is_modified=lambda obj, include_collections: False,
+        )
+
+        cache.store_classifier_changes(
+            pretend.stub(), session, pretend.stub(),
+        )
+
+        assert session.info == {}
+
+    def test_invalidate_classifier_cache(self):
+        classifier_cache = pretend.stub(
+            invalidate=pretend.call_recorder(lambda: None),
+        )
+        config = pretend.stub(
+            registry={"warehouse.classifiers.cache": classifier_cache},
+        )
+        session = pretend.stub(info={"warehouse.classifiers.changed": True})
+
+        cache.invalidate_classifier_cache(config, session)
+
+        assert session.info == {}
+        assert classifier_cache.invalidate.calls == [pretend.call()]
+
+    def test_invalidate_without_cache(self):
+        session = pretend.stub(info={"warehouse.classifiers.changed": True})
+
+        cache.invalidate_classifier_cache(
+            pretend.stub(registry={}), session,
+        )
+
+        assert session.info == {}
+
+    def test_invalidate_no_changes(self):
+        config = pretend.stub(registry=pretend.stub())
+
+        cache.invalidate_classifier_cache(config, pretend.stub(info={}))
@@ -11,13 +11,55 @@
 # limitations under the License.
 
 import datetime
+import json
+import uuid
 
-from warehouse.email.ses.models import EmailMessage
+import pretend
+import pytest
+import redis
+
+from sqlalchemy import event
+
+from warehouse.accounts.models import UnverifyReasons
+from warehouse.email.ses import tasks
+from warehouse.email.ses.models import (
+    EmailMessage, EmailStatuses, Event, EventTypes,
+)
 from warehouse.email.ses.tasks import (
     CLEANUP_DELIVERED_AFTER, CLEANUP_AFTER, cleanup,
 )
+from warehouse.utils import redis as warehouse_redis
+
+from ....common.db.accounts import EmailFactory
+from ....common.db.ses import EmailMessageFactory, EventFactory
+
+
+@pytest.fixture
+def fakeredis():
+    import fakeredis
+    _fakeredis = fakeredis.FakeStrictRedis()
+    yield _fakeredis
+    _fakeredis.flushall()
+
+
+def _request(settings=None, **kwargs):
+    if settings is None:
+        settings = {"celery.scheduler_url": "redis://localhost:6379/0"}
+    return pretend.stub(registry=pretend.stub(settings=settings), **kwargs)
+
 
-from ....common.db.ses import EmailMessageFactory
+def _notification(message_id, notification_type, timestamp=None, **data):
+    message = {
+        "notificationType": notification_type,
+        "mail": {"messageId": message_id},
+    }
+    message.update(data)
+    return {
+        "Type": "Notification",
+        "MessageId": str(uuid.uuid4()),
+        "Message": json.dumps(message),
+        "Timestamp": timestamp or "2018-04-08T17:01:40.114582Z",
+    }
 
 
 def test_cleanup_cleans_correctly(db_request):
@@ -47,3 +89,340 @@ def test_cleanup_cleans_correctly(db_request):
     cleanup(db_request)
 
     assert set(db_request.db.query(EmailMessage).all()) == set(to_be_kept)
+    assert db_request.registry.datadog.increment.calls == [
+        pretend.call(
+            "warehouse.email.ses.cleanup.deleted", 1,
+            tags=["reason:delivered"],
+        ),
+        pretend.call(
+            "warehouse.email.ses.cleanup.deleted", 1,
+            tags=["reason:expired"],
+        ),
+    ]
+
+
+def test_cleanup_in_chunks(db_request, monkeypatch):
+    monkeypatch.setattr(tasks, "CLEANUP_BATCH_SIZE", 2)
+    cleanup_task = pretend.stub(
+        delay=pretend.call_recorder(lambda: None),
+    )
+    db_request.task = pretend.call_recorder(lambda task: cleanup_task)
+
+    created = (
+        datetime.datetime.utcnow() - CLEANUP_DELIVERED_AFTER -
+        datetime.timedelta(hours=1)
+    )
+    for _ in range(3):
+        EventFactory.create(
+            email=EmailMessageFactory.create(
+                status="Delivered", created=created,
+            ),
+        )
+    db_request.db.flush()
+
+    cleanup(db_request)
+
+    assert db_request.db.query(EmailMessage).count() == 1
+    assert db_request.db.query(Event).count() == 1
+    assert db_request.task.calls == [pretend.call(cleanup)]
+    assert cleanup_task.delay.calls == [pretend.call()]
+
+    cleanup(db_request)
+
+    assert db_request.db.query(EmailMessage).count() == 0
+    assert db_request.db.query(Event).count() == 0
+    assert cleanup_task.delay.calls == [pretend.call()]
+
+
+class TestQueueNotification:
+
+    def test_no_redis(self):
+        assert not tasks.queue_notification(_request(settings={}), {})
+
+    def test_queues(self, fakeredis, monkeypatch):
+        monkeypatch.setattr(
+            warehouse_redis, "get_redis", lambda url: fakeredis,
+        )
+
+        assert tasks.queue_notification(_request(), {"MessageId": "1"})
+        assert fakeredis.lrange(tasks.NOTIFICATIONS_KEY, 0, -1) == [
+            b'{"MessageId": "1"}',
+        ]
+
+    def test_redis_down(self, monkeypatch):
+        monkeypatch.setattr(
+            warehouse_redis,
+            "get_redis",
+            lambda url: pretend.stub(
+                rpush=pretend.raiser(redis.exceptions.ConnectionError),
+            ),
+        )
+
+        assert not tasks.queue_notification(_request(), {"MessageId": "1"})
+
+
+class TestIngestNotifications:
+
+    def test_no_redis(self):
+        tasks.ingest_notifications(_request(settings={}))
+
+    @pytest.mark.parametrize("count", [0, 3, 4])
+    def test_batches(self, fakeredis, monkeypatch, count):
+        monkeypatch.setattr(
+            warehouse_redis, "get_redis", lambda url: fakeredis,
+        )
+        monkeypatch.setattr(tasks, "NOTIFICATION_BATCH_SIZE", 2)
+        for i in range(count):
+            fakeredis.rpush(tasks.NOTIFICATIONS_KEY, json.dumps({"i": i}))
+
+        delay = pretend.call_recorder(lambda notifications: None)
+        task = pretend.call_recorder(lambda func: pretend.stub(delay=delay))
+
+        tasks.ingest_notifications(_request(task=task))
+
+        assert delay.calls == [
+            pretend.call([{"i": i} for i in range(start, count)][:2])
+            for start in range(0, count, 2)
+        ]
+        assert fakeredis.llen(tasks.NOTIFICATIONS_KEY) == 0
+
+
+class TestProcessNotifications:
+
+    def test_processes_batch(self, db_request):
+        delivered_address = EmailFactory.create()
+        delivered = EmailMessageFactory.create(to=delivered_address.email)
+        bounced_address = EmailFactory.create(verified=True)
+        bounced = EmailMessageFactory.create(to=bounced_address.email)
+
+        delivery = _notification(
+            delivered.message_id, "Delivery", delivery={"some": "data"},
+        )
+        notifications = [
+            # These arrive out of order, but are applied in the order they
+            # were sent.
+            _notification(
+                bounced.message_id, "Bounce",
+                timestamp="2018-04-08T17:02:00.000000Z",
+                bounce={"bounceType": "Permanent"},
+            ),
+            _notification(
+                bounced.message_id, "Delivery",
+                timestamp="2018-04-08T17:01:00.000000Z",
+                delivery={},
+            ),
+            delivery,
+            delivery,
+        ]
+
+        tasks.process_notifications(db_request, notifications)
+        db_request.db.flush()
+
+        assert delivered.status is EmailStatuses.Delivered
+        assert bounced.status is EmailStatuses.Bounced
+        assert not bounced_address.verified
+        assert bounced_address.unverify_reason is UnverifyReasons.HardBounce
+
+        event = (
+            db_request.db.query(Event)
+                         .filter(Event.event_id == delivery["MessageId"])
+                         .one())
+        assert event.email == delivered
+        assert event.event_type is EventTypes.Delivery
+        assert event.data == {"some": "data"}
+        assert db_request.db.query(Event).count() == 3
+        assert db_request.registry.datadog.increment.calls == [
+            pretend.call("warehouse.email.ses.notifications.processed", 3),
+        ]
+
+    def test_skips_existing_events(self, db_request):
+        event = EventFactory.create()
+        notification = _notification(event.email.message_id, "Delivery")
+        notification["MessageId"] = event.event_id
+
+        tasks.process_notifications(db_request, [notification])
+
+        assert db_request.db.query(Event).all() == [event]
+        assert event.email.status is EmailStatuses.Accepted
+
+    def test_locks_emails_and_skips_concurrent_duplicates(self, db_request):
+        em = EmailMessageFactory.create()
+        notification = _notification(em.message_id, "Delivery", delivery={})
+        db_request.db.flush()
+
+        # Stand in for another batch, which gets the same notification into
+        # the table between us checking for it and inserting it.
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+            if statement.startswith("INSERT INTO ses_events"):
+                cursor.execute(
+                    "INSERT INTO ses_events (email_id, event_id, event_type) "
+                    "VALUES (%s, %s, 'Delivery')",
+                    (str(em.id), notification["MessageId"]),
+                )
+
+        connection = db_request.db.connection()
+        event.listen(
+            connection, "before_cursor_execute", before_cursor_execute,
+        )
+        try:
+            tasks.process_notifications(db_request, [notification])
+        finally:
+            event.remove(
+                connection, "before_cursor_execute", before_cursor_execute,
+            )
+
+        assert any(
+            "FROM ses_emails" in statement and
+            "FOR UPDATE OF ses_emails" in statement
+            for statement in statements
+        )
+        assert db_request.db.query(Event).count() == 1
+
+    def test_skips_invalid(self, db_request):
+        em = EmailMessageFactory.create()
+
+        tasks.process_notifications(
+            db_request,
+            [_notification(em.message_id, "Complaint", complaint={})],
+        )
+
+        assert db_request.db.query(Event).count() == 0
+        assert em.status is EmailStatuses.Accepted
+        assert db_request.registry.datadog.increment.calls == [
+            pretend.call(
+                "warehouse.email.ses.notifications.skipped",
+                tags=["reason:invalid_notification"],
+            ),
+            pretend.call("warehouse.email.ses.notifications.processed", 0),
+        ]
+
+    def test_retries_unknown(self, db_request, fakeredis, monkeypatch):
+        monkeypatch.setattr(
+            db_request.registry, "settings",
+            {"celery.scheduler_url": "redis://localhost:6379/0"},
+        )
+        monkeypatch.setattr(
+            warehouse_redis, "get_redis", lambda url: fakeredis,
+        )
+        monkeypatch.setattr(tasks, "UNKNOWN_MESSAGE_MAX_ATTEMPTS", 3)
+        first = _notification("unknown", "Delivery", delivery={})
+        last = dict(
+            _notification("unknown", "Delivery", delivery={}), _attempts=2,
+        )
+
+        tasks.process_notifications(db_request, [first, last])
+
+        assert db_request.db.query(Event).count() == 0
+        assert [
+            json.loads(item)
+            for item in fakeredis.lrange(tasks.NOTIFICATIONS_KEY, 0, -1)
+        ] == [dict(first, _attempts=1)]
+        assert db_request.registry.datadog.increment.calls == [
+            pretend.call("warehouse.email.ses.notifications.retried", 1),
+            pretend.call(
+                "warehouse.email.ses.notifications.skipped",
+                1,
+                tags=["reason:unknown_message"],
+            ),
+            pretend.call("warehouse.email.ses.notifications.processed", 0),
+        ]
+
+    def test_processes_retried(self, db_request, fakeredis, monkeypatch):
+        monkeypatch.setattr(
+            db_request.registry, "settings",
+            {"celery.scheduler_url": "redis://localhost:6379/0"},
+        )
+        monkeypatch.setattr(
+            warehouse_redis, "get_redis", lambda url: fakeredis,
+        )
+        notification = _notification("later", "Delivery", delivery={})
+
+        tasks.process_notifications(db_request, [notification])
+        EmailMessageFactory.create(message_id="later")
+        retried = [
+            json.loads(item)
+            for item in fakeredis.lrange(tasks.NOTIFICATIONS_KEY, 0, -1)
+        ]
+        tasks.process_notifications(db_request, retried)
+
+        event = db_request.db.query(Event).one()
+        assert event.event_id == notification["MessageId"]
+        assert event.email.status is EmailStatuses.Delivered
+
+    @pytest.mark.parametrize(
+        ("settings", "redis_conn"),
+        [
+            ({}, None),
+            (
+                {"celery.scheduler_url": "redis://localhost:6379/0"},
+                pretend.stub(
+                    rpush=pretend.raiser(redis.exceptions.ConnectionError),
+                ),
+            ),
+        ],
+    )
+    def test_unknown_without_redis(self, db_request, monkeypatch, settings,
+                                   redis_conn):
+        monkeypatch.setattr(db_request.registry, "settings", settings)
+        monkeypatch.setattr(
+            warehouse_redis, "get_redis", lambda url: redis_conn,
+        )
+
+        tasks.process_notifications(
+            db_request, [_notification("unknown", "Delivery", delivery={})],
+        )
+
+        assert db_request.registry.datadog.increment.calls == [
+            pretend.call(
+                "warehouse.email.ses.notifications.skipped",
+                1,
+                tags=["reason:unknown_message"],
+            ),
+            pretend.call("warehouse.email.ses.notifications.processed", 0),
+        ]
+
+    @pytest.mark.parametrize(
+        "malformed",
+        [
+            {"MessageId": "1", "Message": "not json"},
+            {"Message": json.dumps({})},
+            _notification("m", "Unknown"),
+            _notification(None, "Delivery", delivery={}),
+            _notification("m", "Delivery", delivery="not a dict"),
+            _notification("m", "Bounce", bounce={}),
+            {"MessageId": "1", "Message": json.dumps({"mail": "nope"})},
+            "not a dict",
+        ],
+    )
+    def test_skips_malformed(self, db_request, malformed):
+        e = EmailFactory.create()
+        em = EmailMessageFactory.create(to=e.email)
+
+        tasks.process_notifications(
+            db_request,
+            [malformed, _notification(em.message_id, "Delivery", delivery={})],
+        )
+        db_request.db.flush()
+
+        assert em.status is EmailStatuses.Delivered
+        assert db_request.db.query(Event).count() == 1
+        assert db_request.registry.datadog.increment.calls == [
+            pretend.call(
+                "warehouse.email.ses.notifications.skipped",
+                tags=["reason:malformed_notification"],
+            ),
+            pretend.call("warehouse.email.ses.notifications.processed", 1),
+        ]
+
+    def test_nothing_well_formed(self, db_request):
+        tasks.process_notifications(db_request, ["not a dict"])
+
+        assert db_request.registry.datadog.increment.calls == [
+            pretend.call(
+                "warehouse.email.ses.notifications.skipped",
+                tags=["reason:malformed_notification"],
+            ),
+        ]
@@ -156,6 +156,56 @@ class TestNotification:
         with pytest.raises(HTTPBadRequest):
             views.notification(request)
 
+    def test_queues_when_batching(self, db_request, monkeypatch):
+        verify_sns_message = pretend.call_recorder(lambda *a, **kw: None)
+        monkeypatch.setattr(views, "_verify_sns_message", verify_sns_message)
+        queue_notification = pretend.call_recorder(lambda request, data: True)
+        monkeypatch.setattr(views, "queue_notification", queue_notification)
+
+        monkeypatch.setattr(
+            db_request.registry,
+            "settings",
+            {"mail.batch_notifications": "true"},
+        )
+        db_request.json_body = {
+            "Type": "Notification",
+            "MessageId": str(uuid.uuid4()),
+        }
+
+        resp = views.notification(db_request)
+
+        assert resp.status_code == 200
+        assert queue_notification.calls == [
+            pretend.call(db_request, db_request.json_body),
+        ]
+        assert db_request.db.query(Event).count() == 0
+
+    def test_processes_when_queueing_fails(self, db_request, monkeypatch):
+        verify_sns_message = pretend.call_recorder(lambda *a, **kw: None)
+        monkeypatch.setattr(views, "_verify_sns_message", verify_sns_message)
+        queue_notification = pretend.call_recorder(lambda request, data: False)
+        monkeypatch.setattr(views, "queue_notification", queue_notification)
+
+        event = EventFactory.create()
+
+        monkeypatch.setattr(
+            db_request.registry,
+            "settings",
+            {"mail.batch_notifications": "true"},
+        )
+        db_request.json_body = {
+            "Type": "Notification",
+            "MessageId": event.event_id,
+        }
+
+        resp = views.notification(db_request)
+
+        assert resp.status_code == 200
+        assert queue_notification.calls == [
+            pretend.call(db_request, db_request.json_body),
+        ]
+        assert db_request.db.query(Event).all() == [event]
+
     def test_returns_200_existing_event(self, db_request, monkeypatch):
         verify_sns_message = pretend.call_recorder(lambda *a, **kw: None)
         monkeypatch.setattr(views, "_verify_sns_message", verify_sns_message)
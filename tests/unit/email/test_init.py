@@ -123,6 +123,92 @@ class TestSendEmail:
         assert task.retry.calls == [pretend.call(exc=exc)]
 
 
+class TestSendBulkEmail:
+
+    def test_send_bulk_email_success(self):
+        send_many = pretend.call_recorder(lambda *a, **kw: [])
+        sender = pretend.stub(send_many=send_many)
+        request = pretend.stub(
+            find_service=pretend.call_recorder(lambda *a, **kw: sender),
+            registry=pretend.stub(settings={"site.name": "DevPyPI"}),
+        )
+
+        email.send_bulk_email(
+            request,
+            "subject",
+            "body",
+            recipients=["a", "b"],
+        )
+
+        assert request.find_service.calls == [pretend.call(IEmailSender)]
+        assert send_many.calls == [
+            pretend.call("[DevPyPI] subject", "body", recipients=["a", "b"]),
+        ]
+
+    def test_send_bulk_email_resends_failed(self):
+        sender = pretend.stub(send_many=lambda *a, **kw: ["b"])
+        send_bulk_email = pretend.stub(
+            delay=pretend.call_recorder(lambda *args, **kwargs: None)
+        )
+        request = pretend.stub(
+            find_service=lambda *a, **kw: sender,
+            registry=pretend.stub(settings={"site.name": "DevPyPI"}),
+            task=pretend.call_recorder(lambda task: send_bulk_email),
+        )
+
+        email.send_bulk_email(
+            request,
+            "subject",
+            "body",
+            recipients=["a", "b"],
+        )
+
+        assert request.task.calls == [pretend.call(email.send_bulk_email)]
+        assert send_bulk_email.delay.calls == [
+            pretend.call("subject", "body", recipients=["b"], attempt=2),
+        ]
+
+    def test_send_bulk_email_gives_up(self, datadog):
+        sender = pretend.stub(send_many=lambda *a, **kw: ["b"])
+        request = pretend.stub(
+            find_service=lambda *a, **kw: sender,
+            registry=pretend.stub(
+                settings={"site.name": "DevPyPI"},
+                datadog=datadog,
+            ),
+            task=pretend.raiser(AssertionError),
+        )
+
+        email.send_bulk_email(
+            request,
+            "subject",
+            "body",
+            recipients=["a", "b"],
+            attempt=email.BULK_EMAIL_MAX_ATTEMPTS,
+        )
+
+        assert datadog.increment.calls == [
+            pretend.call("warehouse.email.bulk.failed", 1),
+        ]
+
+    def test_batches_recipients(self, monkeypatch):
+        monkeypatch.setattr(email, "BULK_EMAIL_BATCH_SIZE", 2)
+        send_bulk_email = pretend.stub(
+            delay=pretend.call_recorder(lambda *args, **kwargs: None)
+        )
+        request = pretend.stub(
+            task=pretend.call_recorder(lambda task: send_bulk_email),
+        )
+
+        email._send_bulk_email(request, "subject", "body", iter("abcde"))
+
+        assert send_bulk_email.delay.calls == [
+            pretend.call("subject", "body", recipients=["a", "b"]),
+            pretend.call("subject", "body", recipients=["c", "d"]),
+            pretend.call("subject", "body", recipients=["e"]),
+        ]
+
+
 class TestSendPasswordResetEmail:
 
     def test_send_password_reset_email(
@@ -434,13 +520,13 @@ class TestCollaboratorAddedEmail:
         )
         body_renderer.string_response = 'Email Body'
 
-        send_email = pretend.stub(
+        send_bulk_email = pretend.stub(
             delay=pretend.call_recorder(lambda *args, **kwargs: None)
         )
         pyramid_request.task = pretend.call_recorder(
-            lambda *args, **kwargs: send_email
+            lambda *args, **kwargs: send_bulk_email
         )
-        monkeypatch.setattr(email, 'send_email', send_email)
+        monkeypatch.setattr(email, 'send_bulk_email', send_bulk_email)
 
         result = email.send_collaborator_added_email(
             pyramid_request,
@@ -463,20 +549,15 @@ class TestCollaboratorAddedEmail:
         body_renderer.assert_(role='Owner')
         body_renderer.assert_(submitter=stub_submitter_user.username)
 
-        assert pyramid_request.task.calls == [
-            pretend.call(send_email),
-            pretend.call(send_email),
-        ]
-        assert send_email.delay.calls == [
-            pretend.call(
-                'Email Subject',
-                'Email Body',
-                recipient="username <email@example.com>",
-            ),
+        assert pyramid_request.task.calls == [pretend.call(send_bulk_email)]
+        assert send_bulk_email.delay.calls == [
             pretend.call(
                 'Email Subject',
                 'Email Body',
-                recipient="submitterusername <submiteremail@example.com>",
+                recipients=[
+                    "username <email@example.com>",
+                    "submitterusername <submiteremail@example.com>",
+                ],
             ),
         ]
 
@@ -14,13 +14,15 @@ import uuid
 
 import pretend
 import pytest
+import redis
 
 from pyramid_mailer.mailer import DummyMailer
 from zope.interface.verify import verifyClass
 
+from warehouse.email import services
 from warehouse.email.interfaces import IEmailSender
 from warehouse.email.services import (
-    SMTPEmailSender, SESEmailSender, _format_sender,
+    SEND_RATE_KEY, SMTPEmailSender, SESEmailSender, _format_sender,
 )
 from warehouse.email.ses.models import EmailMessage
 
@@ -80,6 +82,48 @@ class TestSMTPEmailSender:
         assert msg.recipients == ["sombody@example.com"]
         assert msg.sender == "DevPyPI <noreply@example.com>"
 
+    def test_send_many(self):
+        mailer = DummyMailer()
+        service = SMTPEmailSender(mailer,
+                                  sender="DevPyPI <noreply@example.com>")
+
+        failed = service.send_many(
+            "a subject",
+            "a body",
+            recipients=["a@example.com", "b@example.com"],
+        )
+
+        assert failed == []
+        assert [msg.recipients for msg in mailer.outbox] == [
+            ["a@example.com"],
+            ["b@example.com"],
+        ]
+        assert {msg.subject for msg in mailer.outbox} == {"a subject"}
+
+    def test_send_many_failure(self):
+        def send_immediately(message):
+            if message.recipients == ["b@example.com"]:
+                raise Exception
+
+        mailer = pretend.stub(send_immediately=send_immediately)
+        service = SMTPEmailSender(mailer)
+
+        failed = service.send_many(
+            "a subject",
+            "a body",
+            recipients=["a@example.com", "b@example.com"],
+        )
+
+        assert failed == ["b@example.com"]
+
+
+@pytest.fixture
+def fakeredis():
+    import fakeredis
+    _fakeredis = fakeredis.FakeStrictRedis()
+    yield _fakeredis
+    _fakeredis.flushall()
+
 
 class TestSESEmailSender:
 
@@ -98,6 +142,7 @@ class TestSESEmailSender:
                     "site.name": "DevPyPI",
                     "mail.region": "us-west-2",
                     "mail.sender": "noreply@example.com",
+                    "mail.max_send_rate": "50",
                 },
             ),
             db=pretend.stub(),
@@ -112,6 +157,30 @@ class TestSESEmailSender:
         assert sender._client is aws_client
         assert sender._sender == "DevPyPI <noreply@example.com>"
         assert sender._db is request.db
+        assert sender._max_send_rate == 50
+        assert sender._redis is None
+
+    def test_creates_service_with_redis(self, monkeypatch):
+        redis_conn = pretend.stub()
+        get_redis = pretend.call_recorder(lambda url: redis_conn)
+        monkeypatch.setattr(services, "get_redis", get_redis)
+        aws_session = pretend.stub(client=lambda name, region_name: None)
+        request = pretend.stub(
+            find_service=lambda name: {"aws.session": aws_session}[name],
+            registry=pretend.stub(
+                settings={
+                    "site.name": "DevPyPI",
+                    "celery.scheduler_url": "redis://localhost:6379/0",
+                },
+            ),
+            db=pretend.stub(),
+        )
+
+        sender = SESEmailSender.create_service(pretend.stub(), request)
+
+        assert get_redis.calls == [pretend.call("redis://localhost:6379/0")]
+        assert sender._redis is redis_conn
+        assert sender._max_send_rate == services.DEFAULT_MAX_SEND_RATE
 
     def test_send(self, db_session):
         resp = {"MessageId": str(uuid.uuid4()) + "-ses"}
@@ -151,3 +220,139 @@ class TestSESEmailSender:
         assert em.from_ == "noreply@example.com"
         assert em.to == "somebody@example.com"
         assert em.subject == "This is a Subject"
+
+    def test_send_many(self, db_session):
+        def send_email(**kwargs):
+            recipient, = kwargs["Destination"]["ToAddresses"]
+            if recipient == "fails@example.com":
+                raise Exception
+            return {"MessageId": recipient + "-ses"}
+
+        now = [100.0]
+
+        def sleep(seconds):
+            now[0] += seconds
+
+        sleep = pretend.call_recorder(sleep)
+        sender = SESEmailSender(
+            pretend.stub(send_email=send_email),
+            sender="DevPyPI <noreply@example.com>",
+            db=db_session,
+            max_send_rate=2,
+            clock=lambda: now[0],
+            sleep=sleep,
+        )
+
+        failed = sender.send_many(
+            "This is a Subject",
+            "This is a Body",
+            recipients=[
+                "FooBar <a@example.com>",
+                "fails@example.com",
+                "c@example.com",
+                "d@example.com",
+                "e@example.com",
+            ],
+        )
+
+        assert failed == ["fails@example.com"]
+        # Five emails, two a second, means waiting twice.
+        assert sleep.calls == [pretend.call(1.0), pretend.call(1.0)]
+
+        ems = (db_session.query(EmailMessage)
+                         .order_by(EmailMessage.to)
+                         .all())
+        assert [(em.message_id, em.to) for em in ems] == [
+            ("FooBar <a@example.com>-ses", "a@example.com"),
+            ("c@example.com-ses", "c@example.com"),
+            ("d@example.com-ses", "d@example.com"),
+            ("e@example.com-ses", "e@example.com"),
+        ]
+        assert {em.from_ for em in ems} == {"noreply@example.com"}
+        assert {em.subject for em in ems} == {"This is a Subject"}
+
+    def test_send_many_all_fail(self):
+        sender = SESEmailSender(
+            pretend.stub(send_email=pretend.raiser(Exception)),
+            sender="DevPyPI <noreply@example.com>",
+            db=pretend.stub(),
+            sleep=pretend.raiser(AssertionError),
+        )
+
+        assert sender.send_many(
+            "subject", "body", recipients=["a@example.com"],
+        ) == ["a@example.com"]
+
+    def test_send_rate_is_shared(self, fakeredis):
+        now = [100.5]
+
+        def sleep(seconds):
+            now[0] += seconds
+
+        sleep = pretend.call_recorder(sleep)
+        senders = [
+            SESEmailSender(
+                pretend.stub(send_email=lambda **kw: {"MessageId": "1"}),
+                db=pretend.stub(execute=lambda statement: None),
+                max_send_rate=3,
+                redis_conn=fakeredis,
+                clock=lambda: now[0],
+                sleep=sleep,
+            )
+            for _ in range(2)
+        ]
+
+        senders[0].send_many("subject", "body", recipients=["a", "b"])
+        senders[1].send_many("subject", "body", recipients=["c", "d"])
+
+        # The second sender can only send one email before the shared limit
+        # of 3 a second is used up, and has to wait for the next second.
+        assert sleep.calls == [pretend.call(0.5)]
+
+        # Only the emails that were actually sent count against each second,
+        # so that what wasn't sent is left for everyone else.
+        assert fakeredis.get(f"{SEND_RATE_KEY}:100") == b"3"
+        assert fakeredis.get(f"{SEND_RATE_KEY}:101") == b"1"
+
+    def test_send_rate_gives_back_unsent(self):
+        now = [100.5]
+
+        def sleep(seconds):
+            now[0] += seconds
+
+        sender = SESEmailSender(
+            pretend.stub(send_email=lambda **kw: {"MessageId": "1"}),
+            db=pretend.stub(execute=lambda statement: None),
+            max_send_rate=3,
+            clock=lambda: now[0],
+            sleep=sleep,
+        )
+        sender._reserve(100, 2)
+
+        sender.send_many("subject", "body", recipients=["a", "b", "c"])
+
+        assert (sender._second, sender._used) == (101, 2)
+
+    def test_send_rate_without_working_redis(self):
+        redis_conn = pretend.stub(
+            pipeline=pretend.raiser(redis.exceptions.ConnectionError),
+            incrby=pretend.raiser(redis.exceptions.ConnectionError),
+        )
+        now = [100.0]
+
+        def sleep(seconds):
+            now[0] += seconds
+
+        sleep = pretend.call_recorder(sleep)
+        sender = SESEmailSender(
+            pretend.stub(send_email=lambda **kw: {"MessageId": "1"}),
+            db=pretend.stub(execute=lambda statement: None),
+            max_send_rate=2,
+            redis_conn=redis_conn,
+            clock=lambda: now[0],
+            sleep=sleep,
+        )
+
+        sender.send_many("subject", "body", recipients=["a", "b", "c"])
+
+        assert sleep.calls == [pretend.call(1.0)]
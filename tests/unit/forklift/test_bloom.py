@@ -0,0 +1,183 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pretend
+import pytest
+import redis
+
+from warehouse.forklift import bloom
+from warehouse.packaging.models import Filename
+from warehouse.utils import redis as warehouse_redis
+
+from ...common.db.packaging import FileFactory
+
+
+@pytest.fixture
+def fakeredis():
+    import fakeredis
+    _fakeredis = fakeredis.FakeStrictRedis()
+    yield _fakeredis
+    _fakeredis.flushall()
+
+
+@pytest.fixture
+def known_files(fakeredis, monkeypatch):
+    monkeypatch.setattr(warehouse_redis, "get_redis", lambda url: fakeredis)
+    return bloom.BloomFilter(
+        fakeredis,
+        bloom.KNOWN_FILES_KEY,
+        size=bloom.KNOWN_FILES_BITS,
+        hashes=bloom.KNOWN_FILES_HASHES,
+    )
+
+
+def _request(settings=None, **kwargs):
+    if settings is None:
+        settings = {"celery.scheduler_url": "redis://localhost:6379/0"}
+    return pretend.stub(registry=pretend.stub(settings=settings), **kwargs)
+
+
+class TestBloomFilter:
+
+    def test_contains_what_was_added(self, known_files):
+        known_files.set_ready(True)
+        known_files.add("foo", "bar")
+
+        assert known_files.contains_any("foo")
+        assert known_files.contains_any("nope", "bar")
+        assert not known_files.contains_any("nope")
+        assert not known_files.contains_any()
+
+    def test_contains_everything_until_ready(self, known_files):
+        assert not known_files.is_ready()
+        assert known_files.contains_any("nope")
+
+        known_files.set_ready(True)
+        assert known_files.is_ready()
+        assert not known_files.contains_any("nope")
+
+        known_files.set_ready(False)
+        assert not known_files.is_ready()
+        assert known_files.contains_any("nope")
+
+    def test_not_ready_once_lost(self, known_files):
+        known_files.set_ready(True)
+        known_files.add("foo")
+
+        known_files.redis.delete(bloom.KNOWN_FILES_KEY)
+
+        assert not known_files.is_ready()
+        assert known_files.contains_any("nope")
+
+    def test_offsets(self, fakeredis):
+        bloom_filter = bloom.BloomFilter(
+            fakeredis, "key", size=10, hashes=3,
+        )
+        offsets = bloom_filter._offsets("foo")
+
+        assert offsets == bloom_filter._offsets("foo")
+        assert len(offsets) == 3
+        assert all(0 <= offset < 10 for offset in offsets)
+
+
+class TestMightBeKnown:
+
+    def test_no_redis(self):
+        assert bloom.might_be_known(_request(settings={}), "foo.tar.gz", "ab")
+
+    def test_not_ready(self, known_files):
+        assert bloom.might_be_known(_request(), "foo.tar.gz", "ab")
+
+    @pytest.mark.parametrize(
+        ("filename", "digest", "expected"),
+        [
+            ("foo.tar.gz", "cd", True),
+            ("bar.tar.gz", "AB", True),
+            ("bar.tar.gz", "cd", False),
+        ],
+    )
+    def test_ready(self, known_files, filename, digest, expected):
+        request = _request()
+        bloom.add_known_file(request, "foo.tar.gz", "ab")
+        known_files.set_ready(True)
+
+        assert bloom.might_be_known(request, filename, digest) is expected
+
+    def test_redis_down(self, monkeypatch):
+        monkeypatch.setattr(
+            warehouse_redis,
+            "get_redis",
+            lambda url: pretend.stub(
+                pipeline=pretend.raiser(redis.exceptions.ConnectionError),
+            ),
+        )
+
+        assert bloom.might_be_known(_request(), "foo.tar.gz", "ab")
+
+
+class TestAddKnownFile:
+
+    def test_no_redis(self):
+        bloom.add_known_file(_request(settings={}), "foo.tar.gz", "ab")
+
+    def test_redis_down(self, monkeypatch):
+        setbit = pretend.call_recorder(
+            pretend.raiser(redis.exceptions.RedisError)
+        )
+        monkeypatch.setattr(
+            warehouse_redis,
+            "get_redis",
+            lambda url: pretend.stub(
+                pipeline=pretend.raiser(redis.exceptions.ConnectionError),
+                setbit=setbit,
+            ),
+        )
+
+        bloom.add_known_file(_request(), "foo.tar.gz", "ab")
+
+        assert setbit.calls == [
+            pretend.call(bloom.KNOWN_FILES_KEY, bloom.KNOWN_FILES_BITS, 0),
+        ]
+
+
+class TestBuildKnownFiles:
+
+    def test_no_redis(self, db_request):
+        bloom.build_known_files(_request(settings={}, db=db_request.db))
+
+    def test_already_ready(self, known_files, db_request):
+        known_files.set_ready(True)
+        FileFactory.create(filename="foo.tar.gz")
+
+        bloom.build_known_files(_request(db=db_request.db))
+
+        assert not known_files.contains_any("filename:foo.tar.gz")
+
+    def test_builds(self, known_files, db_request, monkeypatch):
+        monkeypatch.setattr(bloom, "BUILD_BATCH_SIZE", 2)
+        files = [
+            FileFactory.create(filename="foo-{}.tar.gz".format(i))
+            for i in range(3)
+        ]
+        for file_ in files:
+            db_request.db.add(Filename(filename=file_.filename))
+        db_request.db.flush()
+
+        bloom.build_known_files(_request(db=db_request.db))
+
+        assert known_files.is_ready()
+        for file_ in files:
+            assert known_files.contains_any("filename:" + file_.filename)
+            assert known_files.contains_any(
+                "blake2_256:" + file_.blake2_256_digest.lower()
+            )
+        assert not known_files.contains_any("filename:missing.tar.gz")
@@ -13,14 +13,25 @@
 import pretend
 import pytest
 
+from celery.schedules import crontab
+
 from warehouse import forklift
+from warehouse.classifiers.cache import ClassifierCache
+from warehouse.forklift.bloom import build_known_files
 
 
+@pytest.mark.parametrize("scheduler_url", [None, "redis://localhost:6379/0"])
 @pytest.mark.parametrize("forklift_domain", [None, "upload.pypi.io"])
-def test_includeme(forklift_domain, monkeypatch):
+def test_includeme(forklift_domain, scheduler_url, monkeypatch):
     settings = {}
     if forklift_domain:
         settings["forklift.domain"] = forklift_domain
+    if scheduler_url:
+        settings["celery.scheduler_url"] = scheduler_url
+
+    redis_conn = pretend.stub()
+    get_redis = pretend.call_recorder(lambda url: redis_conn)
+    monkeypatch.setattr(forklift, "get_redis", get_redis)
 
     _help_url = pretend.stub()
     monkeypatch.setattr(forklift, '_help_url', _help_url)
@@ -31,6 +42,8 @@ def test_includeme(forklift_domain, monkeypatch):
         add_legacy_action_route=pretend.call_recorder(lambda *a, **k: None),
         add_template_view=pretend.call_recorder(lambda *a, **kw: None),
         add_request_method=pretend.call_recorder(lambda *a, **kw: None),
+        add_periodic_task=pretend.call_recorder(lambda *a, **kw: None),
+        registry={},
     )
 
     forklift.includeme(config)
@@ -61,6 +74,15 @@ def test_includeme(forklift_domain, monkeypatch):
     assert config.add_request_method.calls == [
         pretend.call(_help_url, name='help_url'),
     ]
+    cache = config.registry["warehouse.classifiers.cache"]
+    assert isinstance(cache, ClassifierCache)
+    assert cache.redis_conn is (None if scheduler_url is None else redis_conn)
+    assert get_redis.calls == (
+        [] if scheduler_url is None else [pretend.call(scheduler_url)]
+    )
+    assert config.add_periodic_task.calls == [
+        pretend.call(crontab(minute="*/30"), build_known_files),
+    ]
     if forklift_domain:
         assert config.add_template_view.calls == [
             pretend.call(
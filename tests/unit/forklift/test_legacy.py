@@ -25,6 +25,7 @@ import pytest
 import requests
 
 from pyramid.httpexceptions import HTTPBadRequest, HTTPForbidden
+from sqlalchemy import event
 from webob.multidict import MultiDict
 from wtforms.form import Form
 from wtforms.validators import ValidationError
@@ -329,7 +330,9 @@ class TestValidation:
 
     def test_validate_no_deprecated_classifiers_valid(self, db_request):
         valid_classifier = ClassifierFactory(deprecated=False)
-        validator = legacy._no_deprecated_classifiers(db_request)
+        validator = legacy._no_deprecated_classifiers(
+            db_request, frozenset(),
+        )
 
         form = pretend.stub()
         field = pretend.stub(data=[valid_classifier.classifier])
@@ -340,7 +343,9 @@ class TestValidation:
         deprecated_classifier = ClassifierFactory(
             classifier='AA: BB', deprecated=True,
         )
-        validator = legacy._no_deprecated_classifiers(db_request)
+        validator = legacy._no_deprecated_classifiers(
+            db_request, frozenset([deprecated_classifier.classifier]),
+        )
         db_request.registry = pretend.stub(
             settings={'warehouse.domain': 'host'}
         )
@@ -409,6 +414,32 @@ class TestListField:
         assert form.test.data == expected
 
 
+class TestClassifiersField:
+
+    @pytest.mark.parametrize("data", [[], ["A :: B"], ["A :: B", "A :: C"]])
+    def test_valid(self, data):
+        class MyForm(Form):
+            test = legacy.ClassifiersField()
+
+        form = MyForm(MultiDict([("test", value) for value in data]))
+        form.test.valid_choices = frozenset(["A :: B", "A :: C"])
+
+        assert form.validate()
+        assert form.test.data == data
+
+    def test_invalid(self):
+        class MyForm(Form):
+            test = legacy.ClassifiersField()
+
+        form = MyForm(MultiDict([("test", "A :: B"), ("test", "A :: D")]))
+        form.test.valid_choices = frozenset(["A :: B", "A :: C"])
+
+        assert not form.validate()
+        assert form.errors == {
+            "test": ["'A :: D' is not a valid choice for this field"],
+        }
+
+
 class TestMetadataForm:
 
     @pytest.mark.parametrize(
@@ -592,6 +623,18 @@ class TestFileValidation:
 
         assert legacy._is_valid_dist_file(f, "bdist_wheel")
 
+    def test_zipfile_opened_once(self, tmpdir, monkeypatch):
+        f = str(tmpdir.join("test.whl"))
+
+        with zipfile.ZipFile(f, "w") as zfp:
+            zfp.writestr("WHEEL", b"this is the package info")
+
+        zipfile_cls = pretend.call_recorder(zipfile.ZipFile)
+        monkeypatch.setattr(legacy.zipfile, "ZipFile", zipfile_cls)
+
+        assert legacy._is_valid_dist_file(f, "bdist_wheel")
+        assert zipfile_cls.calls == [pretend.call(f, "r")]
+
 
 class TestIsDuplicateFile:
     def test_is_duplicate_true(self, pyramid_config, db_request):
@@ -666,7 +709,9 @@ class TestIsDuplicateFile:
             ),
         )
 
-        hashes["blake2_256"] = "another blake2 digest"
+        hashes["blake2_256"] = hashlib.blake2b(
+            b"Another fake file.", digest_size=256 // 8
+        ).hexdigest()
 
         assert legacy._is_duplicate_file(
             db_request.db, requested_file_name, hashes
@@ -736,7 +781,7 @@ class TestIsDuplicateFile:
         wrong_hashes = {
             "sha256": "nah",
             "md5": "nope",
-            "blake2_256": "nuh uh"
+            "blake2_256": "0" * 64,
         }
 
         db_request.db.add(
@@ -757,6 +802,108 @@ class TestIsDuplicateFile:
             db_request.db, filename, wrong_hashes
         ) is False
 
+    def test_is_duplicate_false_different_case(self, db_request):
+        project = ProjectFactory.create()
+        release = ReleaseFactory.create(project=project, version="1.0")
+
+        filename = "{}-{}.tar.gz".format(project.name, release.version)
+        file_value = b"A fake file."
+        hashes = {
+            "sha256": hashlib.sha256(file_value).hexdigest(),
+            "md5": hashlib.md5(file_value).hexdigest(),
+            "blake2_256": hashlib.blake2b(
+                file_value, digest_size=256 // 8
+            ).hexdigest()
+        }
+
+        db_request.db.add(
+            File(
+                release=release,
+                filename=filename,
+                md5_digest=hashes["md5"],
+                sha256_digest=hashes["sha256"].upper(),
+                blake2_256_digest=hashes["blake2_256"].upper(),
+                path="source/{name[0]}/{name}/{filename}".format(
+                    name=project.name,
+                    filename=filename,
+                ),
+            ),
+        )
+
+        assert legacy._is_duplicate_file(
+            db_request.db, filename, hashes
+        ) is False
+        assert legacy._is_duplicate_file(
+            db_request.db, filename.upper(), {
+                "sha256": hashes["sha256"].upper(),
+                "md5": hashes["md5"],
+                "blake2_256": hashes["blake2_256"].upper(),
+            }
+        ) is False
+
+
+class TestFileConflicts:
+
+    def _hashes(self, content):
+        return {
+            "sha256": hashlib.sha256(content).hexdigest(),
+            "md5": hashlib.md5(content).hexdigest(),
+            "blake2_256": hashlib.blake2b(
+                content, digest_size=256 // 8
+            ).hexdigest(),
+        }
+
+    def test_no_conflicts(self, db_request):
+        release = ReleaseFactory.create()
+
+        assert legacy._file_conflicts(
+            db_request.db, "foo-1.0.tar.gz", self._hashes(b"foo"), release,
+            "sdist",
+        ) == legacy.FileConflicts(None, False, False)
+
+    @pytest.mark.parametrize("packagetype", ["sdist", "bdist_wheel"])
+    def test_conflicts(self, db_request, packagetype):
+        release = ReleaseFactory.create()
+        hashes = self._hashes(b"foo")
+        FileFactory.create(
+            release=release,
+            filename="foo-1.0.tar.gz",
+            packagetype="sdist",
+            md5_digest=hashes["md5"],
+            sha256_digest=hashes["sha256"],
+            blake2_256_digest=hashes["blake2_256"],
+        )
+        db_request.db.add(Filename(filename="foo-1.0.tar.gz"))
+
+        assert legacy._file_conflicts(
+            db_request.db, "foo-1.0.tar.gz", hashes, release, packagetype,
+        ) == legacy.FileConflicts(True, True, packagetype == "sdist")
+
+    def test_unknown_file_skips_query(self):
+        db_session = pretend.stub(
+            query=pretend.call_recorder(lambda *a: None),
+        )
+
+        assert legacy._file_conflicts(
+            db_session, "foo-1.0-py3-none-any.whl", self._hashes(b"foo"),
+            pretend.stub(), "bdist_wheel", might_be_known=False,
+        ) == legacy.FileConflicts(None, False, False)
+        assert db_session.query.calls == []
+
+    def test_unknown_sdist(self, db_request):
+        release = ReleaseFactory.create()
+        FileFactory.create(
+            release=release,
+            filename="foo-1.0.tar.gz",
+            packagetype="sdist",
+        )
+        db_request.db.add(Filename(filename="foo-1.0.tar.gz"))
+
+        assert legacy._file_conflicts(
+            db_request.db, "foo-1.0.tar.gz", self._hashes(b"foo"), release,
+            "sdist", might_be_known=False,
+        ) == legacy.FileConflicts(None, False, True)
+
 
 class TestFileUpload:
 
@@ -3066,6 +3213,143 @@ class TestFileUpload:
         for r in other_releases:
             assert r._pypi_hidden == previous_releases[r.version]._pypi_hidden
 
+    @pytest.mark.parametrize(
+        ("version", "unkeyed", "expected"),
+        [
+            ("0.5", False, ["0.5", "1.0", "2.0rc1", "3.0"]),
+            ("2.0", False, ["1.0", "2.0rc1", "2.0", "3.0"]),
+            ("3.0.post1", False, ["1.0", "2.0rc1", "3.0", "3.0.post1"]),
+            ("2.0", True, ["1.0", "2.0rc1", "2.0", "3.0"]),
+        ],
+    )
+    def test_orders_new_release(self, pyramid_config, db_request, version,
+                                unkeyed, expected):
+        pyramid_config.testing_securitypolicy(userid=1)
+
+        user = UserFactory.create()
+        EmailFactory.create(user=user)
+        project = ProjectFactory.create()
+        for i, previous in enumerate(["1.0", "2.0rc1", "3.0"]):
+            release = ReleaseFactory.create(
+                project=project,
+                version=previous,
+                _pypi_ordering=i,
+            )
+            if unkeyed:
+                release.version_sort_key = None
+        RoleFactory.create(user=user, project=project)
+
+        filename = "{}-{}.tar.gz".format(project.name, version)
+
+        db_request.user = user
+        db_request.remote_addr = "10.10.10.20"
+        db_request.POST = MultiDict({
+            "metadata_version": "1.2",
+            "name": project.name,
+            "version": version,
+            "summary": "This is my summary!",
+            "filetype": "sdist",
+            "md5_digest": "335c476dc930b959dda9ec82bd65ef19",
+            "content": pretend.stub(
+                filename=filename,
+                file=io.BytesIO(b"A fake file."),
+                type="application/tar",
+            ),
+        })
+
+        storage_service = pretend.stub(store=lambda path, filepath, meta: None)
+        db_request.find_service = lambda svc, name=None: storage_service
+
+        resp = legacy.file_upload(db_request)
+
+        assert resp.status_code == 200
+
+        releases = (
+            db_request.db.query(Release)
+                         .filter(Release.project == project)
+                         .order_by(Release._pypi_ordering)
+                         .all()
+        )
+        assert [r.version for r in releases] == expected
+        assert [r._pypi_ordering for r in releases] == [0, 1, 2, 3]
+        assert all(r.version_sort_key is not None for r in releases)
+
+    def test_order_release_locks_project(self, db_session):
+        project = ProjectFactory.create()
+        ReleaseFactory.create(project=project, version="1.0", _pypi_ordering=0)
+        release = ReleaseFactory.create(project=project, version="2.0")
+        release._pypi_ordering = None
+        db_session.flush()
+
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        connection = db_session.connection()
+        event.listen(
+            connection, "before_cursor_execute", before_cursor_execute,
+        )
+        try:
+            legacy._order_release(db_session, project, release)
+        finally:
+            event.remove(
+                connection, "before_cursor_execute", before_cursor_execute,
+            )
+
+        assert "FOR UPDATE" in statements[0]
+        assert "FROM packages" in statements[0]
+        assert release._pypi_ordering == 1
+
+    def test_upload_records_known_file(self, pyramid_config, db_request,
+                                       monkeypatch):
+        pyramid_config.testing_securitypolicy(userid=1)
+
+        user = UserFactory.create()
+        EmailFactory.create(user=user)
+        project = ProjectFactory.create()
+        release = ReleaseFactory.create(project=project, version="1.0")
+        RoleFactory.create(user=user, project=project)
+
+        might_be_known = pretend.call_recorder(lambda *a: False)
+        monkeypatch.setattr(legacy, "might_be_known", might_be_known)
+        add_known_file = pretend.call_recorder(lambda *a: None)
+        monkeypatch.setattr(legacy, "add_known_file", add_known_file)
+
+        filename = "{}-{}.tar.gz".format(project.name, release.version)
+
+        db_request.user = user
+        db_request.remote_addr = "10.10.10.20"
+        db_request.POST = MultiDict({
+            "metadata_version": "1.2",
+            "name": project.name,
+            "version": release.version,
+            "filetype": "sdist",
+            "md5_digest": "335c476dc930b959dda9ec82bd65ef19",
+            "content": pretend.stub(
+                filename=filename,
+                file=io.BytesIO(b"A fake file."),
+                type="application/tar",
+            ),
+        })
+
+        storage_service = pretend.stub(store=lambda path, filepath, meta: None)
+        db_request.find_service = lambda svc, name=None: storage_service
+
+        resp = legacy.file_upload(db_request)
+
+        assert resp.status_code == 200
+
+        blake2_256 = hashlib.blake2b(
+            b"A fake file.", digest_size=256 // 8
+        ).hexdigest()
+        assert might_be_known.calls == [
+            pretend.call(db_request, filename, blake2_256),
+        ]
+        assert add_known_file.calls == [
+            pretend.call(db_request, filename, blake2_256),
+        ]
+
 
 @pytest.mark.parametrize("status", [True, False])
 def test_legacy_purge(monkeypatch, status):
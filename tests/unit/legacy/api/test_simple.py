@@ -12,9 +12,14 @@
 
 import pretend
 
+from celery.schedules import crontab
+
 from pyramid.httpexceptions import HTTPMovedPermanently
 
 from warehouse.legacy.api import simple
+from warehouse.packaging.models import (
+    File, JournalEntry, Release, SimplePage,
+)
 
 from ....common.db.accounts import UserFactory
 from ....common.db.packaging import (
@@ -88,6 +93,46 @@ class TestSimpleDetail:
         }
         assert db_request.response.headers["X-PyPI-Last-Serial"] == "0"
 
+    def test_serves_materialized_page(self, db_request):
+        project = ProjectFactory.create()
+        db_request.matchdict["name"] = project.normalized_name
+        user = UserFactory.create()
+        je = JournalEntryFactory.create(name=project.name, submitted_by=user)
+        db_request.db.refresh(project)
+        db_request.db.add(
+            SimplePage(
+                name=project.name,
+                serial=je.id,
+                html="<html>materialized</html>",
+            ),
+        )
+
+        resp = simple.simple_detail(project, db_request)
+
+        assert resp is db_request.response
+        assert resp.content_type == "text/html"
+        assert resp.text == "<html>materialized</html>"
+        assert resp.headers["X-PyPI-Last-Serial"] == str(je.id)
+
+    def test_ignores_stale_materialized_page(self, db_request):
+        project = ProjectFactory.create()
+        db_request.matchdict["name"] = project.normalized_name
+        user = UserFactory.create()
+        je = JournalEntryFactory.create(name=project.name, submitted_by=user)
+        db_request.db.refresh(project)
+        db_request.db.add(
+            SimplePage(
+                name=project.name,
+                serial=je.id - 1,
+                html="<html>stale</html>",
+            ),
+        )
+
+        assert simple.simple_detail(project, db_request) == {
+            "project": project,
+            "files": [],
+        }
+
     def test_no_files_with_serial(self, db_request):
         project = ProjectFactory.create()
         db_request.matchdict["name"] = project.normalized_name
@@ -219,3 +264,149 @@ class TestSimpleDetail:
         }
 
         assert db_request.response.headers["X-PyPI-Last-Serial"] == str(je.id)
+
+
+def test_store_simple_pages():
+    session = pretend.stub(
+        info={},
+        new={
+            File(name="foo"),
+            JournalEntry(name="baz"),
+            JournalEntry(name=None),
+            pretend.stub(name="ignored"),
+        },
+        dirty={Release(name="bar")},
+        deleted={File(name="foo"), Release(name=None)},
+    )
+
+    simple.store_simple_pages(pretend.stub(), session, pretend.stub())
+
+    assert session.info["warehouse.legacy.api.simple.projects"] == {
+        "foo", "bar", "baz",
+    }
+
+
+def test_execute_simple_pages():
+    delay = pretend.call_recorder(lambda names: None)
+    task = pretend.call_recorder(lambda t: pretend.stub(delay=delay))
+    config = pretend.stub(task=task)
+    session = pretend.stub(
+        info={"warehouse.legacy.api.simple.projects": {"foo", "bar"}},
+    )
+
+    simple.execute_simple_pages(config, session)
+
+    assert task.calls == [pretend.call(simple.update_simple_pages)]
+    assert delay.calls == [pretend.call(["bar", "foo"])]
+    assert "warehouse.legacy.api.simple.projects" not in session.info
+
+
+def test_execute_simple_pages_nothing_changed():
+    task = pretend.call_recorder(lambda t: None)
+    config = pretend.stub(task=task)
+    session = pretend.stub(info={})
+
+    simple.execute_simple_pages(config, session)
+
+    assert task.calls == []
+
+
+class TestUpdateSimplePages:
+
+    def test_renders_and_stores(self, db_request, monkeypatch):
+        project = ProjectFactory.create()
+        release = ReleaseFactory.create(project=project, version="1.0")
+        file_ = FileFactory.create(
+            release=release,
+            filename="{}-1.0.tar.gz".format(project.name),
+        )
+        user = UserFactory.create()
+        je = JournalEntryFactory.create(name=project.name, submitted_by=user)
+        db_request.db.refresh(project)
+
+        render = pretend.call_recorder(lambda *a, **kw: "<html>1</html>")
+        monkeypatch.setattr(simple, "render", render)
+
+        simple.update_simple_pages(db_request, [project.name, "missing"])
+
+        page = db_request.db.query(SimplePage).get(project.name)
+        assert page.serial == je.id
+        assert page.html == "<html>1</html>"
+        assert render.calls == [
+            pretend.call(
+                "legacy/api/simple/detail.html",
+                {"project": project, "files": [file_]},
+                request=db_request,
+            ),
+        ]
+
+    def test_replaces_existing_page(self, db_request, monkeypatch):
+        project = ProjectFactory.create()
+        db_request.db.add(
+            SimplePage(name=project.name, serial=0, html="old"),
+        )
+        db_request.db.flush()
+
+        monkeypatch.setattr(simple, "render", lambda *a, **kw: "new")
+
+        simple.update_simple_pages(db_request, [project.name])
+
+        db_request.db.expire_all()
+        page = db_request.db.query(SimplePage).get(project.name)
+        assert page.html == "new"
+
+
+class TestBackfillSimplePages:
+
+    def test_renders_missing_and_stale(self, db_request, monkeypatch):
+        monkeypatch.setattr(simple, "SIMPLE_PAGE_BATCH_SIZE", 2)
+        monkeypatch.setattr(simple, "render", lambda *a, **kw: "new")
+        user = UserFactory.create()
+
+        current = ProjectFactory.create()
+        JournalEntryFactory.create(name=current.name, submitted_by=user)
+        db_request.db.refresh(current)
+        db_request.db.add(
+            SimplePage(
+                name=current.name, serial=current.last_serial, html="current",
+            ),
+        )
+
+        stale = ProjectFactory.create()
+        db_request.db.add(SimplePage(name=stale.name, serial=0, html="old"))
+        JournalEntryFactory.create(name=stale.name, submitted_by=user)
+
+        missing = ProjectFactory.create_batch(2)
+        db_request.db.flush()
+
+        simple.backfill_simple_pages(db_request)
+        db_request.db.expire_all()
+        assert (
+            db_request.db.query(SimplePage)
+                      .filter(SimplePage.html == "new")
+                      .count()
+        ) == 2
+
+        simple.backfill_simple_pages(db_request)
+        db_request.db.expire_all()
+        pages = {
+            page.name: page
+            for page in db_request.db.query(SimplePage).all()
+        }
+
+        assert pages[current.name].html == "current"
+        for project in [stale] + missing:
+            assert pages[project.name].html == "new"
+            assert pages[project.name].serial == project.last_serial
+
+
+def test_includeme():
+    config = pretend.stub(
+        add_periodic_task=pretend.call_recorder(lambda *a, **kw: None),
+    )
+
+    simple.includeme(config)
+
+    assert config.add_periodic_task.calls == [
+        pretend.call(crontab(minute="*/5"), simple.backfill_simple_pages),
+    ]
@@ -15,10 +15,11 @@ import redis
 import pretend
 import pytest
 
+from celery.schedules import crontab
 from pyramid.exceptions import ConfigurationError
 
 import warehouse.legacy.api.xmlrpc.cache
-from warehouse.legacy.api.xmlrpc.cache import services
+from warehouse.legacy.api.xmlrpc.cache import fncache, serials, services
 from warehouse.legacy.api.xmlrpc import cache
 from warehouse.legacy.api.xmlrpc.cache import (
     cached_return_view,
@@ -26,11 +27,20 @@ from warehouse.legacy.api.xmlrpc.cache import (
     RedisLru,
     RedisXMLRPCCache,
 )
+from warehouse.legacy.api.xmlrpc.cache.fncache import (
+    JSONCodec,
+    MsgpackCodec,
+)
 from warehouse.legacy.api.xmlrpc.cache.interfaces import (
     CacheError,
     IXMLRPCCache,
 )
 
+from warehouse.packaging.models import Project
+from warehouse.utils import redis as warehouse_redis
+
+from .....common.db.packaging import JournalEntryFactory, ProjectFactory
+
 
 @pytest.fixture
 def fakeredis():
@@ -56,25 +66,27 @@ class TestXMLRPCCache:
 
         assert service.purge(None) is None
 
+        service.purge_tags({'foo', 'bar'})
+        service.purge_tags(set())
+        assert purger.calls == [pretend.call(['bar', 'foo'])]
+
 
 class TestRedisXMLRPCCache:
 
     def test_redis_cache(self, monkeypatch):
         strict_redis_obj = pretend.stub()
-        strict_redis_cls = pretend.stub(
-            from_url=pretend.call_recorder(
-                lambda url, db=None: strict_redis_obj
-            ),
+        get_redis = pretend.call_recorder(
+            lambda url, db=None: strict_redis_obj
         )
-        monkeypatch.setattr(redis, "StrictRedis", strict_redis_cls)
+        monkeypatch.setattr(services, "get_redis", get_redis)
 
         redis_lru_obj = pretend.stub(
             fetch=pretend.call_recorder(
                 lambda func, args, kwargs, key, tag, expires:
                     func(*args, **kwargs)
             ),
-            purge=pretend.call_recorder(
-                lambda tag: None
+            purge_tags=pretend.call_recorder(
+                lambda tags: None
             )
         )
         redis_lru_cls = pretend.call_recorder(
@@ -90,7 +102,7 @@ class TestRedisXMLRPCCache:
 
         service = RedisXMLRPCCache('redis://localhost:6379', purger)
 
-        assert strict_redis_cls.from_url.calls == [
+        assert get_redis.calls == [
             pretend.call("redis://localhost:6379", db=0)
         ]
         assert redis_lru_cls.calls == [
@@ -99,6 +111,7 @@ class TestRedisXMLRPCCache:
                 name='lru',
                 expires=None,
                 metric_reporter=None,
+                serve_stale=False,
             )
         ]
 
@@ -106,7 +119,7 @@ class TestRedisXMLRPCCache:
             func_test, (1, 2), {'kwarg0': 3, 'kwarg1': 4}, None, None, None) \
             == [[1, 2], {'kwarg0': 3, 'kwarg1': 4}]
 
-        assert service.purge(None) is None
+        assert service.purge('foo', 'bar') is None
 
         assert redis_lru_obj.fetch.calls == [
             pretend.call(
@@ -118,10 +131,14 @@ class TestRedisXMLRPCCache:
                 None,
             )
         ]
-        assert redis_lru_obj.purge.calls == [
-            pretend.call(None)
+        assert redis_lru_obj.purge_tags.calls == [
+            pretend.call(('foo', 'bar'))
         ]
 
+        service.purge_tags({'foo', 'bar'})
+        service.purge_tags(set())
+        assert purger.calls == [pretend.call(['bar', 'foo'])]
+
 
 class TestIncludeMe:
 
@@ -152,6 +169,7 @@ class TestIncludeMe:
                 settings={"warehouse.xmlrpc.cache.url": url},
                 __setitem__=registry.__setitem__,
             ),
+            add_periodic_task=pretend.call_recorder(lambda *a, **kw: None),
         )
 
         cache.includeme(config)
@@ -162,6 +180,12 @@ class TestIncludeMe:
                 under='rendered_view', over='mapped_view'
             )
         ]
+        if cache_class == 'RedisXMLRPCCache':
+            assert config.add_periodic_task.calls == [
+                pretend.call(crontab(), serials.update_serials),
+            ]
+        else:
+            assert config.add_periodic_task.calls == []
 
     def test_no_url_configuration(self, monkeypatch):
         registry = {}
@@ -210,7 +234,7 @@ class TestIncludeMe:
 
     def test_create_null_service(self):
         purge_tags = pretend.stub(
-            delay=pretend.call_recorder(lambda tag: None)
+            delay=pretend.call_recorder(lambda tags: None)
         )
         request = pretend.stub(
             registry=pretend.stub(
@@ -225,15 +249,37 @@ class TestIncludeMe:
         assert isinstance(service, NullXMLRPCCache)
         assert service._purger is purge_tags.delay
         assert purge_tags.delay.calls == [
-            pretend.call('wu'),
-            pretend.call('tang'),
-            pretend.call('4'),
-            pretend.call('evah'),
+            pretend.call(['4', 'evah', 'tang', 'wu']),
+        ]
+
+    def test_create_redis_service_options(self, monkeypatch):
+        get_redis = pretend.call_recorder(lambda url, **kw: pretend.stub())
+        monkeypatch.setattr(services, "get_redis", get_redis)
+        request = pretend.stub(
+            registry=pretend.stub(
+                settings={
+                    "warehouse.xmlrpc.cache.url": "redis://",
+                    "warehouse.xmlrpc.cache.max_connections": "50",
+                    "warehouse.xmlrpc.cache.socket_timeout": "0.5",
+                },
+            ),
+            task=lambda f: pretend.stub(delay=lambda tag: None),
+        )
+
+        RedisXMLRPCCache.create_service(None, request)
+
+        assert get_redis.calls == [
+            pretend.call(
+                "redis://",
+                db=0,
+                max_connections=50,
+                socket_timeout=0.5,
+            ),
         ]
 
     def test_create_redis_service(self):
         purge_tags = pretend.stub(
-            delay=pretend.call_recorder(lambda tag: None)
+            delay=pretend.call_recorder(lambda tags: None)
         )
         request = pretend.stub(
             registry=pretend.stub(
@@ -248,10 +294,7 @@ class TestIncludeMe:
         assert isinstance(service, RedisXMLRPCCache)
         assert service._purger is purge_tags.delay
         assert purge_tags.delay.calls == [
-            pretend.call('wu'),
-            pretend.call('tang'),
-            pretend.call('4'),
-            pretend.call('evah'),
+            pretend.call(['4', 'evah', 'tang', 'wu']),
         ]
 
 
@@ -317,6 +360,96 @@ class TestRedisLru:
             pretend.call('lru.cache.hit'),
         ]
 
+    def test_redis_purge_only_tag(self, fakeredis):
+        redis_lru = RedisLru(fakeredis)
+
+        redis_lru.fetch(func_test, [0, 1], {}, 'a', 'foo', None)
+        redis_lru.fetch(func_test, [0, 1], {}, 'b', 'foo', None)
+        redis_lru.fetch(func_test, [0, 1], {}, 'a', 'bar', None)
+        redis_lru.fetch(func_test, [0, 1], {}, 'a', None, None)
+
+        assert fakeredis.smembers('lru-tags:foo') == {b'lru:foo:func_test'}
+
+        redis_lru.purge('foo')
+
+        assert set(fakeredis.keys()) == {
+            b'lru:bar:func_test',
+            b'lru-tags:bar',
+            b'lru:tag:func_test',
+            b'lru-indexed',
+        }
+        assert fakeredis.smembers('lru-tags:bar') == {b'lru:bar:func_test'}
+
+    def test_redis_purge_tags(self, fakeredis):
+        metric_reporter = pretend.stub(
+            increment=pretend.call_recorder(lambda *args: None)
+        )
+        redis_lru = RedisLru(fakeredis, metric_reporter=metric_reporter)
+
+        redis_lru.fetch(func_test, [0, 1], {}, 'a', 'foo', None)
+        redis_lru.fetch(func_test, [0, 1], {}, 'a', 'bar', None)
+        redis_lru.fetch(func_test, [0, 1], {}, 'a', 'baz', None)
+
+        redis_lru.purge_tags(['foo', 'bar', 'missing'])
+
+        assert set(fakeredis.keys()) == {
+            b'lru:baz:func_test',
+            b'lru-tags:baz',
+            b'lru-indexed',
+        }
+        assert metric_reporter.increment.calls[-3:] == [
+            pretend.call('lru.cache.purge'),
+            pretend.call('lru.cache.purge'),
+            pretend.call('lru.cache.purge'),
+        ]
+
+    def test_redis_purge_unindexed(self, fakeredis):
+        redis_lru = RedisLru(fakeredis)
+        # Cached before there was an index for each tag.
+        fakeredis.hset('lru:foo:func_old', 'key', '[1]')
+        redis_lru.add('func_test', 'key', [2], 'foo', None)
+
+        redis_lru.purge('foo')
+
+        assert fakeredis.keys('lru:*') == []
+
+    def test_redis_purge_unindexed_nothing_indexed(self, fakeredis):
+        redis_lru = RedisLru(fakeredis)
+        fakeredis.hset('lru:foo:func_old', 'key', '[1]')
+
+        redis_lru.purge('foo')
+
+        assert fakeredis.keys('lru:*') == []
+
+    def test_redis_purge_stops_scanning(self, fakeredis, monkeypatch):
+        redis_lru = RedisLru(fakeredis)
+        redis_lru.add('func_test', 'key', [2], 'foo', None)
+        fakeredis.set(
+            redis_lru.format_indexed_key(),
+            int(fncache.time.time()) - fncache.DEFAULT_EXPIRES,
+        )
+        fakeredis.hset('lru:foo:func_old', 'key', '[1]')
+        monkeypatch.setattr(
+            fakeredis, "scan_iter", pretend.raiser(AssertionError),
+        )
+
+        redis_lru.purge('foo')
+
+        assert fakeredis.keys('lru:*') == [b'lru:foo:func_old']
+
+    def test_redis_tag_index_expires(self, fakeredis):
+        redis_lru = RedisLru(fakeredis, expires=100)
+
+        redis_lru.fetch(func_test, [0, 1], {}, 'a', 'foo', 10)
+        assert fakeredis.ttl('lru:foo:func_test') == 10
+        assert fakeredis.ttl('lru-tags:foo') == 10
+
+        redis_lru.fetch(func_test, [0, 1], {}, 'b', 'foo', 1000)
+        assert fakeredis.ttl('lru-tags:foo') == 1000
+
+        redis_lru.fetch(func_test, [0, 1], {}, 'c', 'bar', None)
+        assert fakeredis.ttl('lru-tags:bar') == 100
+
     def test_redis_down(self):
         metric_reporter = pretend.stub(
             increment=pretend.call_recorder(lambda *args: None)
@@ -324,7 +457,7 @@ class TestRedisLru:
         down_redis = pretend.stub(
             hget=pretend.raiser(redis.exceptions.RedisError),
             pipeline=pretend.raiser(redis.exceptions.RedisError),
-            scan_iter=pretend.raiser(redis.exceptions.RedisError),
+            set=pretend.raiser(redis.exceptions.RedisError),
         )
         redis_lru = RedisLru(down_redis, metric_reporter=metric_reporter)
 
@@ -350,6 +483,207 @@ class TestRedisLru:
         ]
 
 
+class TestCodecs:
+
+    def test_json(self):
+        codec = JSONCodec()
+        value = func_test(0, 1)
+
+        assert codec.loads(codec.dumps(value)) == value
+
+    @pytest.mark.parametrize(
+        ("value", "marker"),
+        [
+            ({"name": "foo", "releases": ["1.0", "2.0"]}, b"\x01"),
+            ({"description": "A long description. " * 1000}, b"\x02"),
+        ],
+    )
+    def test_msgpack(self, value, marker):
+        codec = MsgpackCodec()
+        data = codec.dumps(value)
+
+        assert data[:1] == marker
+        assert codec.loads(data) == value
+
+    def test_msgpack_compresses(self):
+        codec = MsgpackCodec(compress_threshold=10)
+        value = ["a" * 1000]
+
+        data = codec.dumps(value)
+
+        assert len(data) < 100
+        assert codec.loads(data) == value
+
+    def test_msgpack_reads_json(self):
+        value = func_test(0, 1)
+
+        assert MsgpackCodec().loads(
+            JSONCodec().dumps(value).encode("utf8")
+        ) == value
+
+    @pytest.mark.parametrize("codec", [JSONCodec(), MsgpackCodec()])
+    def test_redis_lru_codec(self, fakeredis, codec):
+        redis_lru = RedisLru(fakeredis, codec=codec)
+        expected = func_test(0, 1, kwarg0=2, kwarg1=3)
+
+        for _ in range(2):
+            assert expected == redis_lru.fetch(
+                func_test, [0, 1], {'kwarg0': 2, 'kwarg1': 3}, None, None,
+                None,
+            )
+
+    def test_redis_lru_reads_old_json(self, fakeredis):
+        expected = func_test(0, 1)
+        RedisLru(fakeredis, codec=JSONCodec()).add(
+            'func_test', 'key', expected, None, None,
+        )
+
+        assert RedisLru(fakeredis).get('func_test', 'key', None) == expected
+
+
+class TestSingleFlight:
+
+    def test_locks_while_computing(self, fakeredis):
+        redis_lru = RedisLru(fakeredis)
+
+        def func(arg):
+            assert fakeredis.keys('lru-locks:*') == [
+                b'lru-locks:lru:foo:func:"key"',
+            ]
+            return arg
+
+        assert redis_lru.fetch(func, [1], {}, '"key"', 'foo', None) == 1
+        assert fakeredis.keys('lru-locks:*') == []
+
+    def test_releases_lock_on_error(self, fakeredis):
+        redis_lru = RedisLru(fakeredis)
+
+        with pytest.raises(ValueError):
+            redis_lru.fetch(
+                pretend.raiser(ValueError), [], {}, 'key', 'foo', None,
+            )
+
+        assert fakeredis.keys('lru-locks:*') == []
+
+    def test_leaves_other_lock(self, fakeredis):
+        redis_lru = RedisLru(fakeredis)
+        lock_key = redis_lru.format_lock_key('func_test', 'key', 'foo')
+
+        def func_test():
+            fakeredis.set(lock_key, 'another token')
+            return 1
+
+        assert redis_lru.fetch(func_test, [], {}, 'key', 'foo', None) == 1
+        assert fakeredis.get(lock_key) == b'another token'
+
+    def test_waits_for_value(self, fakeredis, monkeypatch):
+        metric_reporter = pretend.stub(
+            increment=pretend.call_recorder(lambda *args: None)
+        )
+        redis_lru = RedisLru(fakeredis, metric_reporter=metric_reporter)
+        fakeredis.set(
+            redis_lru.format_lock_key('func_test', 'key', 'foo'), 'token',
+        )
+
+        @pretend.call_recorder
+        def sleep(seconds):
+            redis_lru.add('func_test', 'key', [1], 'foo', None)
+
+        monkeypatch.setattr(fncache.time, "sleep", sleep)
+        func = pretend.call_recorder(lambda: [2])
+        func.__name__ = 'func_test'
+
+        assert redis_lru.fetch(func, [], {}, 'key', 'foo', None) == [1]
+        assert func.calls == []
+        assert sleep.calls == [pretend.call(fncache.LOCK_POLL_INTERVAL)]
+        assert metric_reporter.increment.calls == [
+            pretend.call('lru.cache.miss'),
+            pretend.call('lru.cache.hit'),
+            pretend.call('lru.cache.coalesced'),
+        ]
+
+    @pytest.mark.parametrize("value", [[], {}, 0, ""])
+    def test_falsy_values_are_hits(self, fakeredis, monkeypatch, value):
+        redis_lru = RedisLru(fakeredis)
+        redis_lru.add('func_test', 'key', value, 'foo', None)
+        monkeypatch.setattr(fncache.time, "sleep", pretend.raiser(ValueError))
+        func = pretend.raiser(ValueError)
+        func.__name__ = 'func_test'
+
+        assert redis_lru.fetch(func, [], {}, 'key', 'foo', None) == value
+
+    def test_waits_for_falsy_value(self, fakeredis, monkeypatch):
+        redis_lru = RedisLru(fakeredis)
+        fakeredis.set(
+            redis_lru.format_lock_key('func_test', 'key', 'foo'), 'token',
+        )
+
+        @pretend.call_recorder
+        def sleep(seconds):
+            redis_lru.add('func_test', 'key', [], 'foo', None)
+
+        monkeypatch.setattr(fncache.time, "sleep", sleep)
+        func = pretend.raiser(ValueError)
+        func.__name__ = 'func_test'
+
+        assert redis_lru.fetch(func, [], {}, 'key', 'foo', None) == []
+        assert sleep.calls == [pretend.call(fncache.LOCK_POLL_INTERVAL)]
+
+    def test_serves_falsy_stale_value(self, fakeredis):
+        redis_lru = RedisLru(fakeredis, serve_stale=True)
+        redis_lru.add('func_test', 'key', [], 'foo', None)
+        redis_lru.purge('foo')
+        fakeredis.set(
+            redis_lru.format_lock_key('func_test', 'key', 'foo'), 'token',
+        )
+        func = pretend.raiser(ValueError)
+        func.__name__ = 'func_test'
+
+        assert redis_lru.fetch(func, [], {}, 'key', 'foo', None) == []
+
+    def test_gives_up_waiting(self, fakeredis):
+        redis_lru = RedisLru(fakeredis, lock_wait=0)
+        fakeredis.set(
+            redis_lru.format_lock_key('func_test', 'key', 'foo'), 'token',
+        )
+
+        assert redis_lru.fetch(func_test, [0, 1], {}, 'key', 'foo', None) == \
+            func_test(0, 1)
+
+    def test_serves_stale(self, fakeredis):
+        metric_reporter = pretend.stub(
+            increment=pretend.call_recorder(lambda *args: None)
+        )
+        redis_lru = RedisLru(
+            fakeredis, metric_reporter=metric_reporter, serve_stale=True,
+        )
+        redis_lru.add('func_test', 'key', [1], 'foo', None)
+        redis_lru.purge('foo')
+
+        assert fakeredis.hget('lru:foo:func_test', 'key') is None
+        assert fakeredis.ttl('lru-stale:foo:func_test') == \
+            fncache.STALE_EXPIRES
+
+        fakeredis.set(
+            redis_lru.format_lock_key('func_test', 'key', 'foo'), 'token',
+        )
+
+        assert redis_lru.fetch(func_test, [], {}, 'key', 'foo', None) == [1]
+        assert metric_reporter.increment.calls[-2:] == [
+            pretend.call('lru.cache.stale'),
+            pretend.call('lru.cache.coalesced'),
+        ]
+
+    def test_purge_stale_expired_key(self, fakeredis):
+        redis_lru = RedisLru(fakeredis, serve_stale=True)
+        redis_lru.add('func_test', 'key', [1], 'foo', None)
+        fakeredis.delete('lru:foo:func_test')
+
+        redis_lru.purge('foo')
+
+        assert fakeredis.smembers('lru-tags:foo') == set()
+
+
 class TestDeriver:
 
     @pytest.mark.parametrize(
@@ -434,6 +768,37 @@ class TestDeriver:
         assert derived_view(context, request) is response
         assert view.calls == [pretend.call(context, request)]
 
+    def test_custom_key_maker(self):
+        context = pretend.stub()
+        service = pretend.stub(
+            fetch=pretend.call_recorder(
+                lambda func, args, kwargs, key, tag, expires:
+                func(*args, **kwargs)
+            )
+        )
+        request = pretend.stub(
+            find_service=lambda *args, **kwargs: service,
+            rpc_method='rpc_method',
+            rpc_args=('warehouse', '1.0.0')
+        )
+        response = {}
+
+        @pretend.call_recorder
+        def view(context, request):
+            return response
+
+        info = pretend.stub(options={}, exception_only=False)
+        info.options["xmlrpc_cache"] = True
+        info.options["xmlrpc_cache_key_maker"] = lambda args: "-".join(args)
+        derived_view = cached_return_view(view, info)
+
+        assert derived_view(context, request) is response
+        assert service.fetch.calls == [
+            pretend.call(
+                view, (context, request), {}, "warehouse-1.0.0", None, 86400,
+            ),
+        ]
+
     @pytest.mark.parametrize(
         ("service_available", "xmlrpc_cache"),
         [
@@ -475,6 +840,61 @@ class TestDeriver:
         assert view.calls == [pretend.call(context, request)]
 
 
+class TestPurgeTagsTask:
+
+    def test_purges_successfully(self):
+        task = pretend.stub()
+        service = pretend.stub(purge=pretend.call_recorder(lambda *t: None))
+        request = pretend.stub(
+            find_service=pretend.call_recorder(lambda iface: service),
+            log=pretend.stub(
+                info=pretend.call_recorder(lambda *args, **kwargs: None),
+            )
+        )
+
+        services.purge_tags(task, request, ["bar", "foo"])
+
+        assert request.find_service.calls == [pretend.call(IXMLRPCCache)]
+        assert service.purge.calls == [pretend.call("bar", "foo")]
+        assert request.log.info.calls == [
+            pretend.call("Purging %s", "bar, foo"),
+        ]
+
+    def test_purges_fails(self):
+        exc = CacheError()
+
+        class Cache:
+            @staticmethod
+            @pretend.call_recorder
+            def purge(*tags):
+                raise exc
+
+        class Task:
+            @staticmethod
+            @pretend.call_recorder
+            def retry(exc):
+                raise celery.exceptions.Retry
+
+        task = Task()
+        service = Cache()
+        request = pretend.stub(
+            find_service=pretend.call_recorder(lambda iface: service),
+            log=pretend.stub(
+                info=pretend.call_recorder(lambda *args, **kwargs: None),
+                error=pretend.call_recorder(lambda *args, **kwargs: None),
+            )
+        )
+
+        with pytest.raises(celery.exceptions.Retry):
+            services.purge_tags(task, request, ["bar", "foo"])
+
+        assert service.purge.calls == [pretend.call("bar", "foo")]
+        assert task.retry.calls == [pretend.call(exc=exc)]
+        assert request.log.error.calls == [
+            pretend.call("Error purging %s: %s", "bar, foo", str(exc))
+        ]
+
+
 class TestPurgeTask:
 
     def test_purges_successfully(self, monkeypatch):
@@ -620,3 +1040,144 @@ class TestPurgeTask:
 
         assert find_service_factory.calls == [pretend.call(IXMLRPCCache)]
         assert "warehouse.legacy.api.xmlrpc.cache.purges" not in session.info
+
+
+class TestSerials:
+
+    @pytest.fixture
+    def serials_redis(self, fakeredis, monkeypatch, db_request):
+        db_request.registry.settings = {
+            "warehouse.xmlrpc.cache.url": "redis://localhost:6379/0",
+        }
+        monkeypatch.setattr(
+            warehouse_redis, "get_redis", lambda url, **options: fakeredis,
+        )
+        return fakeredis
+
+    def _create_projects(self):
+        projects = [ProjectFactory.create() for _ in range(3)]
+        for project in projects:
+            JournalEntryFactory.create(name=project.name)
+        return projects
+
+    def _expected(self, db_request):
+        return dict(db_request.db.query(Project.name, Project.last_serial))
+
+    @pytest.mark.parametrize("url", [None, "null://"])
+    def test_no_redis(self, db_request, url):
+        db_request.registry.settings = {}
+        if url is not None:
+            db_request.registry.settings["warehouse.xmlrpc.cache.url"] = url
+
+        serials.update_serials(db_request)
+
+        assert serials.get_serials(db_request) is None
+
+    def test_redis_options(self, monkeypatch):
+        redis_conn = pretend.stub()
+        get_redis = pretend.call_recorder(lambda url, **options: redis_conn)
+        monkeypatch.setattr(warehouse_redis, "get_redis", get_redis)
+        registry = pretend.stub(
+            settings={
+                "warehouse.xmlrpc.cache.url": "redis://localhost:6379/0",
+                "warehouse.xmlrpc.cache.max_connections": "10",
+                "warehouse.xmlrpc.cache.socket_timeout": "0.5",
+            },
+        )
+
+        assert serials._get_redis(registry) is redis_conn
+        assert get_redis.calls == [
+            pretend.call(
+                "redis://localhost:6379/0",
+                max_connections=10,
+                socket_timeout=0.5,
+            ),
+        ]
+
+    def test_no_snapshot(self, db_request, serials_redis):
+        assert serials.get_serials(db_request) is None
+
+    def test_redis_down(self, db_request, monkeypatch):
+        db_request.registry.settings = {
+            "warehouse.xmlrpc.cache.url": "redis://localhost:6379/0",
+        }
+        down_redis = pretend.stub(
+            pipeline=pretend.raiser(redis.exceptions.ConnectionError),
+        )
+        monkeypatch.setattr(
+            warehouse_redis, "get_redis", lambda url, **options: down_redis,
+        )
+
+        assert serials.get_serials(db_request) is None
+
+    def test_no_journals(self, db_request, serials_redis):
+        serials.update_serials(db_request)
+
+        assert serials_redis.get(serials.LAST_SERIAL_KEY) is None
+
+    def test_rebuild(self, db_request, serials_redis, monkeypatch):
+        monkeypatch.setattr(serials, "REBUILD_CHUNK_SIZE", 2)
+        self._create_projects()
+
+        serials.update_serials(db_request)
+
+        expected = self._expected(db_request)
+        assert int(serials_redis.get(serials.LAST_SERIAL_KEY)) == \
+            max(expected.values())
+        assert serials.get_serials(db_request) == expected
+        assert not serials_redis.exists(serials.SERIALS_KEY + ".rebuild")
+
+    def test_rebuild_without_projects(self, db_request, serials_redis):
+        JournalEntryFactory.create(name=None)
+        serials_redis.hset(serials.SERIALS_KEY, "old", 1)
+
+        serials.update_serials(db_request)
+
+        assert serials_redis.get(serials.LAST_SERIAL_KEY) is not None
+        assert serials.get_serials(db_request) == {}
+
+    def test_incremental(self, db_request, serials_redis):
+        projects = self._create_projects()
+        serials.update_serials(db_request)
+
+        JournalEntryFactory.create(name=projects[0].name)
+        new_project = ProjectFactory.create()
+        JournalEntryFactory.create(name=new_project.name)
+        JournalEntryFactory.create(name=projects[1].name)
+        db_request.db.delete(projects[1])
+        db_request.db.flush()
+
+        # The changes are visible before the snapshot has been updated.
+        expected = self._expected(db_request)
+        assert serials.get_serials(db_request) == expected
+        assert projects[1].name.encode("utf8") in \
+            serials_redis.hkeys(serials.SERIALS_KEY)
+
+        serials.update_serials(db_request)
+
+        assert {
+            k.decode("utf8"): int(v)
+            for k, v in serials_redis.hgetall(serials.SERIALS_KEY).items()
+        } == expected
+        assert serials.get_serials(db_request) == expected
+
+    def test_up_to_date(self, db_request, serials_redis):
+        self._create_projects()
+        serials.update_serials(db_request)
+        serials_redis.hset(serials.SERIALS_KEY, "unchanged", 1)
+
+        serials.update_serials(db_request)
+
+        assert serials_redis.hget(serials.SERIALS_KEY, "unchanged") == b"1"
+
+    def test_changed_serials(self, db_request):
+        projects = self._create_projects()
+        serial = JournalEntryFactory.create(name=projects[0].name).id
+        JournalEntryFactory.create(name=projects[1].name)
+        JournalEntryFactory.create(name="deleted")
+
+        names, changed = serials.changed_serials(db_request.db, serial)
+        db_request.db.refresh(projects[1])
+
+        assert names == {projects[1].name, "deleted"}
+        assert changed == {projects[1].name: projects[1].last_serial}
@@ -11,6 +11,7 @@
 # limitations under the License.
 
 import datetime
+from xmlrpc import client as xmlrpc_client
 
 import pretend
 import pytest
@@ -47,6 +48,10 @@ class TestSearch:
                 self.type = type
                 self.must = must
 
+            def source(self, fields):
+                self.fields = fields
+                return self
+
             def __getitem__(self, name):
                 self.offset = name.start
                 self.limit = name.stop
@@ -54,6 +59,7 @@ class TestSearch:
                 return self
 
             def execute(self):
+                assert self.fields == ["latest_version", "name", "summary"]
                 assert self.type == "bool"
                 assert [q.to_dict() for q in self.must] == [
                     {"match": {"name": {"query": "foo", "boost": 10}}},
@@ -111,6 +117,10 @@ class TestSearch:
                 self.type = type
                 self.must = must
 
+            def source(self, fields):
+                self.fields = fields
+                return self
+
             def __getitem__(self, name):
                 self.offset = name.start
                 self.limit = name.stop
@@ -118,6 +128,7 @@ class TestSearch:
                 return self
 
             def execute(self):
+                assert self.fields == ["latest_version", "name", "summary"]
                 assert self.type == "bool"
                 assert [q.to_dict() for q in self.must] == [
                     {'bool': {'should': [
@@ -170,6 +181,10 @@ class TestSearch:
                 self.type = type
                 self.must = must
 
+            def source(self, fields):
+                self.fields = fields
+                return self
+
             def __getitem__(self, name):
                 self.offset = name.start
                 self.limit = name.stop
@@ -177,6 +192,7 @@ class TestSearch:
                 return self
 
             def execute(self):
+                assert self.fields == ["latest_version", "name", "summary"]
                 assert self.type == "bool"
                 assert [q.to_dict() for q in self.must] == [
                     {"match": {"name": {"query": "foo", "boost": 10}}},
@@ -235,6 +251,10 @@ class TestSearch:
                 self.type = type
                 self.should = should
 
+            def source(self, fields):
+                self.fields = fields
+                return self
+
             def __getitem__(self, name):
                 self.offset = name.start
                 self.limit = name.stop
@@ -242,6 +262,7 @@ class TestSearch:
                 return self
 
             def execute(self):
+                assert self.fields == ["latest_version", "name", "summary"]
                 assert self.type == "bool"
                 assert [q.to_dict() for q in self.should] == [
                     {"match": {"name": {"query": "foo", "boost": 10}}},
@@ -300,6 +321,10 @@ class TestSearch:
                 self.type = type
                 self.must = must
 
+            def source(self, fields):
+                self.fields = fields
+                return self
+
             def __getitem__(self, name):
                 self.offset = name.start
                 self.limit = name.stop
@@ -307,6 +332,7 @@ class TestSearch:
                 return self
 
             def execute(self):
+                assert self.fields == ["name", "summary", "version"]
                 assert self.type == "bool"
                 assert [q.to_dict() for q in self.must] == [
                     {"match": {"name": {"boost": 10, "query": "foo"}}},
@@ -356,6 +382,10 @@ class TestSearch:
                 self.type = type
                 self.must = must
 
+            def source(self, fields):
+                self.fields = fields
+                return self
+
             def __getitem__(self, name):
                 self.offset = name.start
                 self.limit = name.stop
@@ -363,6 +393,7 @@ class TestSearch:
                 return self
 
             def execute(self):
+                assert self.fields == ["latest_version", "name", "summary"]
                 assert self.type == "bool"
                 assert [q.to_dict() for q in self.must] == [
                     {"match": {"name": {"query": "foo", "boost": 10}}},
@@ -405,6 +436,27 @@ class TestSearch:
              "summary": "other summary", "version": "2.0"},
         ]
 
+    def test_cache_key_is_normalized(self):
+        key = xmlrpc._search_cache_key((
+            {"summary": ["two", "one"], "name": "foo", "bogus": "nope"},
+        ))
+
+        assert key == xmlrpc._search_cache_key((
+            {"name": ["foo"], "summary": ["one", "two"]}, "and",
+        ))
+        assert key != xmlrpc._search_cache_key((
+            {"name": ["foo"], "summary": ["one", "two"]}, "or",
+        ))
+
+    def test_cache_key_invalid_spec(self):
+        assert xmlrpc._search_cache_key(("a string",)) == '["a string", "and"]'
+
+    def test_cache_tag(self):
+        assert xmlrpc._search_cache_tag({"name": "foo"}) == \
+            xmlrpc._search_cache_tag({"name": ["foo"], "bogus": "nope"})
+        assert xmlrpc._search_cache_tag({"name": "foo"}) != \
+            xmlrpc._search_cache_tag({"name": "bar"})
+
 
 def test_list_packages(db_request):
     projects = [ProjectFactory.create() for _ in range(10)]
@@ -412,6 +464,7 @@ def test_list_packages(db_request):
 
 
 def test_list_packages_with_serial(db_request):
+    db_request.registry.settings = {}
     projects = [ProjectFactory.create() for _ in range(10)]
     expected = {}
     for project in projects:
@@ -423,6 +476,63 @@ def test_list_packages_with_serial(db_request):
     assert xmlrpc.list_packages_with_serial(db_request) == expected
 
 
+def test_list_packages_with_serial_snapshot(db_request, monkeypatch):
+    serials = {"foo": 1}
+    get_serials = pretend.call_recorder(lambda request: serials)
+    monkeypatch.setattr(xmlrpc, "get_serials", get_serials)
+
+    assert xmlrpc.list_packages_with_serial(db_request) is serials
+    assert get_serials.calls == [pretend.call(db_request)]
+
+
+def test_list_packages_with_serial_since(db_request):
+    projects = [ProjectFactory.create() for _ in range(3)]
+    serial = JournalEntryFactory.create(name=projects[0].name).id
+    for project in projects[1:]:
+        JournalEntryFactory.create(name=project.name)
+        db_request.db.refresh(project)
+
+    assert xmlrpc.list_packages_with_serial_since(db_request, serial) == {
+        project.name: project.last_serial
+        for project in projects[1:]
+    }
+
+
+def test_list_packages_with_serial_since_deleted(db_request):
+    project = ProjectFactory.create()
+    serial = JournalEntryFactory.create(name=project.name).id
+    JournalEntryFactory.create(name="deleted")
+
+    assert xmlrpc.list_packages_with_serial_since(db_request, serial) == {
+        "deleted": None,
+    }
+
+
+@pytest.mark.parametrize("serial", ["1", 1.5, None, True])
+def test_list_packages_with_serial_since_invalid(serial):
+    with pytest.raises(xmlrpc.XMLRPCWrappedError) as exc:
+        xmlrpc.list_packages_with_serial_since(pretend.stub(), serial)
+
+    assert exc.value.faultString == \
+        "TypeError: Invalid serial, must be an integer."
+
+
+def test_list_packages_with_serial_since_too_old(db_request, monkeypatch):
+    monkeypatch.setattr(xmlrpc, "_MAX_SERIAL_LOOKBACK", 2)
+    entries = [JournalEntryFactory.create() for _ in range(4)]
+
+    with pytest.raises(xmlrpc.XMLRPCWrappedError) as exc:
+        xmlrpc.list_packages_with_serial_since(db_request, entries[0].id)
+
+    assert exc.value.faultString == (
+        "ValueError: Serial is too old, use list_packages_with_serial to get "
+        "every project instead."
+    )
+    assert xmlrpc.list_packages_with_serial_since(
+        db_request, entries[1].id,
+    ) == {entry.name: None for entry in entries[2:]}
+
+
 def test_package_hosting_mode_shows_none(db_request):
     assert xmlrpc.package_hosting_mode(db_request, "nope") is None
 
@@ -663,6 +773,11 @@ def test_package_roles(db_request):
     ]
 
 
+def _loads(response):
+    (result,), _ = xmlrpc_client.loads(response.body)
+    return [tuple(r) for r in result]
+
+
 def test_changelog_last_serial_none(db_request):
     assert xmlrpc.changelog_last_serial(db_request) is None
 
@@ -680,6 +795,7 @@ def test_changelog_last_serial(db_request):
 
 
 def test_changelog_since_serial(db_request):
+    db_request.registry.settings = {}
     projects = [ProjectFactory.create() for _ in range(10)]
     entries = []
     for project in projects:
@@ -703,11 +819,49 @@ def test_changelog_since_serial(db_request):
 
     serial = entries[int(len(entries) / 2) - 1].id
 
-    assert xmlrpc.changelog_since_serial(db_request, serial) == expected
+    response = xmlrpc.changelog_since_serial(db_request, serial)
+
+    assert response.content_type == "text/xml"
+    assert _loads(response) == expected
+
+
+def test_changelog_since_serial_batches(db_request):
+    db_request.registry.settings = {
+        "warehouse.xmlrpc.changelog.batch_size": 3,
+    }
+    project = ProjectFactory.create()
+    entries = [
+        JournalEntryFactory.create(name=project.name, version=None)
+        for _ in range(10)
+    ]
+
+    response = xmlrpc.changelog_since_serial(db_request, 0)
+
+    assert _loads(response) == [
+        (
+            e.name,
+            None,
+            int(
+                e.submitted_date.replace(tzinfo=datetime.timezone.utc)
+                                .timestamp()
+            ),
+            e.action,
+            e.id,
+        )
+        for e in entries
+    ]
+
+
+def test_changelog_since_serial_empty(db_request):
+    db_request.registry.settings = {}
+    response = xmlrpc.changelog_since_serial(db_request, 0)
+
+    assert response.text == xmlrpc_client.dumps(([],), methodresponse=True)
 
 
 @pytest.mark.parametrize("with_ids", [True, False, None])
 def test_changelog(db_request, with_ids):
+    db_request.registry.settings = {}
     projects = [ProjectFactory.create() for _ in range(10)]
     entries = []
     for project in projects:
@@ -746,7 +900,9 @@ def test_changelog(db_request, with_ids):
     if with_ids is not None:
         extra_args.append(with_ids)
 
-    assert xmlrpc.changelog(db_request, since - 1, *extra_args) == expected
+    response = xmlrpc.changelog(db_request, since - 1, *extra_args)
+
+    assert _loads(response) == expected
 
 
 def test_browse(db_request):
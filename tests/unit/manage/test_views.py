@@ -16,7 +16,7 @@ import uuid
 import pretend
 import pytest
 
-from pyramid.httpexceptions import HTTPSeeOther
+from pyramid.httpexceptions import HTTPBadRequest, HTTPSeeOther
 from sqlalchemy.orm.exc import NoResultFound
 from webob.multidict import MultiDict
 
@@ -1798,3 +1798,40 @@ class TestManageProjectHistory:
             'project': project,
             'journals': [newer_journal, older_journal],
         }
+
+    def test_get_before(self, db_request):
+        project = ProjectFactory.create()
+        older_journal = JournalEntryFactory.create(
+            name=project.name,
+            submitted_date=datetime.datetime(2017, 2, 5, 17, 18, 18, 462634),
+        )
+        newer_journal = JournalEntryFactory.create(
+            name=project.name,
+            submitted_date=datetime.datetime(2018, 2, 5, 17, 18, 18, 462634),
+        )
+        db_request.GET = db_request.params = MultiDict({
+            "before": "2017-02-05T17:18:18.462634,{}".format(older_journal.id),
+        })
+        db_request.current_route_path = pretend.call_recorder(
+            lambda _query: "/the-older-page"
+        )
+
+        result = views.manage_project_history(project, db_request)
+
+        assert result["journals"] == [newer_journal]
+        assert result["journals"].previous_url is None
+        assert result["journals"].next_url == "/the-older-page"
+        assert db_request.current_route_path.calls == [
+            pretend.call(_query=[
+                ("after", "2018-02-05T17:18:18.462634,{}".format(
+                    newer_journal.id,
+                )),
+            ]),
+        ]
+
+    def test_get_invalid_cursor(self, db_request):
+        project = ProjectFactory.create()
+        db_request.GET["after"] = "not a cursor"
+
+        with pytest.raises(HTTPBadRequest):
+            views.manage_project_history(project, db_request)
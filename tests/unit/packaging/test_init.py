@@ -19,7 +19,14 @@ from warehouse import packaging
 from warehouse.accounts.models import Email, User
 from warehouse.packaging.interfaces import IFileStorage, IDocsStorage
 from warehouse.packaging.models import File, Project, Release, Role
-from warehouse.packaging.tasks import compute_trending
+from warehouse.packaging.tasks import (
+    backfill_version_sort_keys,
+    compute_trending,
+    render_description,
+    rerender_descriptions,
+)
+
+from ...common.db.packaging import ProjectFactory, ReleaseFactory
 
 
 @pytest.mark.parametrize("with_trending", [True, False])
@@ -118,4 +125,68 @@ def test_includme(monkeypatch, with_trending):
     if with_trending:
         assert config.add_periodic_task.calls == [
             pretend.call(crontab(minute=0, hour=3), compute_trending),
+            pretend.call(crontab(minute="*/10"), rerender_descriptions),
+            pretend.call(
+                crontab(minute="*/10"),
+                backfill_version_sort_keys,
+            ),
+        ]
+    else:
+        assert config.add_periodic_task.calls == [
+            pretend.call(crontab(minute="*/10"), rerender_descriptions),
+            pretend.call(
+                crontab(minute="*/10"),
+                backfill_version_sort_keys,
+            ),
+        ]
+
+
+class TestDescriptionRenders:
+
+    def test_stores_new_and_changed_releases(self, db_request):
+        project = ProjectFactory.create(name="foo")
+        unchanged = ReleaseFactory.create(project=project, version="1.0")
+        changed = ReleaseFactory.create(project=project, version="2.0")
+
+        unchanged.summary = "A new summary"
+        changed.description = "A new description"
+
+        session = pretend.stub(
+            new={Release(name="foo", version="3.0"), object()},
+            dirty={unchanged, changed, object()},
+            info={},
+        )
+        packaging.store_description_renders(
+            pretend.stub(), session, pretend.stub(),
+        )
+
+        assert session.info["warehouse.packaging.description_renders"] == {
+            ("foo", "2.0"),
+            ("foo", "3.0"),
+        }
+
+    def test_execute_description_renders(self):
+        delay = pretend.call_recorder(lambda *a: None)
+        config = pretend.stub(
+            task=pretend.call_recorder(lambda f: pretend.stub(delay=delay)),
+        )
+        session = pretend.stub(
+            info={
+                "warehouse.packaging.description_renders": {
+                    ("foo", "2.0"),
+                    ("bar", "1.0"),
+                },
+            },
+        )
+
+        packaging.execute_description_renders(config, session)
+
+        assert config.task.calls == [
+            pretend.call(render_description),
+            pretend.call(render_description),
+        ]
+        assert delay.calls == [
+            pretend.call("bar", "1.0"),
+            pretend.call("foo", "2.0"),
         ]
+        assert session.info == {}
@@ -20,6 +20,7 @@ from pyramid.security import Allow
 from warehouse.packaging.models import (
     ProjectFactory, Dependency, DependencyKind, File,
 )
+from warehouse.utils.version import sort_key
 
 from ...common.db.packaging import (
     ProjectFactory as DBProjectFactory, ReleaseFactory as DBReleaseFactory,
@@ -140,6 +141,10 @@ class TestProject:
 
 class TestRelease:
 
+    def test_version_sort_key_default(self, db_session):
+        release = DBReleaseFactory.create(version="1.0b2")
+        assert release.version_sort_key == sort_key("1.0b2")
+
     def test_has_meta_true_with_keywords(self, db_session):
         release = DBReleaseFactory.create(keywords="foo, bar")
         assert release.has_meta
@@ -16,10 +16,19 @@ import pytest
 from google.cloud.bigquery import Row
 
 from warehouse.cache.origin import IOriginCache
+from warehouse.packaging import tasks
 from warehouse.packaging.models import Project
-from warehouse.packaging.tasks import compute_trending
+from warehouse.packaging.tasks import (
+    backfill_version_sort_keys,
+    compute_trending,
+    description_is_current,
+    render_description,
+    rerender_descriptions,
+)
+from warehouse.utils import readme
+from warehouse.utils.version import sort_key
 
-from ...common.db.packaging import ProjectFactory
+from ...common.db.packaging import ProjectFactory, ReleaseFactory
 
 
 class TestComputeTrending:
@@ -117,3 +126,164 @@ class TestComputeTrending:
             projects[1].name: 2,
             projects[2].name: -1,
         }
+
+
+@pytest.fixture
+def render(monkeypatch):
+    render = pretend.call_recorder(lambda value, content_type: f"<{value}>")
+    monkeypatch.setattr(readme, "render", render)
+    return render
+
+
+class TestRenderDescription:
+
+    def test_renders(self, db_request, render):
+        release = ReleaseFactory.create(
+            description="raw thing", description_content_type="text/plain",
+        )
+        assert not description_is_current(release)
+
+        render_description(db_request, release.name, release.version)
+
+        # The rendered description is written without going through the ORM,
+        # so that it doesn't set off any of the hooks for changed releases.
+        assert not db_request.db.dirty
+        db_request.db.refresh(release)
+        assert description_is_current(release)
+        assert release.description_html == "<raw thing>"
+        assert release.description_html_digest == readme.digest(
+            "raw thing", "text/plain",
+        )
+        assert release.description_html_renderer_version == \
+            readme.renderer_version()
+
+    def test_skips_current(self, db_request, render):
+        release = ReleaseFactory.create(
+            description="raw thing", description_content_type="text/plain",
+        )
+        render_description(db_request, release.name, release.version)
+        render_description(db_request, release.name, release.version)
+
+        assert render.calls == [pretend.call("raw thing", "text/plain")]
+
+    def test_rerenders_changed_description(self, db_request, render):
+        release = ReleaseFactory.create(
+            description="raw thing", description_content_type="text/plain",
+        )
+        render_description(db_request, release.name, release.version)
+
+        release.description = "another thing"
+        assert not description_is_current(release)
+
+        render_description(db_request, release.name, release.version)
+
+        db_request.db.refresh(release)
+        assert release.description_html == "<another thing>"
+
+    def test_missing_release(self, db_request):
+        render_description(db_request, "missing", "1.0")
+
+    def test_nothing_to_store(self, db_request):
+        session = pretend.stub(execute=pretend.call_recorder(lambda *a: None))
+
+        tasks._store_rendered_descriptions(session, [])
+
+        assert session.execute.calls == []
+
+
+class TestRerenderDescriptions:
+
+    def test_renders_stale_in_batches(self, db_request, monkeypatch, render):
+        monkeypatch.setattr(tasks, "RERENDER_BATCH_SIZE", 2)
+        current = ReleaseFactory.create(description="current")
+        render_description(db_request, current.name, current.version)
+        stale = ReleaseFactory.create(
+            description="stale",
+            description_html="old html",
+            description_html_renderer_version="0.1",
+        )
+        unrendered = [
+            ReleaseFactory.create(description=f"unrendered {i}")
+            for i in range(2)
+        ]
+
+        rerender_descriptions(db_request)
+        assert len(render.calls) == 3
+        assert not db_request.db.dirty
+
+        rerender_descriptions(db_request)
+        assert len(render.calls) == 4
+
+        db_request.db.expire_all()
+        for release in [current, stale] + unrendered:
+            assert description_is_current(release)
+
+    def test_falls_back_when_rendering_fails(self, db_request, monkeypatch):
+        def render(value, content_type):
+            if value == "broken":
+                raise ValueError("Unable to render")
+            return f"<{value}>"
+
+        monkeypatch.setattr(readme, "render", render)
+        logger = pretend.stub(
+            exception=pretend.call_recorder(lambda *a, **kw: None),
+        )
+        monkeypatch.setattr(tasks, "logger", logger)
+        broken = ReleaseFactory.create(description="broken")
+        working = ReleaseFactory.create(description="<b>working</b>")
+
+        rerender_descriptions(db_request)
+        db_request.db.expire_all()
+
+        assert logger.exception.calls == [
+            pretend.call(
+                "Unable to render description for %s %s",
+                broken.name, broken.version,
+            ),
+        ]
+        assert broken.description_html == "<pre>broken</pre>"
+        assert working.description_html == "<<b>working</b>>"
+        assert description_is_current(broken)
+        assert description_is_current(working)
+
+    def test_fallback_escapes_description(self, db_request, monkeypatch):
+        monkeypatch.setattr(
+            readme, "render", pretend.raiser(ValueError("Unable to render")),
+        )
+        monkeypatch.setattr(
+            tasks, "logger",
+            pretend.stub(exception=lambda *a, **kw: None),
+        )
+        release = ReleaseFactory.create(description="<script>")
+
+        rerender_descriptions(db_request)
+        db_request.db.refresh(release)
+
+        assert release.description_html == "<pre>&lt;script&gt;</pre>"
+
+
+class TestBackfillVersionSortKeys:
+
+    def test_backfills_in_batches(self, db_request, monkeypatch):
+        monkeypatch.setattr(tasks, "SORT_KEY_BATCH_SIZE", 2)
+        releases = [
+            ReleaseFactory.create(version=version)
+            for version in ["1.0", "2.0", "3.0"]
+        ]
+        for release in releases:
+            release.version_sort_key = None
+        db_request.db.flush()
+
+        backfill_version_sort_keys(db_request)
+        assert not db_request.db.dirty
+        db_request.db.expire_all()
+        assert sum(r.version_sort_key is None for r in releases) == 1
+
+        backfill_version_sort_keys(db_request)
+        db_request.db.expire_all()
+        assert [r.version_sort_key for r in releases] == [
+            sort_key(r.version) for r in releases
+        ]
+
+        # Once everything has a key, there's nothing left to do.
+        backfill_version_sort_keys(db_request)
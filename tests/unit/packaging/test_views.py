@@ -14,7 +14,7 @@ import pretend
 
 from pyramid.httpexceptions import HTTPMovedPermanently, HTTPNotFound
 
-from warehouse.packaging import views
+from warehouse.packaging import tasks, views
 from warehouse.utils import readme
 
 from ...common.db.accounts import UserFactory
@@ -183,6 +183,10 @@ class TestReleaseDetail:
         render_description = pretend.call_recorder(
             lambda raw, content_type: "rendered description")
         monkeypatch.setattr(readme, "render", render_description)
+        delay = pretend.call_recorder(lambda *a: None)
+        db_request.task = pretend.call_recorder(
+            lambda f: pretend.stub(delay=delay),
+        )
 
         result = views.release_detail(releases[1], db_request)
 
@@ -203,6 +207,30 @@ class TestReleaseDetail:
         assert render_description.calls == [
             pretend.call("unrendered description", "text/plain")
         ]
+        assert db_request.task.calls == [
+            pretend.call(tasks.render_description),
+        ]
+        assert delay.calls == [pretend.call(project.name, "2.0")]
+
+    def test_detail_uses_rendered_description(self, monkeypatch, db_request):
+        release = ReleaseFactory.create(
+            description="unrendered description",
+            description_content_type="text/plain",
+        )
+        render_description = pretend.call_recorder(lambda *a: None)
+        monkeypatch.setattr(readme, "render", render_description)
+
+        release.description_html = "stored description"
+        release.description_html_digest = readme.digest(
+            "unrendered description", "text/plain",
+        )
+        release.description_html_renderer_version = readme.renderer_version()
+        db_request.task = pretend.raiser(AssertionError)
+
+        result = views.release_detail(release, db_request)
+
+        assert result["description"] == "stored description"
+        assert render_description.calls == []
 
     def test_license_from_classifier(self, db_request):
         """A license label is added when a license classifier exists."""
@@ -214,6 +242,8 @@ class TestReleaseDetail:
             _classifiers=[other_classifier, classifier],
             license="Will be added at the end")
 
+        db_request.task = lambda f: pretend.stub(delay=lambda *a: None)
+
         result = views.release_detail(release, db_request)
 
         assert result["license"] == "BSD License (Will be added at the end)"
@@ -222,6 +252,8 @@ class TestReleaseDetail:
         """With no classifier, a license is used from metadata."""
         release = ReleaseFactory.create(license="MIT License")
 
+        db_request.task = lambda f: pretend.stub(delay=lambda *a: None)
+
         result = views.release_detail(release, db_request)
 
         assert result["license"] == "MIT License"
@@ -231,6 +263,8 @@ class TestReleaseDetail:
         release = ReleaseFactory.create(
             license="Multiline License\nhow terrible")
 
+        db_request.task = lambda f: pretend.stub(delay=lambda *a: None)
+
         result = views.release_detail(release, db_request)
 
         assert result["license"] == "Multiline License"
@@ -239,6 +273,8 @@ class TestReleaseDetail:
         """With no license classifier or metadata, no license is in context."""
         release = ReleaseFactory.create()
 
+        db_request.task = lambda f: pretend.stub(delay=lambda *a: None)
+
         result = views.release_detail(release, db_request)
 
         assert result["license"] is None
@@ -251,6 +287,8 @@ class TestReleaseDetail:
             classifier="License :: OSI Approved :: MIT License")
         release = ReleaseFactory.create(_classifiers=[license_1, license_2])
 
+        db_request.task = lambda f: pretend.stub(delay=lambda *a: None)
+
         result = views.release_detail(release, db_request)
 
         assert result["license"] == "BSD License, MIT License"
@@ -0,0 +1,334 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import elasticsearch
+import pretend
+import pytest
+import redis
+
+from warehouse.search import facets
+from warehouse.utils import redis as warehouse_redis
+
+from ...common.db.classifiers import ClassifierFactory
+from ...common.db.packaging import ProjectFactory, ReleaseFactory
+
+
+@pytest.fixture
+def fakeredis():
+    import fakeredis
+    _fakeredis = fakeredis.FakeStrictRedis()
+    yield _fakeredis
+    _fakeredis.flushall()
+
+
+@pytest.fixture
+def facets_redis(fakeredis, monkeypatch, db_request):
+    db_request.registry.settings = {
+        "celery.scheduler_url": "redis://localhost:6379/0",
+    }
+    monkeypatch.setattr(warehouse_redis, "get_redis", lambda url: fakeredis)
+    return fakeredis
+
+
+class FakeSearch:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.extras = []
+        self.aggs = pretend.stub(
+            bucket=pretend.call_recorder(lambda *a, **kw: None),
+        )
+
+    def extra(self, **kwargs):
+        self.extras.append(kwargs)
+        return self
+
+    def execute(self):
+        return pretend.stub(
+            aggregations=pretend.stub(
+                classifiers=pretend.stub(buckets=self.buckets),
+            ),
+        )
+
+
+def test_available_filters(db_request):
+    classifier1 = ClassifierFactory.create(classifier="foo :: bar")
+    classifier2 = ClassifierFactory.create(classifier="foo :: baz")
+    ClassifierFactory.create(classifier="fiz :: buz")
+    deprecated = ClassifierFactory.create(
+        classifier="foo :: old", deprecated=True,
+    )
+    topic = ClassifierFactory.create(classifier="Topic :: Games")
+
+    release = ReleaseFactory.create(project=ProjectFactory.create())
+    release._classifiers.extend([classifier1, classifier2, deprecated, topic])
+
+    assert facets.available_filters(db_request.db) == [
+        ("Topic", [topic.classifier]),
+        ("foo", [classifier1.classifier, classifier2.classifier]),
+    ]
+
+
+def test_classifier_counts():
+    es = FakeSearch([
+        pretend.stub(key="foo :: bar", doc_count=3),
+        pretend.stub(key="foo :: baz", doc_count=1),
+    ])
+
+    assert facets.classifier_counts(es) == {"foo :: bar": 3, "foo :: baz": 1}
+    assert es.extras == [{"size": 0}]
+    assert es.aggs.bucket.calls == [
+        pretend.call(
+            "classifiers", "terms",
+            field="classifiers", size=facets.MAX_CLASSIFIER_BUCKETS,
+        ),
+    ]
+
+
+class TestLoadFacets:
+
+    def test_no_redis(self, db_request, monkeypatch):
+        db_request.registry.settings = {}
+        available_filters = pretend.call_recorder(lambda session: [])
+        monkeypatch.setattr(facets, "available_filters", available_filters)
+
+        assert facets.load_facets(db_request) == facets.Facets([], {})
+        assert available_filters.calls == [pretend.call(db_request.db)]
+
+    def test_from_redis(self, db_request, facets_redis):
+        facets_redis.set(facets.FACETS_KEY, json.dumps({
+            "filters": [["foo", ["foo :: bar"]]],
+            "counts": {"foo :: bar": 3},
+        }))
+
+        assert facets.load_facets(db_request) == facets.Facets(
+            [("foo", ["foo :: bar"])], {"foo :: bar": 3},
+        )
+
+    def test_not_in_redis(self, db_request, facets_redis):
+        ClassifierFactory.create(classifier="foo :: bar")
+
+        assert facets.load_facets(db_request) == facets.Facets([], {})
+
+    def test_redis_down(self, db_request, monkeypatch):
+        db_request.registry.settings = {
+            "celery.scheduler_url": "redis://localhost:6379/0",
+        }
+        monkeypatch.setattr(
+            warehouse_redis,
+            "get_redis",
+            lambda url: pretend.stub(
+                get=pretend.raiser(redis.exceptions.ConnectionError),
+            ),
+        )
+
+        assert facets.load_facets(db_request) == facets.Facets([], {})
+
+
+class TestFacetCache:
+
+    def test_caches_until_expired(self, monkeypatch):
+        now = [0]
+        loaded = [facets.Facets([], {}), facets.Facets([("foo", [])], {})]
+        load_facets = pretend.call_recorder(lambda request: loaded.pop(0))
+        monkeypatch.setattr(facets, "load_facets", load_facets)
+        request = pretend.stub()
+        cache = facets.FacetCache(10, clock=lambda: now[0])
+
+        assert cache.get(request) == facets.Facets([], {})
+        now[0] = 9
+        assert cache.get(request) == facets.Facets([], {})
+        now[0] = 10
+        assert cache.get(request) == facets.Facets([("foo", [])], {})
+        assert load_facets.calls == [pretend.call(request)] * 2
+
+    def test_invalidate(self, monkeypatch):
+        load_facets = pretend.call_recorder(
+            lambda request: facets.Facets([], {})
+        )
+        monkeypatch.setattr(facets, "load_facets", load_facets)
+        request = pretend.stub()
+        cache = facets.FacetCache(10, clock=lambda: 0)
+
+        cache.get(request)
+        cache.invalidate()
+        cache.get(request)
+
+        assert load_facets.calls == [pretend.call(request)] * 2
+
+
+class TestGetFacets:
+
+    def test_without_cache(self, monkeypatch):
+        result = pretend.stub()
+        monkeypatch.setattr(facets, "load_facets", lambda request: result)
+        request = pretend.stub(registry={})
+
+        assert facets.get_facets(request) is result
+
+    def test_with_cache(self):
+        result = pretend.stub()
+        cache = pretend.stub(get=pretend.call_recorder(lambda request: result))
+        request = pretend.stub(
+            registry={"warehouse.search.facets.cache": cache},
+        )
+
+        assert facets.get_facets(request) is result
+        assert cache.get.calls == [pretend.call(request)]
+
+
+class TestUpdateFacets:
+
+    def test_no_redis(self, db_request):
+        db_request.registry.settings = {}
+        db_request.es = pretend.stub()
+
+        facets.update_facets(db_request)
+
+    def test_stores_facets(self, db_request, facets_redis):
+        classifier = ClassifierFactory.create(classifier="foo :: bar")
+        release = ReleaseFactory.create(project=ProjectFactory.create())
+        release._classifiers.append(classifier)
+        db_request.es = FakeSearch([
+            pretend.stub(key="foo :: bar", doc_count=1),
+        ])
+
+        facets.update_facets(db_request)
+
+        assert json.loads(facets_redis.get(facets.FACETS_KEY)) == {
+            "filters": [["foo", ["foo :: bar"]]],
+            "counts": {"foo :: bar": 1},
+        }
+        assert 0 < facets_redis.ttl(facets.FACETS_KEY) <= \
+            facets.FACETS_EXPIRES
+        assert facets.load_facets(db_request) == facets.Facets(
+            [("foo", ["foo :: bar"])], {"foo :: bar": 1},
+        )
+
+    def test_elasticsearch_down(self, db_request, facets_redis, monkeypatch):
+        monkeypatch.setattr(
+            facets,
+            "classifier_counts",
+            pretend.raiser(elasticsearch.ConnectionError),
+        )
+        db_request.es = pretend.stub()
+
+        facets.update_facets(db_request)
+
+        assert json.loads(facets_redis.get(facets.FACETS_KEY)) == {
+            "filters": [],
+            "counts": {},
+        }
+
+
+class TestClassifierChanges:
+
+    @pytest.mark.parametrize("attr", ["new", "dirty", "deleted"])
+    def test_store_classifier_changes(self, attr):
+        session = pretend.stub(
+            info={}, new=set(), dirty=set(), deleted={object()},
+            is_modified=lambda obj, include_collections: True,
+        )
+        setattr(session, attr, getattr(session, attr) | {
+            facets.Classifier(classifier="foo :: bar"),
+        })
+
+        facets.store_classifier_changes(
+            pretend.stub(), session, pretend.stub(),
+        )
+
+        assert session.info == {"warehouse.search.facets.changed": True}
+
+    def test_store_classifier_collection_changes(self):
+        session = pretend.stub(
+            info={}, new=set(), deleted=set(),
+            dirty={facets.Classifier(classifier="foo :: bar")},
+            is_modified=pretend.call_recorder(
+                lambda obj, include_collections: False
+            ),
+        )
+
+        facets.store_classifier_changes(
+            pretend.stub(), session, pretend.stub(),
+        )
+
+        assert session.info == {}
+        assert session.is_modified.calls == [
+            pretend.call(obj, include_collections=False)
+            for obj in session.dirty
+        ]
+
+    def test_store_no_classifier_changes(self):
+        session = pretend.stub(
+            info={}, new={object()}, dirty=set(), deleted=set(),
+        )
+
+        facets.store_classifier_changes(
+            pretend.stub(), session, pretend.stub(),
+        )
+
+        assert session.info == {}
+
+    def test_execute_facets_update(self, fakeredis, monkeypatch):
+        fakeredis.set(facets.FACETS_KEY, "{}")
+        monkeypatch.setattr(
+            warehouse_redis, "get_redis", lambda url: fakeredis,
+        )
+        cache = pretend.stub(invalidate=pretend.call_recorder(lambda: None))
+        delay = pretend.call_recorder(lambda: None)
+        config = pretend.stub(
+            registry=pretend.stub(
+                settings={"celery.scheduler_url": "redis://localhost/0"},
+                get=lambda key: cache,
+            ),
+            task=pretend.call_recorder(lambda task: pretend.stub(delay=delay)),
+        )
+        session = pretend.stub(info={"warehouse.search.facets.changed": True})
+
+        facets.execute_facets_update(config, session)
+
+        assert session.info == {}
+        assert fakeredis.get(facets.FACETS_KEY) is None
+        assert cache.invalidate.calls == [pretend.call()]
+        assert config.task.calls == [pretend.call(facets.update_facets)]
+        assert delay.calls == [pretend.call()]
+
+    def test_execute_facets_update_redis_down(self, monkeypatch):
+        monkeypatch.setattr(
+            warehouse_redis,
+            "get_redis",
+            lambda url: pretend.stub(
+                delete=pretend.raiser(redis.exceptions.ConnectionError),
+            ),
+        )
+        delay = pretend.call_recorder(lambda: None)
+        config = pretend.stub(
+            registry=pretend.stub(
+                settings={"celery.scheduler_url": "redis://localhost/0"},
+                get=lambda key: None,
+            ),
+            task=lambda task: pretend.stub(delay=delay),
+        )
+        session = pretend.stub(info={"warehouse.search.facets.changed": True})
+
+        facets.execute_facets_update(config, session)
+
+        assert delay.calls == [pretend.call()]
+
+    def test_execute_no_changes(self):
+        config = pretend.stub(task=pretend.call_recorder(lambda task: None))
+
+        facets.execute_facets_update(config, pretend.stub(info={}))
+
+        assert config.task.calls == []
@@ -12,7 +12,11 @@
 
 import pretend
 
+from celery.schedules import crontab
+
 from warehouse import search
+from warehouse.search import facets
+from warehouse.search.tasks import reindex, reindex_incremental
 
 
 def test_es(monkeypatch):
@@ -49,3 +53,39 @@ def test_es(monkeypatch):
         )
     ]
     assert index_obj.search.calls == [pretend.call()]
+
+
+def test_includeme(monkeypatch):
+    client = pretend.stub()
+    es_cls = pretend.call_recorder(lambda *a, **kw: client)
+    monkeypatch.setattr(search.elasticsearch, "Elasticsearch", es_cls)
+
+    registry = {}
+    config = pretend.stub(
+        registry=pretend.stub(
+            settings={
+                "elasticsearch.url": "https://es.test/warehouse?shards=3",
+            },
+            __setitem__=registry.__setitem__,
+        ),
+        add_request_method=pretend.call_recorder(lambda *a, **kw: None),
+        add_periodic_task=pretend.call_recorder(lambda *a, **kw: None),
+    )
+
+    search.includeme(config)
+
+    assert registry["elasticsearch.client"] is client
+    assert registry["elasticsearch.index"] == "warehouse"
+    assert registry["elasticsearch.shards"] == 3
+    assert registry["elasticsearch.replicas"] == 0
+    assert isinstance(
+        registry["warehouse.search.facets.cache"], facets.FacetCache,
+    )
+    assert config.add_request_method.calls == [
+        pretend.call(search.es, name="es", reify=True),
+    ]
+    assert config.add_periodic_task.calls == [
+        pretend.call(crontab(), reindex_incremental),
+        pretend.call(crontab(minute=0, hour=6), reindex),
+        pretend.call(crontab(minute="*/15"), facets.update_facets),
+    ]
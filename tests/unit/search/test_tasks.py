@@ -12,6 +12,7 @@
 
 import os
 
+import fakeredis
 import packaging.version
 import pretend
 import pytest
@@ -19,9 +20,14 @@ import pytest
 from first import first
 
 import warehouse.search.tasks
-from warehouse.search.tasks import reindex, _project_docs
+from warehouse.search.tasks import (
+    LAST_SERIAL_KEY, reindex, reindex_incremental, _project_docs,
+)
 
-from ...common.db.packaging import ProjectFactory, ReleaseFactory
+from ...common.db.accounts import UserFactory
+from ...common.db.packaging import (
+    JournalEntryFactory, ProjectFactory, ReleaseFactory,
+)
 
 
 def test_project_docs(db_session):
@@ -54,6 +60,16 @@ def test_project_docs(db_session):
     ]
 
 
+def test_project_docs_filtered(db_session):
+    projects = [ProjectFactory.create() for _ in range(2)]
+    for p in projects:
+        ReleaseFactory.create(project=p)
+
+    docs = list(_project_docs(db_session, [projects[0].name]))
+
+    assert [d["_id"] for d in docs] == [projects[0].normalized_name]
+
+
 class FakeESIndices:
 
     def __init__(self):
@@ -94,11 +110,25 @@ class FakeESClient:
 
     def __init__(self):
         self.indices = FakeESIndices()
+        self.delete = pretend.call_recorder(lambda **kw: None)
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    client = fakeredis.FakeStrictRedis()
+    monkeypatch.setattr(
+        warehouse.search.tasks.redis.StrictRedis,
+        "from_url",
+        lambda url: client,
+    )
+    yield client
+    client.flushall()
 
 
 class TestReindex:
 
-    def test_fails_when_raising(self, db_request, monkeypatch):
+    def test_fails_when_raising(self, db_request, monkeypatch,
+                                redis_client):
         docs = pretend.stub()
 
         def project_docs(db):
@@ -119,6 +149,7 @@ class TestReindex:
         )
         db_request.registry.settings = {
             "elasticsearch.url": "http://some.url",
+            "celery.scheduler_url": "redis://redis:6379/0",
         }
         monkeypatch.setattr(
             warehouse.search.tasks.elasticsearch,
@@ -145,10 +176,12 @@ class TestReindex:
         assert es_client.indices.delete.calls == [
             pretend.call(index='warehouse-cbcbcbcbcb'),
         ]
+        assert redis_client.get(LAST_SERIAL_KEY) is None
         assert es_client.indices.put_settings.calls == []
         assert es_client.indices.forcemerge.calls == []
 
-    def test_successfully_indexes_and_adds_new(self, db_request, monkeypatch):
+    def test_successfully_indexes_and_adds_new(self, db_request, monkeypatch,
+                                               redis_client):
 
         docs = pretend.stub()
 
@@ -171,6 +204,7 @@ class TestReindex:
         )
         db_request.registry.settings = {
             "elasticsearch.url": "http://some.url",
+            "celery.scheduler_url": "redis://redis:6379/0",
         }
         monkeypatch.setattr(
             warehouse.search.tasks.elasticsearch,
@@ -204,6 +238,7 @@ class TestReindex:
         assert es_client.indices.aliases == {
             "warehouse": ["warehouse-cbcbcbcbcb"],
         }
+        assert redis_client.get(LAST_SERIAL_KEY) == b"0"
         assert es_client.indices.put_settings.calls == [
             pretend.call(
                 index='warehouse-cbcbcbcbcb',
@@ -219,7 +254,8 @@ class TestReindex:
             pretend.call(index='warehouse-cbcbcbcbcb')
         ]
 
-    def test_successfully_indexes_and_replaces(self, db_request, monkeypatch):
+    def test_successfully_indexes_and_replaces(self, db_request, monkeypatch,
+                                               redis_client):
         docs = pretend.stub()
 
         def project_docs(db):
@@ -245,6 +281,7 @@ class TestReindex:
         )
         db_request.registry.settings = {
             "elasticsearch.url": "http://some.url",
+            "celery.scheduler_url": "redis://redis:6379/0",
         }
         monkeypatch.setattr(
             warehouse.search.tasks.elasticsearch,
@@ -294,3 +331,88 @@ class TestReindex:
         assert es_client.indices.forcemerge.calls == [
             pretend.call(index='warehouse-cbcbcbcbcb')
         ]
+
+
+class TestReindexIncremental:
+
+    @pytest.fixture
+    def es_client(self, db_request, monkeypatch):
+        es_client = FakeESClient()
+        db_request.registry.update({"elasticsearch.index": "warehouse"})
+        db_request.registry.settings = {
+            "elasticsearch.url": "http://some.url",
+            "celery.scheduler_url": "redis://redis:6379/0",
+        }
+        monkeypatch.setattr(
+            warehouse.search.tasks.elasticsearch,
+            "Elasticsearch",
+            lambda *a, **kw: es_client
+        )
+        return es_client
+
+    def test_never_indexed(self, db_request, monkeypatch, es_client,
+                           redis_client):
+        parallel_bulk = pretend.call_recorder(lambda client, iterable: [])
+        monkeypatch.setattr(
+            warehouse.search.tasks, "parallel_bulk", parallel_bulk)
+
+        reindex_incremental(db_request)
+
+        assert parallel_bulk.calls == []
+        assert redis_client.get(LAST_SERIAL_KEY) is None
+
+    def test_nothing_changed(self, db_request, monkeypatch, es_client,
+                             redis_client):
+        je = JournalEntryFactory.create(submitted_by=UserFactory.create())
+        redis_client.set(LAST_SERIAL_KEY, je.id)
+        parallel_bulk = pretend.call_recorder(lambda client, iterable: [])
+        monkeypatch.setattr(
+            warehouse.search.tasks, "parallel_bulk", parallel_bulk)
+
+        reindex_incremental(db_request)
+
+        assert parallel_bulk.calls == []
+        assert redis_client.get(LAST_SERIAL_KEY) == str(je.id).encode()
+
+    def test_updates_changed_projects(self, db_request, monkeypatch,
+                                      es_client, redis_client):
+        user = UserFactory.create()
+        updated = ProjectFactory.create()
+        ReleaseFactory.create(project=updated)
+        unchanged = ProjectFactory.create()
+        ReleaseFactory.create(project=unchanged)
+
+        old = JournalEntryFactory.create(
+            id=500, name=unchanged.name, submitted_by=user,
+        )
+        JournalEntryFactory.create(
+            id=700, name=updated.name, submitted_by=user,
+        )
+        last = JournalEntryFactory.create(
+            id=701, name="removed-project", submitted_by=user,
+        )
+        redis_client.set(LAST_SERIAL_KEY, old.id + 150)
+
+        bulk_docs = []
+
+        def parallel_bulk(client, iterable):
+            assert client is es_client
+            bulk_docs.extend(iterable)
+            return [None]
+
+        monkeypatch.setattr(
+            warehouse.search.tasks, "parallel_bulk", parallel_bulk)
+
+        reindex_incremental(db_request)
+
+        assert [d["_id"] for d in bulk_docs] == [updated.normalized_name]
+        assert {d["_index"] for d in bulk_docs} == {"warehouse"}
+        assert es_client.delete.calls == [
+            pretend.call(
+                index="warehouse",
+                doc_type="project",
+                id="removed-project",
+                ignore=404,
+            ),
+        ]
+        assert redis_client.get(LAST_SERIAL_KEY) == str(last.id).encode()
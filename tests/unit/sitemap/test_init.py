@@ -0,0 +1,58 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pretend
+
+from celery.schedules import crontab
+
+from warehouse import sitemap
+from warehouse.sitemap.interfaces import ISitemapStorage
+from warehouse.sitemap.tasks import rebuild_sitemaps, update_sitemaps
+
+
+def test_includeme():
+    storage_class = pretend.stub(create_service=pretend.stub())
+    config = pretend.stub(
+        maybe_dotted=pretend.call_recorder(lambda dotted: storage_class),
+        register_service_factory=pretend.call_recorder(
+            lambda factory, iface: None,
+        ),
+        registry=pretend.stub(settings={"sitemap.backend": "foo.bar"}),
+        add_periodic_task=pretend.call_recorder(lambda *a, **kw: None),
+    )
+
+    sitemap.includeme(config)
+
+    assert config.maybe_dotted.calls == [pretend.call("foo.bar")]
+    assert config.register_service_factory.calls == [
+        pretend.call(storage_class.create_service, ISitemapStorage),
+    ]
+
+    assert config.add_periodic_task.calls == [
+        pretend.call(crontab(minute="*/5"), update_sitemaps),
+        pretend.call(crontab(minute=30, hour=4), rebuild_sitemaps),
+    ]
+
+
+def test_includeme_without_backend():
+    config = pretend.stub(
+        register_service_factory=pretend.call_recorder(
+            lambda factory, iface: None,
+        ),
+        registry=pretend.stub(settings={}),
+        add_periodic_task=pretend.call_recorder(lambda *a, **kw: None),
+    )
+
+    sitemap.includeme(config)
+
+    assert config.register_service_factory.calls == []
+    assert config.add_periodic_task.calls == []
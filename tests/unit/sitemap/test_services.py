@@ -0,0 +1,145 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import os.path
+
+import boto3.session
+import botocore.exceptions
+import pretend
+import pytest
+
+from zope.interface.verify import verifyClass
+
+from warehouse.sitemap.interfaces import ISitemapStorage
+from warehouse.sitemap.services import LocalSitemapStorage, S3SitemapStorage
+
+
+class TestLocalSitemapStorage:
+
+    def test_verify_service(self):
+        assert verifyClass(ISitemapStorage, LocalSitemapStorage)
+
+    def test_create_service(self):
+        request = pretend.stub(
+            registry=pretend.stub(
+                settings={"sitemap.path": "/the/one/two/"},
+            ),
+        )
+        storage = LocalSitemapStorage.create_service(None, request)
+        assert storage.base == "/the/one/two/"
+
+    def test_stores_and_gets_file(self, tmpdir):
+        filename = str(tmpdir.join("index.xml"))
+        with open(filename, "wb") as fp:
+            fp.write(b"<sitemapindex/>")
+
+        storage_dir = str(tmpdir.join("storage"))
+        storage = LocalSitemapStorage(storage_dir)
+        storage.store("sitemap/index.xml", filename, content_type="text/xml")
+
+        with open(os.path.join(storage_dir, "sitemap/index.xml"), "rb") as fp:
+            assert fp.read() == b"<sitemapindex/>"
+        with storage.get("sitemap/index.xml") as fp:
+            assert fp.read() == b"<sitemapindex/>"
+
+    def test_raises_when_file_non_existant(self, tmpdir):
+        storage = LocalSitemapStorage(str(tmpdir))
+        with pytest.raises(FileNotFoundError):
+            storage.get("sitemap/index.xml")
+
+
+class TestS3SitemapStorage:
+
+    def test_verify_service(self):
+        assert verifyClass(ISitemapStorage, S3SitemapStorage)
+
+    @pytest.mark.parametrize("prefix", [None, "sitemaps/"])
+    def test_create_service(self, prefix):
+        session = boto3.session.Session()
+        settings = {"sitemap.bucket": "froblob"}
+        if prefix is not None:
+            settings["sitemap.prefix"] = prefix
+        request = pretend.stub(
+            find_service=pretend.call_recorder(lambda name: session),
+            registry=pretend.stub(settings=settings),
+        )
+        storage = S3SitemapStorage.create_service(None, request)
+
+        assert request.find_service.calls == [pretend.call(name="aws.session")]
+        assert storage.bucket.name == "froblob"
+        assert storage.prefix == prefix
+
+    @pytest.mark.parametrize(
+        ("prefix", "key"),
+        [
+            (None, "sitemap/index.xml"),
+            ("sitemaps/", "sitemaps/sitemap/index.xml"),
+        ],
+    )
+    def test_gets_file(self, prefix, key):
+        s3key = pretend.stub(get=lambda: {"Body": io.BytesIO(b"contents")})
+        bucket = pretend.stub(Object=pretend.call_recorder(lambda path: s3key))
+        storage = S3SitemapStorage(bucket, prefix=prefix)
+
+        assert storage.get("sitemap/index.xml").read() == b"contents"
+        assert bucket.Object.calls == [pretend.call(key)]
+
+    def test_raises_when_key_non_existant(self):
+        def raiser():
+            raise botocore.exceptions.ClientError(
+                {"Error": {"Code": "NoSuchKey", "Message": "No Key!"}},
+                "some operation",
+            )
+
+        bucket = pretend.stub(Object=lambda path: pretend.stub(get=raiser))
+        storage = S3SitemapStorage(bucket)
+
+        with pytest.raises(FileNotFoundError):
+            storage.get("sitemap/index.xml")
+
+    def test_passes_up_error_when_not_no_such_key(self):
+        def raiser():
+            raise botocore.exceptions.ClientError(
+                {"Error": {"Code": "SomeOtherError", "Message": "Who Knows!"}},
+                "some operation",
+            )
+
+        bucket = pretend.stub(Object=lambda path: pretend.stub(get=raiser))
+        storage = S3SitemapStorage(bucket)
+
+        with pytest.raises(botocore.exceptions.ClientError):
+            storage.get("sitemap/index.xml")
+
+    @pytest.mark.parametrize(
+        ("prefix", "key"),
+        [
+            (None, "sitemap/index.xml"),
+            ("sitemaps/", "sitemaps/sitemap/index.xml"),
+        ],
+    )
+    def test_stores_file_with_content_type(self, tmpdir, prefix, key):
+        filename = str(tmpdir.join("index.xml"))
+        with open(filename, "wb") as fp:
+            fp.write(b"<sitemapindex/>")
+
+        bucket = pretend.stub(
+            upload_file=pretend.call_recorder(
+                lambda filename, key, ExtraArgs: None,
+            ),
+        )
+        storage = S3SitemapStorage(bucket, prefix=prefix)
+        storage.store("sitemap/index.xml", filename, content_type="text/xml")
+
+        assert bucket.upload_file.calls == [
+            pretend.call(filename, key, ExtraArgs={"ContentType": "text/xml"}),
+        ]
@@ -0,0 +1,240 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pretend
+import pytest
+import redis
+
+from warehouse.accounts.models import User
+from warehouse.cache.origin import IOriginCache
+from warehouse.packaging.models import Project
+from warehouse.sitemap import tasks
+from warehouse.sitemap.interfaces import ISitemapStorage
+from warehouse.sitemap.services import LocalSitemapStorage
+from warehouse.utils import redis as warehouse_redis
+
+from ...common.db.accounts import UserFactory
+from ...common.db.packaging import ProjectFactory
+
+
+@pytest.fixture
+def fakeredis():
+    import fakeredis
+    _fakeredis = fakeredis.FakeStrictRedis()
+    yield _fakeredis
+    _fakeredis.flushall()
+
+
+@pytest.fixture
+def sitemap_request(db_request, fakeredis, monkeypatch, tmpdir):
+    db_request.registry.settings = {
+        "celery.scheduler_url": "redis://localhost:6379/0",
+    }
+    monkeypatch.setattr(warehouse_redis, "get_redis", lambda url: fakeredis)
+
+    storage = LocalSitemapStorage(str(tmpdir))
+    cacher = pretend.stub(purge=pretend.call_recorder(lambda keys: None))
+
+    def find_service(iface=None, name=None):
+        return {ISitemapStorage: storage, IOriginCache: cacher}[iface]
+
+    db_request.find_service = find_service
+    db_request.route_url = lambda route, **kw: "/{}/".format(
+        kw.get("name") or kw.get("username")
+    )
+    monkeypatch.setattr(
+        tasks,
+        "render",
+        lambda template, value, request: repr(sorted(value.items())),
+    )
+
+    db_request.storage = storage
+    db_request.cacher = cacher
+    return db_request
+
+
+def _read(storage, name):
+    with storage.get("sitemap/{}.xml".format(name)) as fp:
+        return fp.read().decode("utf8")
+
+
+def test_sitemap_bucket(db_session):
+    project = ProjectFactory.create(name="foobar")
+    user = UserFactory.create(username="a")
+    db_session.flush()
+    db_session.refresh(project)
+    db_session.refresh(user)
+
+    assert tasks.sitemap_bucket("foobar") == project.sitemap_bucket
+    assert tasks.sitemap_bucket("a") == user.sitemap_bucket
+
+
+class TestPublicRequest:
+
+    def test_without_domain(self):
+        request = pretend.stub(registry=pretend.stub(settings={}))
+        assert tasks._public_request(request) is request
+
+    def test_with_domain(self, pyramid_config):
+        pyramid_config.add_route("foo", "/foo/")
+        request = pretend.stub(
+            registry=pyramid_config.registry,
+        )
+        pyramid_config.registry.settings["warehouse.domain"] = "pypi.org"
+
+        public = tasks._public_request(request)
+
+        assert public.route_url("foo") == "https://pypi.org/foo/"
+
+
+class TestUpdateSitemaps:
+
+    def test_no_redis(self, db_request):
+        db_request.registry.settings = {}
+        storage = pretend.stub()
+        db_request.find_service = lambda iface: storage
+
+        tasks.update_sitemaps(db_request)
+
+    def test_renders_everything_first(self, sitemap_request):
+        ProjectFactory.create(name="foobar")
+        UserFactory.create(username="a")
+
+        tasks.update_sitemaps(sitemap_request)
+
+        assert _read(sitemap_request.storage, "0") == repr(
+            [("urls", ["/foobar/"])]
+        )
+        assert _read(sitemap_request.storage, "1") == repr(
+            [("urls", ["/a/"])]
+        )
+        assert "Bucket(name='0'" in _read(sitemap_request.storage, "index")
+        assert sitemap_request.cacher.purge.calls == [
+            pretend.call(["sitemap"]),
+        ]
+
+    def test_nothing_changed(self, sitemap_request):
+        tasks.update_sitemaps(sitemap_request)
+        tasks.update_sitemaps(sitemap_request)
+
+        assert sitemap_request.cacher.purge.calls == [
+            pretend.call(["sitemap"]),
+        ]
+
+    def test_renders_changed_buckets(self, sitemap_request, fakeredis):
+        ProjectFactory.create(name="foobar")
+        UserFactory.create(username="a")
+        tasks.update_sitemaps(sitemap_request)
+
+        ProjectFactory.create(name="foobaz")
+        sitemap_request.db.query(User).delete()
+        bucket = tasks.sitemap_bucket("foobaz")
+        fakeredis.sadd(tasks.CHANGED_BUCKETS_KEY, bucket)
+
+        tasks.update_sitemaps(sitemap_request)
+
+        assert _read(sitemap_request.storage, bucket) == repr(
+            [("urls", ["/foobaz/"])]
+        )
+        # Bucket "1" wasn't marked as changed, so it's left alone.
+        assert _read(sitemap_request.storage, "1") == repr(
+            [("urls", ["/a/"])]
+        )
+        assert not fakeredis.exists(tasks.CHANGED_BUCKETS_KEY)
+        assert len(sitemap_request.cacher.purge.calls) == 2
+
+
+def test_rebuild_sitemaps(sitemap_request):
+    ProjectFactory.create(name="foobar")
+    tasks.update_sitemaps(sitemap_request)
+    ProjectFactory.create(name="foobaz")
+
+    tasks.rebuild_sitemaps(sitemap_request)
+
+    assert _read(
+        sitemap_request.storage, tasks.sitemap_bucket("foobaz"),
+    ) == repr([("urls", ["/foobaz/"])])
+
+
+class TestSitemapChanges:
+
+    def test_store_sitemap_changes(self, db_session):
+        project = ProjectFactory.create(name="foobar")
+        user = UserFactory.create(username="a")
+        db_session.flush()
+        db_session.info.pop("warehouse.sitemap.changed", None)
+
+        user.username = "b"
+        db_session.delete(project)
+        ProjectFactory.create(name="new")
+        db_session.flush()
+
+        assert db_session.info["warehouse.sitemap.changed"] == {
+            tasks.sitemap_bucket(name)
+            for name in ["foobar", "a", "b", "new"]
+        }
+
+    def test_store_no_sitemap_changes(self):
+        session = pretend.stub(
+            info={}, new={object()}, dirty=set(), deleted=set(),
+        )
+
+        tasks.store_sitemap_changes(pretend.stub(), session, pretend.stub())
+
+        assert session.info == {}
+
+    def test_ignores_other_changes(self, db_session):
+        project = ProjectFactory.create(name="foobar")
+        db_session.flush()
+        db_session.info.pop("warehouse.sitemap.changed", None)
+
+        project.zscore = 1
+        db_session.query(Project).all()
+
+        assert "warehouse.sitemap.changed" not in db_session.info
+
+    def test_execute_sitemap_update(self, fakeredis, monkeypatch):
+        monkeypatch.setattr(
+            warehouse_redis, "get_redis", lambda url: fakeredis,
+        )
+        config = pretend.stub(
+            registry=pretend.stub(
+                settings={"celery.scheduler_url": "redis://localhost/0"},
+            ),
+        )
+        session = pretend.stub(info={"warehouse.sitemap.changed": {"a", "b"}})
+
+        tasks.execute_sitemap_update(config, session)
+
+        assert session.info == {}
+        assert fakeredis.smembers(tasks.CHANGED_BUCKETS_KEY) == {b"a", b"b"}
+
+    def test_execute_sitemap_update_redis_down(self, monkeypatch):
+        monkeypatch.setattr(
+            warehouse_redis,
+            "get_redis",
+            lambda url: pretend.stub(
+                sadd=pretend.raiser(redis.exceptions.ConnectionError),
+            ),
+        )
+        config = pretend.stub(
+            registry=pretend.stub(
+                settings={"celery.scheduler_url": "redis://localhost/0"},
+            ),
+        )
+        session = pretend.stub(info={"warehouse.sitemap.changed": {"a"}})
+
+        tasks.execute_sitemap_update(config, session)
+
+    def test_execute_no_changes(self):
+        config = pretend.stub(registry=pretend.stub(settings={}))
+        tasks.execute_sitemap_update(config, pretend.stub(info={}))
@@ -10,6 +10,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
+
 import pretend
 import pytest
 
@@ -24,6 +26,7 @@ def test_sitemap_index(db_request):
             enabled=False,
             csp_policy=pretend.stub(),
             merge=lambda _: None,
+            get=pretend.raiser(FileNotFoundError),
         )
     )
 
@@ -55,6 +58,7 @@ def test_sitemap_bucket(db_request):
             enabled=False,
             csp_policy=pretend.stub(),
             merge=lambda _: None,
+            get=pretend.raiser(FileNotFoundError),
         )
     )
 
@@ -80,6 +84,7 @@ def test_sitemap_bucket_too_many(monkeypatch, db_request):
             enabled=False,
             csp_policy=pretend.stub(),
             merge=lambda _: None,
+            get=pretend.raiser(FileNotFoundError),
         )
     )
 
@@ -96,3 +101,41 @@ def test_sitemap_bucket_too_many(monkeypatch, db_request):
 
     with pytest.raises(ValueError):
         sitemap.sitemap_bucket(db_request)
+
+
+@pytest.mark.parametrize(
+    ("view", "matchdict", "path"),
+    [
+        (sitemap.sitemap_index, {}, "sitemap/index.xml"),
+        (sitemap.sitemap_bucket, {"bucket": "a"}, "sitemap/a.xml"),
+    ],
+)
+def test_serves_stored_sitemap(db_request, view, matchdict, path):
+    body = io.BytesIO(b"<urlset></urlset>")
+    storage = pretend.stub(get=pretend.call_recorder(lambda path: body))
+    csp = pretend.stub(merge=lambda _: None)
+    db_request.find_service = (
+        lambda iface=None, name=None: csp if name == "csp" else storage
+    )
+    db_request.matchdict.update(matchdict)
+
+    response = view(db_request)
+
+    assert response is db_request.response
+    assert response.body == b"<urlset></urlset>"
+    assert response.content_type == "text/xml"
+    assert storage.get.calls == [pretend.call(path)]
+    assert body.closed
+
+
+def test_renders_without_storage(db_request):
+    csp = pretend.stub(merge=lambda _: None)
+
+    def find_service(iface=None, name=None):
+        if name == "csp":
+            return csp
+        raise ValueError
+
+    db_request.find_service = find_service
+
+    assert sitemap.sitemap_index(db_request) == {"buckets": []}
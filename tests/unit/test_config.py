@@ -402,13 +402,14 @@ def test_configure(monkeypatch, settings, environment, other_settings):
             pretend.call("pyramid_retry"),
             pretend.call("pyramid_tm"),
             pretend.call("pyramid_services"),
-            pretend.call(".legacy.api.xmlrpc.cache"),
             pretend.call("pyramid_rpc.xmlrpc"),
             pretend.call(".legacy.action_routing"),
             pretend.call(".domain"),
             pretend.call(".i18n"),
             pretend.call(".db"),
             pretend.call(".tasks"),
+            pretend.call(".legacy.api.xmlrpc.cache"),
+            pretend.call(".legacy.api.simple"),
             pretend.call(".rate_limiting"),
             pretend.call(".static"),
             pretend.call(".policy"),
@@ -422,6 +423,7 @@ def test_configure(monkeypatch, settings, environment, other_settings):
             pretend.call(".accounts"),
             pretend.call(".manage"),
             pretend.call(".packaging"),
+            pretend.call(".sitemap"),
             pretend.call(".redirects"),
             pretend.call(".routes"),
             pretend.call(".admin"),
@@ -266,6 +266,49 @@ def test_create_session_read_only_mode(
     assert request.tm.doom.calls == doom_calls
 
 
+@pytest.mark.parametrize(
+    ("flags", "doom_calls"),
+    [
+        ({}, []),
+        ({"read-only": pretend.stub(enabled=False)}, []),
+        ({"read-only": pretend.stub(enabled=True)}, [pretend.call()]),
+    ],
+)
+def test_create_session_read_only_mode_cached(flags, doom_calls, monkeypatch):
+    session_obj = pretend.stub(close=lambda: None)
+    session_cls = pretend.call_recorder(lambda bind: session_obj)
+    monkeypatch.setattr(db, "Session", session_cls)
+
+    register = pretend.call_recorder(lambda session, transaction_manager: None)
+    monkeypatch.setattr(zope.sqlalchemy, "register", register)
+
+    connection = pretend.stub(
+        connection=pretend.stub(
+            get_transaction_status=lambda: pretend.stub(),
+            set_session=lambda **kw: None,
+            rollback=lambda: None,
+        ),
+        info={},
+        close=lambda: None,
+    )
+    engine = pretend.stub(connect=pretend.call_recorder(lambda: connection))
+    cache = pretend.stub(get=pretend.call_recorder(lambda session: flags))
+    request = pretend.stub(
+        registry={
+            "sqlalchemy.engine": engine,
+            "warehouse.admin.flags.cache": cache,
+        },
+        tm=pretend.stub(doom=pretend.call_recorder(lambda: None)),
+        read_only=False,
+        add_finished_callback=lambda callback: None,
+        user=pretend.stub(is_superuser=False),
+    )
+
+    assert _create_session(request) is session_obj
+    assert cache.get.calls == [pretend.call(session_obj)]
+    assert request.tm.doom.calls == doom_calls
+
+
 @pytest.mark.parametrize(
     ("predicates", "expected"),
     [
@@ -13,7 +13,6 @@
 import time
 
 import msgpack
-import redis
 import pretend
 import pytest
 
@@ -267,20 +266,18 @@ class TestSessionFactory:
         )
         monkeypatch.setattr(crypto, "TimestampSigner", timestamp_signer_create)
 
-        strict_redis_obj = pretend.stub()
-        strict_redis_cls = pretend.stub(
-            from_url=pretend.call_recorder(lambda url: strict_redis_obj),
-        )
-        monkeypatch.setattr(redis, "StrictRedis", strict_redis_cls)
+        redis_obj = pretend.stub()
+        get_redis = pretend.call_recorder(lambda url: redis_obj)
+        monkeypatch.setattr(warehouse.sessions, "get_redis", get_redis)
 
         session_factory = SessionFactory("mysecret", "my url")
 
         assert session_factory.signer is timestamp_signer_obj
-        assert session_factory.redis is strict_redis_obj
+        assert session_factory.redis is redis_obj
         assert timestamp_signer_create.calls == [
             pretend.call("mysecret", salt="session"),
         ]
-        assert strict_redis_cls.from_url.calls == [pretend.call("my url")]
+        assert get_redis.calls == [pretend.call("my url")]
 
     def test_redis_key(self):
         session_factory = SessionFactory(
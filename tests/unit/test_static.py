@@ -17,6 +17,8 @@ from unittest import mock
 import pretend
 import pytest
 
+from pyramid.request import Request
+from pyramid.response import FileIter
 from pyramid.tweens import EXCVIEW, INGRESS
 
 from warehouse import static
@@ -108,6 +110,61 @@ class TestWhiteNose:
             "static/the/file.txt",
         )
 
+    def test_etag_from_manifest(self, tmpdir):
+        manifest_path = str(tmpdir.join("manifest.json"))
+        with open(manifest_path, "w", encoding="utf8") as fp:
+            json.dump({"css/file.css": "css/file.6b3c8a2f.css"}, fp)
+        tmpdir.mkdir("css").join("file.6b3c8a2f.css").write("body {}")
+
+        whitenoise = static.WhiteNoise(None, manifest=manifest_path)
+        whitenoise.add_files(str(tmpdir), prefix="/static/")
+
+        _, headers = (whitenoise.files["/static/css/file.6b3c8a2f.css"]
+                                .get_path_and_headers({}))
+
+        assert dict(headers)["ETag"] == '"6b3c8a2f"'
+
+    def test_etag_from_stat(self, tmpdir):
+        path = tmpdir.join("file.txt")
+        path.write("A file.")
+        path.setmtime(1500000000)
+
+        whitenoise = static.WhiteNoise(None)
+        whitenoise.add_files(str(tmpdir), prefix="/static/")
+
+        _, headers = (whitenoise.files["/static/file.txt"]
+                                .get_path_and_headers({}))
+
+        assert dict(headers)["ETag"] == '"{:x}-{:x}"'.format(1500000000, 7)
+
+    @pytest.mark.parametrize(
+        ("accept_encoding", "suffix", "etag"),
+        [
+            ("", "", '"{tag}"'),
+            ("gzip", ".gz", '"{tag}-gzip"'),
+            ("gzip, br", ".br", '"{tag}-br"'),
+        ],
+    )
+    def test_variant_etags(self, tmpdir, accept_encoding, suffix, etag):
+        path = tmpdir.join("file.txt")
+        path.write("A file.")
+        tmpdir.join("file.txt.gz").write("A gzipped file.")
+        tmpdir.join("file.txt.br").write("A brotli file.")
+
+        whitenoise = static.WhiteNoise(None)
+        whitenoise.add_files(str(tmpdir), prefix="/static/")
+
+        static_file = whitenoise.files["/static/file.txt"]
+        _, plain_headers = static_file.get_path_and_headers({})
+        variant_path, headers = static_file.get_path_and_headers(
+            {"HTTP_ACCEPT_ENCODING": accept_encoding},
+        )
+
+        assert variant_path == str(path) + suffix
+        assert dict(headers)["ETag"] == etag.format(
+            tag=dict(plain_headers)["ETag"][1:-1],
+        )
+
 
 class TestWhitenoiseTween:
 
@@ -190,6 +247,65 @@ class TestWhitenoiseTween:
         with open(path, "rb") as fp:
             assert resp.body == fp.read()
 
+    def test_serves_with_precomputed_headers(self, tmpdir, monkeypatch):
+        tmpdir.join("file.txt").write("A file.")
+        tmpdir.join("file.txt.gz").write("A gzipped file.")
+
+        whitenoise = static.WhiteNoise(None, max_age=60)
+        whitenoise.add_files(str(tmpdir), prefix="/static/")
+        _, headers = (whitenoise.files["/static/file.txt"]
+                                .get_path_and_headers({}))
+
+        # Nothing should need to look at the file again to work out how to
+        # serve it.
+        monkeypatch.setattr(static.os, "stat", pretend.raiser(AssertionError))
+
+        file_wrapper = pretend.call_recorder(
+            lambda fp, block_size: FileIter(fp, block_size)
+        )
+        registry = pretend.stub(whitenoise=whitenoise)
+        request = pretend.stub(
+            method="GET",
+            environ={
+                "HTTP_ACCEPT_ENCODING": "gzip",
+                "wsgi.file_wrapper": file_wrapper,
+            },
+            path_info="/static/file.txt",
+            registry=registry,
+        )
+
+        tween = static.whitenoise_tween_factory(pretend.stub(), registry)
+        resp = tween(request)
+
+        assert resp.status_code == 200
+        assert resp.content_type == "text/plain"
+        assert resp.content_encoding == "gzip"
+        assert resp.content_length == len("A gzipped file.")
+        assert resp.etag == dict(headers)["ETag"][1:-1] + "-gzip"
+        assert resp.conditional_response
+        assert len(file_wrapper.calls) == 1
+        assert resp.body == b"A gzipped file."
+
+    def test_not_modified(self, tmpdir):
+        tmpdir.join("file.txt").write("A file.")
+
+        whitenoise = static.WhiteNoise(None)
+        whitenoise.add_files(str(tmpdir), prefix="/static/")
+        _, headers = (whitenoise.files["/static/file.txt"]
+                                .get_path_and_headers({}))
+
+        registry = pretend.stub(whitenoise=whitenoise)
+        request = Request.blank(
+            "/static/file.txt",
+            headers={"If-None-Match": dict(headers)["ETag"]},
+        )
+        request.registry = registry
+
+        tween = static.whitenoise_tween_factory(pretend.stub(), registry)
+        resp = request.get_response(tween(request))
+
+        assert resp.status_code == 304
+
 
 class TestDirectives:
 
@@ -225,9 +225,10 @@ class TestSearch:
             params["page"] = page
         db_request.params = params
 
-        sort = pretend.stub()
+        sort = pretend.stub(source=lambda *a, **kw: sort)
         suggest = pretend.stub(
             sort=pretend.call_recorder(lambda *a, **kw: sort),
+            source=lambda *a, **kw: suggest,
         )
         es_query = pretend.stub(
             suggest=pretend.call_recorder(lambda *a, **kw: suggest),
@@ -250,6 +251,7 @@ class TestSearch:
             "order": params.get("o", ''),
             "applied_filters": [],
             "available_filters": [],
+            "facet_counts": {},
         }
         assert page_cls.calls == [
             pretend.call(suggest, url_maker=url_maker, page=page or 1),
@@ -276,9 +278,10 @@ class TestSearch:
             params["page"] = page
         db_request.params = params
 
-        sort = pretend.stub()
+        sort = pretend.stub(source=lambda *a, **kw: sort)
         suggest = pretend.stub(
             sort=pretend.call_recorder(lambda *a, **kw: sort),
+            source=lambda *a, **kw: suggest,
         )
         es_query = pretend.stub(
             suggest=pretend.call_recorder(lambda *a, **kw: suggest),
@@ -301,6 +304,7 @@ class TestSearch:
             "order": params.get("o", ''),
             "applied_filters": [],
             "available_filters": [],
+            "facet_counts": {},
         }
         assert page_cls.calls == [
             pretend.call(suggest, url_maker=url_maker, page=page or 1),
@@ -344,9 +348,10 @@ class TestSearch:
             params["o"] = order
         db_request.params = params
 
-        sort = pretend.stub()
+        sort = pretend.stub(source=lambda *a, **kw: sort)
         suggest = pretend.stub(
             sort=pretend.call_recorder(lambda *a, **kw: sort),
+            source=lambda *a, **kw: suggest,
         )
         es_query = pretend.stub(
             suggest=pretend.call_recorder(lambda *a, **kw: suggest),
@@ -369,6 +374,7 @@ class TestSearch:
             "order": params.get("o", ''),
             "applied_filters": [],
             "available_filters": [],
+            "facet_counts": {},
         }
         assert page_cls.calls == [
             pretend.call(
@@ -408,6 +414,7 @@ class TestSearch:
             suggest=pretend.call_recorder(lambda *a, **kw: es_query),
             filter=pretend.call_recorder(lambda *a, **kw: es_query),
             sort=pretend.call_recorder(lambda *a, **kw: es_query),
+            source=pretend.call_recorder(lambda *a, **kw: es_query),
         )
         db_request.es = pretend.stub(
             query=pretend.call_recorder(lambda *a, **kw: es_query)
@@ -443,6 +450,7 @@ class TestSearch:
                     classifier2.classifier,
                 ])
             ],
+            "facet_counts": {},
         }
         assert (
             ("fiz", [
@@ -470,6 +478,11 @@ class TestSearch:
             pretend.call('terms', classifiers=['foo :: bar']),
             pretend.call('terms', classifiers=['fiz :: buz'])
         ]
+        assert es_query.source.calls == [
+            pretend.call(
+                ["latest_version", "name", "normalized_name", "summary"],
+            ),
+        ]
 
     @pytest.mark.parametrize("page", [None, 1, 5])
     def test_without_a_query(self, monkeypatch, db_request, page):
@@ -478,7 +491,7 @@ class TestSearch:
             params["page"] = page
         db_request.params = params
 
-        es_query = pretend.stub()
+        es_query = pretend.stub(source=lambda *a, **kw: es_query)
         db_request.es = pretend.stub(query=lambda *a, **kw: es_query)
 
         page_obj = pretend.stub(page_count=(page or 1) + 10, item_count=1000)
@@ -495,6 +508,7 @@ class TestSearch:
             "order": params.get("o", ''),
             "applied_filters": [],
             "available_filters": [],
+            "facet_counts": {},
         }
         assert page_cls.calls == [
             pretend.call(es_query, url_maker=url_maker, page=page or 1),
@@ -505,7 +519,7 @@ class TestSearch:
         params = MultiDict({"page": 15})
         db_request.params = params
 
-        es_query = pretend.stub()
+        es_query = pretend.stub(source=lambda *a, **kw: es_query)
         db_request.es = pretend.stub(query=lambda *a, **kw: es_query)
 
         page_obj = pretend.stub(page_count=10, item_count=1000)
@@ -528,7 +542,7 @@ class TestSearch:
         params = MultiDict({"page": "abc"})
         db_request.params = params
 
-        es_query = pretend.stub()
+        es_query = pretend.stub(source=lambda *a, **kw: es_query)
         db_request.es = pretend.stub(query=lambda *a, **kw: es_query)
 
         page_obj = pretend.stub(page_count=10, item_count=1000)
@@ -0,0 +1,173 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pretend
+import pytest
+import redis
+
+from warehouse.utils.cache import TTLCache, has_changes
+
+
+@pytest.fixture
+def fakeredis():
+    import fakeredis
+    _fakeredis = fakeredis.FakeStrictRedis()
+    yield _fakeredis
+    _fakeredis.flushall()
+
+
+class CountingCache(TTLCache):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loads = []
+
+    def load(self, *args, **kwargs):
+        self.loads.append((args, kwargs))
+        return len(self.loads)
+
+
+class TestTTLCache:
+
+    def test_load_not_implemented(self):
+        with pytest.raises(NotImplementedError):
+            TTLCache(10).get()
+
+    def test_caches_until_expired(self):
+        now = [0]
+        cache = CountingCache(10, clock=lambda: now[0])
+
+        assert cache.get("a", b="c") == 1
+        now[0] = 9
+        assert cache.get("a", b="c") == 1
+        now[0] = 10
+        assert cache.get("a", b="c") == 2
+
+        assert cache.loads == [(("a",), {"b": "c"})] * 2
+
+    def test_invalidate(self):
+        cache = CountingCache(10, clock=lambda: 0)
+
+        assert cache.get() == 1
+        cache.invalidate()
+        assert cache.get() == 2
+
+    def test_ignores_redis_without_version_key(self, fakeredis):
+        cache = CountingCache(10, redis_conn=fakeredis)
+        assert cache.redis_conn is None
+
+        cache.get()
+        cache.invalidate()
+
+        assert fakeredis.keys() == []
+
+    def test_invalidates_other_processes(self, fakeredis):
+        class VersionedCache(CountingCache):
+            version_key = "test.version"
+
+        now = [0]
+        ours = VersionedCache(
+            10, redis_conn=fakeredis, check_interval=2, clock=lambda: now[0],
+        )
+        theirs = VersionedCache(
+            10, redis_conn=fakeredis, check_interval=2, clock=lambda: now[0],
+        )
+
+        assert ours.get() == 1
+        assert theirs.get() == 1
+        assert theirs.get() == 1
+
+        ours.invalidate()
+        assert fakeredis.get("test.version") == b"1"
+
+        # We see our own invalidation straight away, but the other process
+        # doesn't notice until it next checks redis.
+        assert ours.get() == 2
+        now[0] = 1
+        assert theirs.get() == 1
+        now[0] = 2
+        assert theirs.get() == 2
+        assert theirs.get() == 2
+        assert ours.get() == 2
+
+    def test_checks_version_between_reads(self):
+        class VersionedCache(CountingCache):
+            version_key = "test.version"
+
+        redis_conn = pretend.stub(
+            get=pretend.call_recorder(lambda key: b"1"),
+        )
+        now = [0]
+        cache = VersionedCache(
+            10, redis_conn=redis_conn, check_interval=2, clock=lambda: now[0],
+        )
+
+        for now[0] in [0, 0.5, 1, 1.5, 2, 3]:
+            assert cache.get() == 1
+
+        assert redis_conn.get.calls == [pretend.call("test.version")] * 2
+
+    def test_redis_down(self):
+        class VersionedCache(CountingCache):
+            version_key = "test.version"
+
+        def raiser(*args, **kwargs):
+            raise redis.exceptions.ConnectionError()
+
+        redis_conn = pretend.stub(get=raiser, incr=raiser)
+        now = [0]
+        cache = VersionedCache(
+            10, redis_conn=redis_conn, clock=lambda: now[0],
+        )
+
+        assert cache.get() == 1
+        assert cache.get() == 1
+        cache.invalidate()
+        assert cache.get() == 2
+        now[0] = 10
+        assert cache.get() == 3
+
+
+class Model:
+    pass
+
+
+class TestHasChanges:
+
+    @pytest.mark.parametrize("attr", ["new", "dirty", "deleted"])
+    def test_changed(self, attr):
+        session = pretend.stub(
+            new=set(), dirty=set(), deleted={object()},
+            is_modified=lambda obj, include_collections: True,
+        )
+        setattr(session, attr, getattr(session, attr) | {Model()})
+
+        assert has_changes(session, Model)
+
+    def test_only_collections_changed(self):
+        session = pretend.stub(
+            new=set(), deleted=set(), dirty={Model()},
+            is_modified=pretend.call_recorder(
+                lambda obj, include_collections: False,
+            ),
+        )
+
+        assert not has_changes(session, Model)
+        assert session.is_modified.calls == [
+            pretend.call(obj, include_collections=False)
+            for obj in session.dirty
+        ]
+
+    def test_other_models(self):
+        session = pretend.stub(new={object()}, dirty=set(), deleted=set())
+
+        assert not has_changes(session, Model)
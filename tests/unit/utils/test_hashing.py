@@ -0,0 +1,84 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import concurrent.futures
+import hashlib
+import io
+
+import pretend
+import pytest
+
+from warehouse.utils import hashing
+
+
+def _expected(data):
+    return {
+        "md5": hashlib.md5(data).hexdigest(),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "blake2_256": hashlib.blake2b(data, digest_size=32).hexdigest(),
+    }
+
+
+class TestMultiHasher:
+
+    @pytest.mark.parametrize("threshold", [0, 1024 * 1024])
+    def test_computes_all_digests(self, threshold):
+        data = b"A fake file." * 10000
+        hasher = hashing.MultiHasher(parallel_threshold=threshold)
+
+        hasher.update(data[:5000])
+        hasher.update(memoryview(data)[5000:])
+
+        assert hasher.hexdigests() == _expected(data)
+
+    def test_subset_of_digests(self):
+        hasher = hashing.MultiHasher(["sha256"])
+        hasher.update(b"foo")
+
+        assert hasher.hexdigests() == {
+            "sha256": hashlib.sha256(b"foo").hexdigest(),
+        }
+
+    def test_uses_executor_for_large_chunks(self):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        executor.submit = pretend.call_recorder(executor.submit)
+        hasher = hashing.MultiHasher(executor=executor, parallel_threshold=4)
+
+        hasher.update(b"abc")
+        assert executor.submit.calls == []
+
+        hasher.update(b"defg")
+        assert len(executor.submit.calls) == 3
+        assert hasher.hexdigests() == _expected(b"abcdefg")
+
+    def test_shared_executor(self, monkeypatch):
+        monkeypatch.setattr(hashing, "_executor", None)
+
+        executor = hashing._get_executor()
+
+        assert isinstance(executor, concurrent.futures.ThreadPoolExecutor)
+        assert hashing._get_executor() is executor
+
+
+def test_iter_chunks():
+    chunks = [
+        bytes(chunk)
+        for chunk in hashing.iter_chunks(io.BytesIO(b"abcdefg"), chunk_size=3)
+    ]
+
+    assert chunks == [b"abc", b"def", b"g"]
+
+
+def test_hash_file():
+    data = b"x" * (3 * 1024 * 1024 + 7)
+
+    assert hashing.hash_file(io.BytesIO(data)) == _expected(data)
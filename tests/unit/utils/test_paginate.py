@@ -15,8 +15,11 @@ import pytest
 
 from webob.multidict import MultiDict
 
+from warehouse.packaging.models import JournalEntry
 from warehouse.utils import paginate
 
+from ...common.db.packaging import JournalEntryFactory
+
 
 class FakeSuggestion:
 
@@ -175,3 +178,119 @@ def test_paginate_url(pyramid_request):
     assert pyramid_request.current_route_path.calls == [
         pretend.call(_query=[("foo", "bar"), ("page", 5)]),
     ]
+
+
+def test_keyset_url(pyramid_request):
+    pyramid_request.GET = MultiDict(pyramid_request.GET)
+    pyramid_request.GET["foo"] = "bar"
+    pyramid_request.GET["before"] = "old"
+
+    url = pretend.stub()
+    pyramid_request.current_route_path = \
+        pretend.call_recorder(lambda _query: url)
+
+    url_maker = paginate.keyset_url_factory(pyramid_request)
+
+    assert url_maker(after="cursor") is url
+    assert pyramid_request.current_route_path.calls == [
+        pretend.call(_query=[("foo", "bar"), ("after", "cursor")]),
+    ]
+
+
+def test_estimate_count(db_session):
+    query = db_session.query(JournalEntry).order_by(JournalEntry.id)
+
+    assert isinstance(paginate.estimate_count(query), int)
+
+
+class TestKeysetPage:
+
+    KEYS = (JournalEntry.submitted_date, JournalEntry.id)
+
+    @pytest.fixture
+    def journals(self, db_session):
+        return sorted(
+            [JournalEntryFactory.create() for _ in range(7)],
+            key=lambda j: (j.submitted_date, j.id),
+            reverse=True,
+        )
+
+    def _page(self, db_session, **kwargs):
+        kwargs.setdefault("url_maker", lambda **cursor: cursor)
+        return paginate.KeysetPage(
+            db_session.query(JournalEntry),
+            keys=self.KEYS,
+            items_per_page=3,
+            **kwargs
+        )
+
+    def test_first_page(self, db_session, journals):
+        page = self._page(db_session)
+
+        assert page == journals[:3]
+        assert page.items == journals[:3]
+        assert not page.has_previous
+        assert page.has_next
+        assert page.previous_url is None
+        assert page.next_url == {"after": page.encode(journals[2])}
+
+    def test_walks_forwards_and_backwards(self, db_session, journals):
+        after = self._page(db_session).next_url["after"]
+        second = self._page(db_session, after=after)
+
+        assert second == journals[3:6]
+        assert second.has_previous and second.has_next
+
+        last = self._page(db_session, **second.next_url)
+
+        assert last == journals[6:]
+        assert last.has_previous
+        assert last.next_url is None
+
+        back = self._page(db_session, **last.previous_url)
+
+        assert back == journals[3:6]
+        assert back.has_previous and back.has_next
+
+        first = self._page(db_session, **back.previous_url)
+
+        assert first == journals[:3]
+        assert not first.has_previous
+        assert first.has_next
+
+    def test_empty(self, db_session):
+        page = self._page(db_session)
+
+        assert page == []
+        assert page.next_url is None
+        assert page.previous_url is None
+
+    def test_item_count_is_estimated(self, db_session, journals,
+                                     monkeypatch):
+        estimate_count = pretend.call_recorder(lambda query: 7)
+        monkeypatch.setattr(paginate, "estimate_count", estimate_count)
+        page = self._page(db_session)
+
+        assert page.item_count == 7
+        assert page.item_count == 7
+        assert len(estimate_count.calls) == 1
+
+    def test_cursor_round_trips(self, db_session, journals):
+        page = self._page(db_session)
+        cursor = page.encode(journals[0])
+
+        assert page.decode(cursor) == [
+            journals[0].submitted_date, journals[0].id,
+        ]
+
+    @pytest.mark.parametrize(
+        "cursor",
+        ["", "not a cursor", "2018-01-01T00:00:00.000000,nope", "1,2"],
+    )
+    def test_invalid_cursor(self, db_session, cursor):
+        with pytest.raises(ValueError):
+            self._page(db_session, after=cursor)
+
+    def test_after_and_before(self, db_session):
+        with pytest.raises(ValueError):
+            self._page(db_session, after="a", before="b")
@@ -45,3 +45,16 @@ def test_can_render_missing_content_type():
 
 def test_renderer_version():
     assert readme.renderer_version() is not None
+
+
+def test_renderer_version_cached():
+    assert readme.renderer_version() is readme.renderer_version()
+
+
+def test_digest():
+    assert readme.digest("raw thing", "text/plain") == \
+        readme.digest("raw thing", "text/plain")
+    assert readme.digest("raw thing", "text/plain") != \
+        readme.digest("raw thing", "text/x-rst")
+    assert readme.digest("raw thing") != readme.digest("other thing")
+    assert readme.digest(None) == readme.digest("")
@@ -0,0 +1,87 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import pretend
+import pytest
+import redis
+
+from warehouse.utils import redis as warehouse_redis
+
+
+@pytest.fixture(autouse=True)
+def clients(monkeypatch):
+    clients = {}
+    monkeypatch.setattr(warehouse_redis, "_clients", clients)
+    return clients
+
+
+def test_returns_client():
+    client = warehouse_redis.get_redis(
+        "redis://localhost:6379/0",
+        max_connections=10,
+        socket_timeout=1.5,
+    )
+
+    assert isinstance(client, redis.StrictRedis)
+    assert client.connection_pool.max_connections == 10
+    assert client.connection_pool.connection_kwargs["socket_timeout"] == 1.5
+
+
+def test_shares_client_for_equivalent_urls(clients):
+    client = warehouse_redis.get_redis("redis://localhost:6379")
+
+    assert warehouse_redis.get_redis("redis://localhost:6379/0") is client
+    assert warehouse_redis.get_redis("redis://localhost:6379", db=0) is client
+    assert len(clients) == 1
+
+
+@pytest.mark.parametrize(
+    ("url", "options"),
+    [
+        ("redis://localhost:6379/1", {}),
+        ("redis://otherhost:6379/0", {}),
+        ("redis://localhost:6379/0", {"max_connections": 5}),
+        ("redis://localhost:6379/0", {"socket_timeout": 1.0}),
+    ],
+)
+def test_separate_clients(url, options, clients):
+    client = warehouse_redis.get_redis("redis://localhost:6379/0")
+
+    assert warehouse_redis.get_redis(url, **options) is not client
+    assert len(clients) == 2
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [None, {}, {"celery.scheduler_url": "null://"}],
+)
+def test_get_configured_redis_unset(settings):
+    registry = pretend.stub(settings=settings)
+
+    assert warehouse_redis.get_configured_redis(registry) is None
+
+
+def test_get_configured_redis(monkeypatch):
+    client = pretend.stub()
+    get_redis = pretend.call_recorder(lambda url, **options: client)
+    monkeypatch.setattr(warehouse_redis, "get_redis", get_redis)
+    registry = pretend.stub(
+        settings={"other.url": "rediss://localhost:6379/1"},
+    )
+
+    assert warehouse_redis.get_configured_redis(
+        registry, "other.url", max_connections=5,
+    ) is client
+    assert get_redis.calls == [
+        pretend.call("rediss://localhost:6379/1", max_connections=5),
+    ]
@@ -28,7 +28,8 @@ from cryptography.hazmat.primitives.serialization import (
     load_pem_private_key, load_pem_public_key,
 )
 
-from warehouse.utils.sns import MessageVerifier, InvalidMessage
+from warehouse.utils import sns
+from warehouse.utils.sns import MessageVerifier, InvalidMessage, PublicKeyCache
 
 
 VALID_SIGNATURE = object()
@@ -102,6 +103,75 @@ def sns_certificate(sns_privatekey, sns_publickey):
     return cert.public_bytes(Encoding.PEM)
 
 
+@pytest.fixture(autouse=True)
+def clear_pubkey_cache():
+    sns._pubkey_cache.clear()
+    yield
+    sns._pubkey_cache.clear()
+
+
+class TestPublicKeyCache:
+
+    def test_caches(self):
+        load = pretend.call_recorder(lambda url: "key for " + url)
+        cache = PublicKeyCache()
+
+        assert cache.get("https://a/", load) == "key for https://a/"
+        assert cache.get("https://a/", load) == "key for https://a/"
+        assert cache.get("https://b/", load) == "key for https://b/"
+        assert load.calls == [
+            pretend.call("https://a/"),
+            pretend.call("https://b/"),
+        ]
+
+    def test_expires(self):
+        now = [0]
+        load = pretend.call_recorder(lambda url: object())
+        cache = PublicKeyCache(ttl=10, clock=lambda: now[0])
+
+        first = cache.get("https://a/", load)
+        now[0] = 9
+        assert cache.get("https://a/", load) is first
+        now[0] = 10
+        assert cache.get("https://a/", load) is not first
+        assert len(load.calls) == 2
+
+    def test_evicts_least_recently_used(self):
+        load = pretend.call_recorder(lambda url: url)
+        cache = PublicKeyCache(maxsize=2)
+
+        cache.get("https://a/", load)
+        cache.get("https://b/", load)
+        cache.get("https://a/", load)
+        cache.get("https://c/", load)
+        cache.get("https://a/", load)
+        cache.get("https://b/", load)
+
+        assert load.calls == [
+            pretend.call("https://a/"),
+            pretend.call("https://b/"),
+            pretend.call("https://c/"),
+            pretend.call("https://b/"),
+        ]
+
+    def test_does_not_cache_errors(self):
+        cache = PublicKeyCache()
+
+        with pytest.raises(ValueError):
+            cache.get("https://a/", pretend.raiser(ValueError))
+        assert cache.get("https://a/", lambda url: "key") == "key"
+
+    def test_clear(self):
+        load = pretend.call_recorder(lambda url: url)
+        cache = PublicKeyCache()
+
+        cache.get("https://a/", load)
+        cache.clear()
+        cache.get("https://a/", load)
+
+        assert len(load.calls) == 2
+
+
 class TestMessageVerifier:
 
     @pytest.mark.parametrize(
@@ -315,6 +385,58 @@ class TestMessageVerifier:
 
         verifier.verify(data)
 
+    def test_fetches_certificate_once(self, sns_certificate, sns_privatekey):
+        # A stand in for the host that serves the signing certificates, which
+        # should only be asked for each certificate once, no matter how many
+        # verifiers there are.
+        response = pretend.stub(
+            raise_for_status=lambda: None,
+            content=sns_certificate,
+        )
+        session = pretend.stub(get=pretend.call_recorder(lambda url: response))
+        private_key = load_pem_private_key(
+            sns_privatekey,
+            password=None,
+            backend=default_backend(),
+        )
+
+        for message_id in ["1", "2", "3"]:
+            verifier = MessageVerifier(topics=["valid topic"], session=session)
+            data = {
+                "SignatureVersion": "1",
+                "SigningCertURL":
+                    "https://sns.us-west-2.amazonaws.com/cert.pem",
+                "Type": "Notification",
+                "Message": "This is My Message",
+                "MessageId": message_id,
+                "Timestamp": (datetime.datetime.utcnow()
+                              .strftime("%Y-%m-%dT%H:%M:%S.%fZ")),
+                "TopicArn": "valid topic",
+            }
+            data["Signature"] = base64.b64encode(
+                private_key.sign(
+                    verifier._get_data_to_sign(data),
+                    PKCS1v15(),
+                    hashes.SHA1(),
+                )
+            )
+            verifier.verify(data)
+
+        assert session.get.calls == [
+            pretend.call("https://sns.us-west-2.amazonaws.com/cert.pem"),
+        ]
+
+    def test_uses_given_cache(self):
+        cache = pretend.stub(get=lambda url, load: "the key")
+        verifier = MessageVerifier(
+            topics=[], session=pretend.stub(), pubkey_cache=cache,
+        )
+
+        assert verifier.pubkey_cache is cache
+        assert verifier._get_pubkey(
+            "https://sns.us-west-2.amazonaws.com/cert.pem"
+        ) == "the key"
+
     @pytest.mark.parametrize(
         ("data", "expected"),
         [
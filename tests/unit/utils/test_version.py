@@ -0,0 +1,56 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+
+import packaging.version
+import pytest
+
+from warehouse.utils.version import sort_key
+
+
+VERSIONS = [
+    "1.0.dev456", "1.0a1", "1.0a2.dev456", "1.0a12.dev456", "1.0a12",
+    "1.0b1.dev456", "1.0b2", "1.0b2.post345.dev456", "1.0b2.post345",
+    "1.0rc1.dev456", "1.0rc1", "1.0", "1.0.0", "1.0+abc.5", "1.0+abc.7",
+    "1.0+5", "1.0.post456.dev34", "1.0.post456", "1.0.15", "1.1.dev1",
+    "1.10", "2", "256.0", "1!0.1", "1!1.0.post1", "2.0+local.version",
+    "2.0+1.2.3", "2.0+1.2.3.4",
+]
+
+
+@pytest.mark.parametrize(
+    ("left", "right"),
+    itertools.combinations(VERSIONS, 2),
+)
+def test_sorts_like_packaging(left, right):
+    parsed_left = packaging.version.Version(left)
+    parsed_right = packaging.version.Version(right)
+
+    assert (sort_key(left) < sort_key(right)) == (parsed_left < parsed_right)
+    assert (sort_key(left) == sort_key(right)) == \
+        (parsed_left == parsed_right)
+
+
+@pytest.mark.parametrize(
+    ("lower", "higher"),
+    [
+        ("foo", "0.1"),
+        ("abc", "foo"),
+        ("1.0.dev.a1", "1.0.dev.a2"),
+        ("1.0-pre1", "1.0-1"),
+        ("1.0-dev", "1.0-pre1"),
+        ("2.0.x", "2.1.x"),
+    ],
+)
+def test_legacy_versions(lower, higher):
+    assert sort_key(lower) < sort_key(higher)
@@ -10,9 +10,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+
 from sqlalchemy import Column, Boolean, Text, sql
 
 from warehouse import db
+from warehouse.utils.cache import TTLCache, has_changes
+from warehouse.utils.redis import get_redis
+
+
+# How long, in seconds, a process will go without checking the database for
+# changes to the flags made by other processes, if redis can't tell it about
+# them any sooner.
+FLAG_CACHE_TTL = 30
 
 
 class AdminFlag(db.ModelBase):
@@ -25,21 +35,86 @@ class AdminFlag(db.ModelBase):
     notify = Column(Boolean, nullable=False, server_default=sql.false())
 
 
+FlagState = collections.namedtuple(
+    "FlagState",
+    ["id", "description", "enabled", "notify"],
+)
+
+
+class FlagCache(TTLCache):
+    """
+    A process local snapshot of every AdminFlag, which is reloaded from the
+    database once it is older than ``ttl`` seconds or has been invalidated,
+    here or (given a redis connection) in any other process.
+    """
+
+    version_key = "warehouse.admin.flags.version"
+
+    def __init__(self, ttl=FLAG_CACHE_TTL, **kwargs):
+        super().__init__(ttl, **kwargs)
+
+    def load(self, session):
+        return {
+            flag.id: FlagState(
+                flag.id, flag.description, flag.enabled, flag.notify,
+            )
+            for flag in session.query(AdminFlag).all()
+        }
+
+
+def get_flag(registry, session, flag_name):
+    cache = registry.get("warehouse.admin.flags.cache")
+    if cache is None:
+        return session.query(AdminFlag).get(flag_name)
+    return cache.get(session).get(flag_name)
+
+
+@db.listens_for(db.Session, "after_flush")
+def store_flag_changes(config, session, flush_context):
+    if has_changes(session, AdminFlag):
+        session.info["warehouse.admin.flags.changed"] = True
+
+
+@db.listens_for(db.Session, "after_commit")
+def invalidate_flag_cache(config, session):
+    if session.info.pop("warehouse.admin.flags.changed", False):
+        cache = config.registry.get("warehouse.admin.flags.cache")
+        if cache is not None:
+            cache.invalidate()
+
+
 class Flags:
     def __init__(self, request):
         self.request = request
 
     def notifications(self):
-        return (
-            self.request.db.query(AdminFlag)
-            .filter(AdminFlag.enabled.is_(True), AdminFlag.notify.is_(True))
-            .all()
-        )
+        cache = self.request.registry.get("warehouse.admin.flags.cache")
+        if cache is None:
+            return (
+                self.request.db.query(AdminFlag)
+                .filter(
+                    AdminFlag.enabled.is_(True),
+                    AdminFlag.notify.is_(True),
+                )
+                .all()
+            )
+
+        return [
+            flag
+            for _, flag in sorted(cache.get(self.request.db).items())
+            if flag.enabled and flag.notify
+        ]
 
     def enabled(self, flag_name):
-        flag = self.request.db.query(AdminFlag).get(flag_name)
+        flag = get_flag(self.request.registry, self.request.db, flag_name)
         return flag.enabled if flag else False
 
 
 def includeme(config):
+    # Flags are toggled from the admin, in some other process than most of the
+    # ones reading them, so share invalidations through redis when we can.
+    url = config.get_settings().get("celery.scheduler_url")
+    config.registry["warehouse.admin.flags.cache"] = FlagCache(
+        redis_conn=get_redis(url) if url is not None else None,
+    )
     config.add_request_method(Flags, name='flags', reify=True)
@@ -12,13 +12,12 @@
 
 import shlex
 
-from paginate_sqlalchemy import SqlalchemyOrmPage as SQLAlchemyORMPage
 from pyramid.httpexceptions import HTTPBadRequest
 from pyramid.view import view_config
 from sqlalchemy import and_
 
 from warehouse.packaging.models import JournalEntry
-from warehouse.utils.paginate import paginate_url_factory
+from warehouse.utils.paginate import KeysetPage, keyset_url_factory
 
 
 @view_config(
@@ -30,17 +29,7 @@ from warehouse.utils.paginate import paginate_url_factory
 def journals_list(request):
     q = request.params.get("q")
 
-    try:
-        page_num = int(request.params.get("page", 1))
-    except ValueError:
-        raise HTTPBadRequest("'page' must be an integer.") from None
-
-    journals_query = (
-        request.db.query(JournalEntry)
-                  .order_by(
-                      JournalEntry.submitted_date.desc(),
-                      JournalEntry.id.desc())
-    )
+    journals_query = request.db.query(JournalEntry)
 
     if q:
         terms = shlex.split(q)
@@ -62,11 +51,16 @@ def journals_list(request):
 
         journals_query = journals_query.filter(and_(*filters))
 
-    journals = SQLAlchemyORMPage(
-        journals_query,
-        page=page_num,
-        items_per_page=25,
-        url_maker=paginate_url_factory(request),
-    )
+    try:
+        journals = KeysetPage(
+            journals_query,
+            keys=(JournalEntry.submitted_date, JournalEntry.id),
+            after=request.params.get("after"),
+            before=request.params.get("before"),
+            items_per_page=25,
+            url_maker=keyset_url_factory(request),
+        )
+    except ValueError:
+        raise HTTPBadRequest("Invalid page cursor.") from None
 
     return {"journals": journals, "query": q}
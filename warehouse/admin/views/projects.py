@@ -23,7 +23,11 @@ from sqlalchemy import or_
 
 from warehouse.accounts.models import User
 from warehouse.packaging.models import Project, Release, Role, JournalEntry
-from warehouse.utils.paginate import paginate_url_factory
+from warehouse.utils.paginate import (
+    KeysetPage,
+    keyset_url_factory,
+    paginate_url_factory,
+)
 from warehouse.utils.project import confirm_project, remove_project
 from warehouse.forklift.legacy import MAX_FILESIZE
 
@@ -204,16 +208,8 @@ def journals_list(project, request):
             ),
         )
 
-    try:
-        page_num = int(request.params.get("page", 1))
-    except ValueError:
-        raise HTTPBadRequest("'page' must be an integer.") from None
-
     journals_query = (request.db.query(JournalEntry)
-                      .filter(JournalEntry.name == project.name)
-                      .order_by(
-                          JournalEntry.submitted_date.desc(),
-                          JournalEntry.id.desc()))
+                      .filter(JournalEntry.name == project.name))
 
     if q:
         terms = shlex.split(q)
@@ -227,12 +223,17 @@ def journals_list(project, request):
 
         journals_query = journals_query.filter(or_(*filters))
 
-    journals = SQLAlchemyORMPage(
-        journals_query,
-        page=page_num,
-        items_per_page=25,
-        url_maker=paginate_url_factory(request),
-    )
+    try:
+        journals = KeysetPage(
+            journals_query,
+            keys=(JournalEntry.submitted_date, JournalEntry.id),
+            after=request.params.get("after"),
+            before=request.params.get("before"),
+            items_per_page=25,
+            url_maker=keyset_url_factory(request),
+        )
+    except ValueError:
+        raise HTTPBadRequest("Invalid page cursor.") from None
 
     return {"journals": journals, "project": project, "query": q}
 
@@ -20,6 +20,10 @@ from warehouse import tasks
 from warehouse.cache.origin.interfaces import IOriginCache
 
 
+# The most surrogate keys that Fastly will purge in a single API request.
+PURGE_BATCH_SIZE = 256
+
+
 class UnsuccessfulPurge(Exception):
     pass
 
@@ -36,6 +40,28 @@ def purge_key(task, request, key):
         raise task.retry(exc=exc)
 
 
+@tasks.task(bind=True, ignore_result=True, acks_late=True)
+def purge_keys(task, request, keys):
+    cacher = request.find_service(IOriginCache)
+    failed, error = [], None
+    for i in range(0, len(keys), PURGE_BATCH_SIZE):
+        batch = keys[i:i + PURGE_BATCH_SIZE]
+        request.log.info('Purging %s', " ".join(batch))
+        try:
+            cacher.purge_keys(batch)
+        except (requests.ConnectionError, requests.HTTPError,
+                requests.Timeout, UnsuccessfulPurge) as exc:
+            request.log.error(
+                'Error purging %s: %s', " ".join(batch), str(exc),
+            )
+            failed.extend(batch)
+            error = exc
+
+    # Only retry the batches that failed, the rest have already been purged.
+    if failed:
+        raise task.retry(args=(failed,), exc=error)
+
+
 @implementer(IOriginCache)
 class FastlyCache:
 
@@ -51,7 +77,7 @@ class FastlyCache:
         return cls(
             api_key=request.registry.settings["origin_cache.api_key"],
             service_id=request.registry.settings["origin_cache.service_id"],
-            purger=request.task(purge_key).delay,
+            purger=request.task(purge_keys).delay,
         )
 
     def cache(self, keys, request, response, *, seconds=None,
@@ -79,8 +105,9 @@ class FastlyCache:
             response.headers["Surrogate-Control"] = ", ".join(values)
 
     def purge(self, keys):
-        for key in keys:
-            self._purger(key)
+        keys = sorted(keys)
+        if keys:
+            self._purger(keys)
 
     def purge_key(self, key):
         path = "/service/{service_id}/purge/{key}".format(
@@ -101,3 +128,26 @@ class FastlyCache:
             raise UnsuccessfulPurge(
                 "Could not successfully purge {!r}".format(key)
             )
+
+    def purge_keys(self, keys):
+        path = "/service/{service_id}/purge".format(
+            service_id=self.service_id,
+        )
+        url = urllib.parse.urljoin(self._api_domain, path)
+        headers = {
+            "Accept": "application/json",
+            "Fastly-Key": self.api_key,
+            "Fastly-Soft-Purge": "1",
+            "Surrogate-Key": " ".join(keys),
+        }
+
+        resp = requests.post(url, headers=headers)
+        resp.raise_for_status()
+
+        # Fastly responds with a mapping of each key it purged to the ID of
+        # that purge, so anything missing from it wasn't purged.
+        missing = set(keys) - set(resp.json())
+        if missing:
+            raise UnsuccessfulPurge(
+                "Could not successfully purge {!r}".format(sorted(missing))
+            )
@@ -0,0 +1,110 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+
+from sqlalchemy.orm import make_transient_to_detached
+
+from warehouse import db
+from warehouse.classifiers.models import Classifier
+from warehouse.utils.cache import TTLCache, has_changes
+
+
+# How long, in seconds, a process will go without checking the database for
+# classifiers that have been added or deprecated by other processes, if redis
+# can't tell it about them any sooner.
+CLASSIFIER_CACHE_TTL = 60
+
+
+ClassifierState = collections.namedtuple(
+    "ClassifierState",
+    ["id", "classifier", "deprecated"],
+)
+
+
+class Classifiers:
+    """
+    An immutable snapshot of every trove classifier, keyed by name.
+    """
+
+    def __init__(self, classifiers):
+        self.by_name = {c.classifier: c for c in classifiers}
+        self.names = frozenset(self.by_name)
+        self.deprecated = frozenset(
+            c.classifier for c in classifiers if c.deprecated
+        )
+
+    def attach(self, session, names):
+        """
+        Return the Classifier for each of the given names, attached to the
+        given session without querying the database for them.
+        """
+        attached = []
+        for name in sorted(set(names)):
+            state = self.by_name[name]
+            classifier = Classifier(
+                id=state.id,
+                classifier=state.classifier,
+                deprecated=state.deprecated,
+            )
+            make_transient_to_detached(classifier)
+            attached.append(session.merge(classifier, load=False))
+        return attached
+
+
+class ClassifierCache(TTLCache):
+    """
+    A process local snapshot of every Classifier, which is reloaded from the
+    database once it is older than ``ttl`` seconds or has been invalidated,
+    here or (given a redis connection) in any other process.
+    """
+
+    version_key = "warehouse.classifiers.version"
+
+    def __init__(self, ttl=CLASSIFIER_CACHE_TTL, **kwargs):
+        super().__init__(ttl, **kwargs)
+
+    def load(self, session):
+        return load_classifiers(session)
+
+
+def load_classifiers(session):
+    return Classifiers([
+        ClassifierState(*row)
+        for row in (
+            session.query(
+                Classifier.id, Classifier.classifier, Classifier.deprecated,
+            )
+            .all()
+        )
+    ])
+
+
+def get_classifiers(request):
+    cache = request.registry.get("warehouse.classifiers.cache")
+    if cache is None:
+        return load_classifiers(request.db)
+    return cache.get(request.db)
+
+
+@db.listens_for(db.Session, "after_flush")
+def store_classifier_changes(config, session, flush_context):
+    if has_changes(session, Classifier):
+        session.info["warehouse.classifiers.changed"] = True
+
+
+@db.listens_for(db.Session, "after_commit")
+def invalidate_classifier_cache(config, session):
+    if session.info.pop("warehouse.classifiers.changed", False):
+        cache = config.registry.get("warehouse.classifiers.cache")
+        if cache is not None:
+            cache.invalidate()
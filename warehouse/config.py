@@ -22,6 +22,7 @@ from pyramid.config import Configurator as _Configurator
 from pyramid.httpexceptions import HTTPBadRequest
 from pyramid.response import Response
 from pyramid.security import Allow
+from pyramid.settings import asbool
 from pyramid.tweens import EXCVIEW
 from pyramid_rpc.xmlrpc import XMLRPCRenderer
 
@@ -211,6 +212,24 @@ def configure(settings=None):
     maybe_set(settings, "token.password.secret", "TOKEN_PASSWORD_SECRET")
     maybe_set(settings, "token.email.secret", "TOKEN_EMAIL_SECRET")
     maybe_set(settings, "warehouse.xmlrpc.cache.url", "REDIS_URL")
+    maybe_set(
+        settings,
+        "warehouse.xmlrpc.cache.max_connections",
+        "XMLRPC_CACHE_MAX_CONNECTIONS",
+        coercer=int,
+    )
+    maybe_set(
+        settings,
+        "warehouse.xmlrpc.cache.socket_timeout",
+        "XMLRPC_CACHE_SOCKET_TIMEOUT",
+        coercer=float,
+    )
+    maybe_set(
+        settings,
+        "warehouse.xmlrpc.cache.socket_connect_timeout",
+        "XMLRPC_CACHE_SOCKET_CONNECT_TIMEOUT",
+        coercer=float,
+    )
     maybe_set(
         settings,
         "token.password.max_age",
@@ -230,8 +249,16 @@ def configure(settings=None):
         coercer=int,
         default=21600,  # 6 hours
     )
+    maybe_set(
+        settings,
+        "mail.batch_notifications",
+        "MAIL_BATCH_NOTIFICATIONS",
+        coercer=asbool,
+    )
+    maybe_set(settings, "mail.max_send_rate", "MAIL_MAX_SEND_RATE", int)
     maybe_set_compound(settings, "files", "backend", "FILES_BACKEND")
     maybe_set_compound(settings, "docs", "backend", "DOCS_BACKEND")
+    maybe_set_compound(settings, "sitemap", "backend", "SITEMAP_BACKEND")
     maybe_set_compound(settings, "origin_cache", "backend", "ORIGIN_CACHE")
     maybe_set_compound(settings, "mail", "backend", "MAIL_BACKEND")
 
@@ -377,9 +404,6 @@ def configure(settings=None):
     # Register support for services
     config.include("pyramid_services")
 
-    # Register our XMLRPC cache
-    config.include(".legacy.api.xmlrpc.cache")
-
     # Register support for XMLRPC and override it's renderer to allow
     # specifying custom dumps arguments.
     config.include("pyramid_rpc.xmlrpc")
@@ -403,6 +427,14 @@ def configure(settings=None):
     # Register the support for Celery Tasks
     config.include(".tasks")
 
+    # Register our XMLRPC cache, this needs to come after our Celery support
+    # because it registers a periodic task.
+    config.include(".legacy.api.xmlrpc.cache")
+
+    # Register the periodic task that keeps our materialized simple pages up to
+    # date, this also needs to come after our Celery support.
+    config.include(".legacy.api.simple")
+
     # Register support for our rate limiting mechanisms
     config.include(".rate_limiting")
 
@@ -435,6 +467,9 @@ def configure(settings=None):
     # Allow the packaging app to register any services it has.
     config.include(".packaging")
 
+    # Render our sitemaps ahead of time.
+    config.include(".sitemap")
+
     # Configure redirection support
     config.include(".redirects")
 
@@ -167,8 +167,8 @@ def _create_session(request):
         connection.close()
 
     # Check if we're in read-only mode
-    from warehouse.admin.flags import AdminFlag
-    flag = session.query(AdminFlag).get('read-only')
+    from warehouse.admin.flags import get_flag
+    flag = get_flag(request.registry, session, 'read-only')
     if flag and flag.enabled and not request.user.is_superuser:
         request.tm.doom()
 
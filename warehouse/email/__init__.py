@@ -19,7 +19,18 @@ from pyramid.renderers import render
 from warehouse import tasks
 from warehouse.accounts.interfaces import ITokenService
 from warehouse.email.interfaces import IEmailSender
-from warehouse.email.ses.tasks import cleanup as ses_cleanup
+from warehouse.email.ses.tasks import (
+    cleanup as ses_cleanup,
+    ingest_notifications as ses_ingest_notifications,
+)
+
+
+# How many recipients each send_bulk_email task sends to, and how many times
+# we try to send to each of them. The emails a task has sent are only recorded
+# when it commits, and if it dies first they're all sent again, so each batch
+# is only a few seconds' worth of sending at SES's default rate of 14 a second.
+BULK_EMAIL_BATCH_SIZE = 50
+BULK_EMAIL_MAX_ATTEMPTS = 4
 
 
 def _compute_recipient(user, *, email=None):
@@ -49,6 +60,47 @@ def send_email(task, request, subject, body, *, recipient=None):
         task.retry(exc=exc)
 
 
+@tasks.task(ignore_result=True, acks_late=True)
+def send_bulk_email(request, subject, body, *, recipients, attempt=1):
+    sender = request.find_service(IEmailSender)
+
+    sitename = request.registry.settings["site.name"]
+    full_subject = f"[{sitename}] {subject}"
+
+    failed = sender.send_many(full_subject, body, recipients=recipients)
+    if not failed:
+        return
+
+    # Raising to retry would roll back the records of the emails that were
+    # sent, so instead we let this transaction commit, and send to those we
+    # failed to send to in a new task, so that nobody gets the email twice.
+    if attempt >= BULK_EMAIL_MAX_ATTEMPTS:
+        request.registry.datadog.increment(
+            "warehouse.email.bulk.failed",
+            len(failed),
+        )
+        return
+
+    request.task(send_bulk_email).delay(
+        subject,
+        body,
+        recipients=failed,
+        attempt=attempt + 1,
+    )
+
+
+def _send_bulk_email(request, subject, body, recipients):
+    # Rather than one task per recipient, each task sends the same email to
+    # a batch of them.
+    recipients = list(recipients)
+    for start in range(0, len(recipients), BULK_EMAIL_BATCH_SIZE):
+        request.task(send_bulk_email).delay(
+            subject,
+            body,
+            recipients=recipients[start:start + BULK_EMAIL_BATCH_SIZE],
+        )
+
+
 def send_password_reset_email(request, user):
     token_service = request.find_service(ITokenService, name='password')
     token = token_service.dumps({
@@ -190,12 +242,12 @@ def send_collaborator_added_email(request, user, submitter, project_name, role,
         'email/collaborator-added.body.txt', fields, request=request
     )
 
-    for recipient in email_recipients:
-        request.task(send_email).delay(
-            subject,
-            body,
-            recipient=_compute_recipient(recipient),
-        )
+    _send_bulk_email(
+        request,
+        subject,
+        body,
+        [_compute_recipient(recipient) for recipient in email_recipients],
+    )
 
     return fields
 
@@ -239,3 +291,7 @@ def includeme(config):
     # or not, because even if we stop using SES, we'll want to remove any
     # emails that had been sent, and the cost of doing this is very low.
     config.add_periodic_task(crontab(minute=0, hour=0), ses_cleanup)
+
+    # Add a periodic task to process any SES notifications that have been
+    # queued by the SES hook, rather than processed as they came in.
+    config.add_periodic_task(crontab(), ses_ingest_notifications)
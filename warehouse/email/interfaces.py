@@ -25,3 +25,9 @@ class IEmailSender(Interface):
         """
         Sends an email with the given subject and body to the given recipient.
         """
+
+    def send_many(subject, body, *, recipients):
+        """
+        Sends an email with the given subject and body to each of the given
+        recipients, returning the list of those that it could not be sent to.
+        """
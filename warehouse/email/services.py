@@ -10,15 +10,33 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import concurrent.futures
+import time
+
 from email.headerregistry import Address
 from email.utils import parseaddr
 
+import redis
+
 from pyramid_mailer import get_mailer
 from pyramid_mailer.message import Message
 from zope.interface import implementer
 
 from warehouse.email.interfaces import IEmailSender
 from warehouse.email.ses.models import EmailMessage
+from warehouse.utils.redis import get_redis
+
+
+# SES limits how many emails we can send each second, this is its default
+# limit, for when we haven't been told what ours is.
+DEFAULT_MAX_SEND_RATE = 14
+
+# The most emails that SESEmailSender.send_many will have in flight at once.
+MAX_CONCURRENT_SENDS = 10
+
+# The prefix of the keys in redis that count how many emails have been sent
+# in each second, by every process sending them.
+SEND_RATE_KEY = "warehouse.email.ses.sent"
 
 
 def _format_sender(sitename, sender):
@@ -49,14 +67,31 @@ class SMTPEmailSender:
         )
         self.mailer.send_immediately(message)
 
+    def send_many(self, subject, body, *, recipients):
+        failed = []
+        for recipient in recipients:
+            try:
+                self.send(subject, body, recipient=recipient)
+            except Exception:
+                failed.append(recipient)
+        return failed
+
 
 @implementer(IEmailSender)
 class SESEmailSender:
 
-    def __init__(self, client, *, sender=None, db):
+    def __init__(self, client, *, sender=None, db,
+                 max_send_rate=DEFAULT_MAX_SEND_RATE, redis_conn=None,
+                 clock=time.time, sleep=time.sleep):
         self._client = client
         self._sender = sender
         self._db = db
+        self._max_send_rate = max_send_rate
+        self._redis = redis_conn
+        self._clock = clock
+        self._sleep = sleep
+        self._second = None
+        self._used = 0
 
     @classmethod
     def create_service(cls, context, request):
@@ -66,6 +101,8 @@ class SESEmailSender:
 
         aws_session = request.find_service(name="aws.session")
 
+        redis_url = request.registry.settings.get("celery.scheduler_url")
+
         return cls(
             aws_session.client(
                 "ses",
@@ -73,10 +110,16 @@ class SESEmailSender:
             ),
             sender=sender,
             db=request.db,
+            max_send_rate=int(
+                request.registry.settings.get(
+                    "mail.max_send_rate", DEFAULT_MAX_SEND_RATE,
+                )
+            ),
+            redis_conn=get_redis(redis_url) if redis_url else None,
         )
 
-    def send(self, subject, body, *, recipient):
-        resp = self._client.send_email(
+    def _send_email(self, subject, body, recipient):
+        return self._client.send_email(
             Source=self._sender,
             Destination={"ToAddresses": [recipient]},
             Message={
@@ -87,6 +130,9 @@ class SESEmailSender:
             },
         )
 
+    def send(self, subject, body, *, recipient):
+        resp = self._send_email(subject, body, recipient)
+
         self._db.add(
             EmailMessage(
                 message_id=resp["MessageId"],
@@ -95,3 +141,97 @@ class SESEmailSender:
                 subject=subject,
             ),
         )
+
+    def _reserve(self, second, count):
+        # Record that we want to send count more emails in the given second,
+        # and return how many have been asked for in it altogether. SES limits
+        # the rate for our whole account, so this is counted in redis, across
+        # every process that's sending email, when we can.
+        if self._redis is not None:
+            key = f"{SEND_RATE_KEY}:{second}"
+            try:
+                pipe = self._redis.pipeline()
+                pipe.incrby(key, count)
+                pipe.expire(key, 2)
+                used, _ = pipe.execute()
+                return used
+            except redis.exceptions.RedisError:
+                pass
+
+        if self._second != second:
+            self._second, self._used = second, 0
+        self._used += count
+        return self._used
+
+    def _release(self, second, count):
+        # Give back count of the emails reserved in the given second, because
+        # we aren't going to send them after all, so that whoever else is
+        # sending email can.
+        if self._redis is not None:
+            try:
+                self._redis.incrby(f"{SEND_RATE_KEY}:{second}", -count)
+                return
+            except redis.exceptions.RedisError:
+                pass
+
+        if self._second == second:
+            self._used -= count
+
+    def _acquire(self, wanted):
+        # Wait until we can send at least one email in the current second,
+        # and return how many of the ones we want to send we can.
+        rate = max(self._max_send_rate, 1)
+        wanted = min(wanted, rate)
+        while True:
+            now = self._clock()
+            second = int(now)
+            used = self._reserve(second, wanted)
+            allowed = max(min(wanted, rate - (used - wanted)), 0)
+            if allowed < wanted:
+                self._release(second, wanted - allowed)
+            if allowed > 0:
+                return allowed
+            self._sleep(second + 1 - now)
+
+    def send_many(self, subject, body, *, recipients):
+        sent, failed = [], []
+
+        # We send as many emails at once as our maximum send rate allows, and
+        # then wait for the next second before sending any more, so that SES
+        # doesn't start refusing them.
+        pending = list(recipients)
+        workers = min(max(self._max_send_rate, 1), MAX_CONCURRENT_SENDS)
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            while pending:
+                allowed = self._acquire(len(pending))
+                batch, pending = pending[:allowed], pending[allowed:]
+
+                futures = [
+                    (
+                        recipient,
+                        executor.submit(
+                            self._send_email, subject, body, recipient,
+                        ),
+                    )
+                    for recipient in batch
+                ]
+                for recipient, future in futures:
+                    try:
+                        sent.append((recipient, future.result()))
+                    except Exception:
+                        failed.append(recipient)
+
+        if sent:
+            self._db.execute(
+                EmailMessage.__table__.insert().values([
+                    {
+                        "message_id": resp["MessageId"],
+                        "from": parseaddr(self._sender)[1],
+                        "to": parseaddr(recipient)[1],
+                        "subject": subject,
+                    }
+                    for recipient, resp in sent
+                ])
+            )
+
+        return failed
@@ -15,7 +15,9 @@ import enum
 import automat
 
 from sqlalchemy import sql, orm
-from sqlalchemy import Boolean, Column, Enum, ForeignKey, DateTime, Text
+from sqlalchemy import (
+    Boolean, Column, Enum, ForeignKey, DateTime, Index, Text,
+)
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.orm.session import object_session
@@ -40,8 +42,9 @@ class EmailStatus:
 
     _machine = automat.MethodicalMachine()
 
-    def __init__(self, email_message):
+    def __init__(self, email_message, *, addresses=None):
         self._email_message = email_message
+        self._addresses = addresses
 
     # States
 
@@ -170,8 +173,8 @@ class EmailStatus:
         return self._email_message
 
     @classmethod
-    def load(cls, email_message):
-        self = cls(email_message)
+    def load(cls, email_message, *, addresses=None):
+        self = cls(email_message, addresses=addresses)
         self._restore(email_message.status.value)
         return self
 
@@ -182,10 +185,15 @@ class EmailStatus:
         if self._email_message.missing:
             return
 
-        db = object_session(self._email_message)
-        email = (db.query(EmailAddress)
-                   .filter(EmailAddress.email == self._email_message.to)
-                   .first())
+        # When processing many events at once, the addresses they're for can
+        # be looked up ahead of time, rather than one at a time here.
+        if self._addresses is not None:
+            email = self._addresses.get(self._email_message.to)
+        else:
+            db = object_session(self._email_message)
+            email = (db.query(EmailAddress)
+                       .filter(EmailAddress.email == self._email_message.to)
+                       .first())
 
         # If our email is None, then we'll mark our log so that when we're
         # viewing the log, we can tell that it wasn't recorded.
@@ -198,6 +206,9 @@ class EmailStatus:
 class EmailMessage(db.Model):
 
     __tablename__ = "ses_emails"
+    __table_args__ = (
+        Index("ses_emails_status_created_idx", "status", "created"),
+    )
 
     created = Column(DateTime, nullable=False, server_default=sql.func.now())
     status = Column(
@@ -239,6 +250,7 @@ class Event(db.Model):
         UUID(as_uuid=True),
         ForeignKey("ses_emails.id", deferrable=True, initially="DEFERRED"),
         nullable=False,
+        index=True,
     )
 
     event_id = Column(Text, nullable=False, unique=True, index=True)
@@ -10,32 +10,340 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
 import datetime
+import json
+
+import automat
+import redis
+
+from sqlalchemy import orm
+from sqlalchemy.dialects.postgresql import insert
 
 from warehouse import tasks
-from warehouse.email.ses.models import EmailMessage
+from warehouse.accounts.models import Email as EmailAddress
+from warehouse.email.ses.models import (
+    EmailMessage, EmailStatus, EmailStatuses, Event, EventTypes,
+)
+from warehouse.utils.redis import get_configured_redis
 
 
 CLEANUP_DELIVERED_AFTER = datetime.timedelta(days=14)
 
 CLEANUP_AFTER = datetime.timedelta(days=90)
 
+# How many email messages cleanup deletes in each transaction.
+CLEANUP_BATCH_SIZE = 5000
+
+# The list in redis of notifications from SNS that have been accepted by the
+# SES hook, but not yet processed.
+NOTIFICATIONS_KEY = "warehouse.email.ses.notifications"
+
+# How many notifications process_notifications handles at a time.
+NOTIFICATION_BATCH_SIZE = 500
+
+# How many times process_notifications will put a notification back on the
+# queue because we don't have the email it's for yet, which can happen when
+# SES is quicker to tell us about an email than the sender is to commit it.
+# The queue is ingested every minute, so this gives the sender some minutes.
+UNKNOWN_MESSAGE_MAX_ATTEMPTS = 10
+
+
+def apply_notification(machine, message):
+    """
+    Feed the given SES notification to the state machine of the email that
+    it's for, returning False if it isn't a kind of notification we know.
+    """
+    if message["notificationType"] == "Delivery":
+        machine.deliver()
+    elif (message["notificationType"] == "Bounce" and
+            message["bounce"]["bounceType"] == "Permanent"):
+        machine.bounce()
+    elif message["notificationType"] == "Bounce":
+        machine.soft_bounce()
+    elif message["notificationType"] == "Complaint":
+        machine.complain()
+    else:
+        return False
+    return True
+
+
+def queue_notification(request, data):
+    """
+    Queue the given (already verified) notification for process_notifications,
+    returning False if it couldn't be.
+    """
+    redis_conn = get_configured_redis(request.registry)
+    if redis_conn is None:
+        return False
+
+    try:
+        redis_conn.rpush(NOTIFICATIONS_KEY, json.dumps(data))
+    except redis.exceptions.RedisError:
+        return False
+
+    return True
+
+
+@tasks.task(ignore_result=True, acks_late=True)
+def ingest_notifications(request):
+    """
+    Hand the notifications that have been queued by the SES hook over to
+    process_notifications, a batch at a time.
+    """
+    redis_conn = get_configured_redis(request.registry)
+    if redis_conn is None:
+        return
+
+    while True:
+        pipe = redis_conn.pipeline()
+        pipe.lrange(NOTIFICATIONS_KEY, 0, NOTIFICATION_BATCH_SIZE - 1)
+        pipe.ltrim(NOTIFICATIONS_KEY, NOTIFICATION_BATCH_SIZE, -1)
+        batch, _ = pipe.execute()
+
+        if batch:
+            request.task(process_notifications).delay(
+                [json.loads(item) for item in batch]
+            )
+
+        if len(batch) < NOTIFICATION_BATCH_SIZE:
+            break
+
+
+def _parse_notification(data):
+    # Return the SES message within the given notification, or None if it's
+    # missing anything that process_notifications needs.
+    try:
+        message = json.loads(data["Message"])
+        event_type = EventTypes(message["notificationType"])
+        if not (isinstance(data["MessageId"], str) and
+                isinstance(message["mail"]["messageId"], str) and
+                isinstance(message[event_type.value.lower()], dict)):
+            return None
+        if event_type is EventTypes.Bounce:
+            message["bounce"]["bounceType"]
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    return message
+
+
+@tasks.task(ignore_result=True, acks_late=True)
+def process_notifications(request, notifications):
+    """
+    Record a batch of notifications from SNS, and move the emails that they're
+    for through their states.
+    """
+    # Notifications are queued without being looked at beyond checking that
+    # they came from SNS, so any that we can't make sense of are skipped here,
+    # rather than letting them take the rest of the batch down with them.
+    # SNS can also deliver a notification more than once, so we skip any
+    # that we have already seen, whether in this batch or before it.
+    pending = collections.OrderedDict()
+    for data in notifications:
+        message = _parse_notification(data)
+        if message is None:
+            request.registry.datadog.increment(
+                "warehouse.email.ses.notifications.skipped",
+                tags=["reason:malformed_notification"],
+            )
+            continue
+        pending.setdefault(data["MessageId"], (data, message))
+    if not pending:
+        return
+
+    seen = {
+        event_id
+        for event_id, in (
+            request.db.query(Event.event_id)
+            .filter(Event.event_id.in_(list(pending)))
+        )
+    }
+    messages = [
+        item
+        for event_id, item in pending.items()
+        if event_id not in seen
+    ]
+    if not messages:
+        return
+
+    # Another batch being processed at the same time could have notifications
+    # for some of the same emails, so we lock them (in a consistent order, so
+    # that two batches can't deadlock) to keep either batch from overwriting
+    # the status that the other has moved an email to.
+    emails = {
+        email.message_id: email
+        for email in (
+            request.db.query(EmailMessage)
+            .options(orm.lazyload(EmailMessage.events))
+            .filter(
+                EmailMessage.message_id.in_(
+                    {message["mail"]["messageId"] for _, message in messages}
+                )
+            )
+            .order_by(EmailMessage.id)
+            .with_for_update(of=EmailMessage)
+        )
+    }
+    addresses = {
+        address.email: address
+        for address in (
+            request.db.query(EmailAddress)
+            .filter(
+                EmailAddress.email.in_(
+                    {e.to for e in emails.values() if not e.missing}
+                )
+            )
+        )
+    }
+
+    by_email = collections.OrderedDict()
+    unknown = []
+    for data, message in messages:
+        email = emails.get(message["mail"]["messageId"])
+        if email is None:
+            unknown.append(data)
+            continue
+        by_email.setdefault(email, []).append((data, message))
+
+    # Unlike the SES hook we can't ask SNS to try again later, so we try again
+    # ourselves, by putting these back on the queue, in case the email they're
+    # for hasn't been committed yet.
+    if unknown:
+        _retry_unknown(request, unknown)
+
+    # Each email's notifications are applied in the order that they were
+    # sent to us, and its new status is saved once they all have been.
+    events = []
+    for email, items in by_email.items():
+        machine = EmailStatus.load(email, addresses=addresses)
+        for data, message in sorted(
+                items, key=lambda item: item[0].get("Timestamp", "")):
+            try:
+                applied = apply_notification(machine, message)
+            except automat.NoTransition:
+                applied = False
+
+            if not applied:
+                request.registry.datadog.increment(
+                    "warehouse.email.ses.notifications.skipped",
+                    tags=["reason:invalid_notification"],
+                )
+                continue
+
+            events.append({
+                "email_id": email.id,
+                "event_id": data["MessageId"],
+                "event_type": EventTypes(message["notificationType"]),
+                "data": message[message["notificationType"].lower()],
+            })
+        machine.save()
+
+    # SNS may have delivered the same notification into a batch that's being
+    # processed alongside this one, in which case whichever batch gets there
+    # second skips it rather than failing, and losing, the whole batch.
+    if events:
+        request.db.execute(
+            insert(Event.__table__)
+            .values(events)
+            .on_conflict_do_nothing(index_elements=["event_id"])
+        )
+
+    request.registry.datadog.increment(
+        "warehouse.email.ses.notifications.processed",
+        len(events),
+    )
+
+
+def _retry_unknown(request, notifications):
+    retry = [
+        dict(data, _attempts=data.get("_attempts", 0) + 1)
+        for data in notifications
+        if data.get("_attempts", 0) + 1 < UNKNOWN_MESSAGE_MAX_ATTEMPTS
+    ]
+
+    redis_conn = get_configured_redis(request.registry)
+    if retry and redis_conn is not None:
+        try:
+            redis_conn.rpush(
+                NOTIFICATIONS_KEY, *[json.dumps(data) for data in retry]
+            )
+        except redis.exceptions.RedisError:
+            retry = []
+    else:
+        retry = []
+
+    if retry:
+        request.registry.datadog.increment(
+            "warehouse.email.ses.notifications.retried",
+            len(retry),
+        )
+    if len(notifications) > len(retry):
+        request.registry.datadog.increment(
+            "warehouse.email.ses.notifications.skipped",
+            len(notifications) - len(retry),
+            tags=["reason:unknown_message"],
+        )
+
+
+def _delete_chunk(db, *criteria):
+    # Delete up to a chunk's worth of email messages matching the given
+    # criteria, along with their events, and return how many there were.
+    ids = [
+        id_
+        for id_, in (
+            db.query(EmailMessage.id)
+              .filter(*criteria)
+              .limit(CLEANUP_BATCH_SIZE)
+        )
+    ]
+    if ids:
+        (db.query(Event)
+           .filter(Event.email_id.in_(ids))
+           .delete(synchronize_session=False))
+        (db.query(EmailMessage)
+           .filter(EmailMessage.id.in_(ids))
+           .delete(synchronize_session=False))
+    return len(ids)
+
 
 @tasks.task(ignore_result=True, acks_late=True)
 def cleanup(request):
+    now = datetime.datetime.utcnow()
+
     # Cleanup any email message whose status is Accepted or Delivered.
     # We clean these up quicker than failures because we don't really
     # need them, and this limits the amount of data stored in the
     # database.
-    (request.db.query(EmailMessage)
-               .filter(EmailMessage.status.in_(["Accepted", "Delivered"]))
-               .filter(EmailMessage.created <
-                       (datetime.datetime.utcnow() - CLEANUP_DELIVERED_AFTER))
-               .delete(synchronize_session="fetch"))
+    delivered = _delete_chunk(
+        request.db,
+        EmailMessage.status.in_(
+            [EmailStatuses.Accepted, EmailStatuses.Delivered]
+        ),
+        EmailMessage.created < (now - CLEANUP_DELIVERED_AFTER),
+    )
 
     # Cleanup *all* messages, this is our hard limit after which we
-    # will not continue to save the email message data.
-    (request.db.query(EmailMessage)
-               .filter(EmailMessage.created <
-                       (datetime.datetime.utcnow() - CLEANUP_AFTER))
-               .delete())
+    # will not continue to save the email message data. Listing every
+    # status lets this use the same index on (status, created) as above.
+    expired = _delete_chunk(
+        request.db,
+        EmailMessage.status.in_(list(EmailStatuses)),
+        EmailMessage.created < (now - CLEANUP_AFTER),
+    )
+
+    request.registry.datadog.increment(
+        "warehouse.email.ses.cleanup.deleted",
+        delivered,
+        tags=["reason:delivered"],
+    )
+    request.registry.datadog.increment(
+        "warehouse.email.ses.cleanup.deleted",
+        expired,
+        tags=["reason:expired"],
+    )
+
+    # If there's more to delete, then we leave it to another run of this task,
+    # so that no one transaction deletes too much at once.
+    if CLEANUP_BATCH_SIZE in {delivered, expired}:
+        request.task(cleanup).delay()
@@ -14,6 +14,7 @@ import json
 
 from pyramid.httpexceptions import HTTPBadRequest
 from pyramid.response import Response
+from pyramid.settings import asbool
 from pyramid.view import view_config
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.sql import exists
@@ -21,6 +22,7 @@ from sqlalchemy.sql import exists
 from warehouse.email.ses.models import (
     EmailMessage, EmailStatus, Event, EventTypes,
 )
+from warehouse.email.ses.tasks import apply_notification, queue_notification
 from warehouse.utils import sns
 
 
@@ -81,6 +83,13 @@ def notification(request):
 
     _verify_sns_message(request, data)
 
+    # When we've been configured to, we leave processing the notification
+    # until later, so that a flood of them doesn't tie up the web tier.
+    settings = request.registry.settings or {}
+    if (asbool(settings.get("mail.batch_notifications")) and
+            queue_notification(request, data)):
+        return Response()
+
     event_exists = (
         request.db.query(exists().where(Event.event_id == data["MessageId"]))
                   .scalar())
@@ -101,16 +110,7 @@ def notification(request):
     # Load our state machine from the status in the database, process any
     # transition we have from this event, and then save the result.
     machine = EmailStatus.load(email)
-    if message["notificationType"] == "Delivery":
-        machine.deliver()
-    elif (message["notificationType"] == "Bounce" and
-            message["bounce"]["bounceType"] == "Permanent"):
-        machine.bounce()
-    elif message["notificationType"] == "Bounce":
-        machine.soft_bounce()
-    elif message["notificationType"] == "Complaint":
-        machine.complain()
-    else:
+    if not apply_notification(machine, message):
         raise HTTPBadRequest("Unknown notificationType")
     email = machine.save()
 
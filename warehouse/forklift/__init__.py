@@ -14,6 +14,12 @@
 #       will go away eventually, once we split forklift out into it's own
 #       project.
 
+from celery.schedules import crontab
+
+from warehouse.classifiers.cache import ClassifierCache
+from warehouse.forklift.bloom import build_known_files
+from warehouse.utils.redis import get_redis
+
 
 def _help_url(request, **kwargs):
     warehouse_domain = request.registry.settings.get("warehouse.domain")
@@ -52,6 +58,21 @@ def includeme(config):
     )
     config.add_request_method(_help_url, name="help_url")
 
+    # Keep a snapshot of the trove classifiers around, so that we don't have to
+    # load all of them from the database for every upload. Classifiers are
+    # edited in the admin, not in the processes handling uploads, so share
+    # invalidations through redis when we can.
+    scheduler_url = config.get_settings().get("celery.scheduler_url")
+    config.registry["warehouse.classifiers.cache"] = ClassifierCache(
+        redis_conn=(
+            get_redis(scheduler_url) if scheduler_url is not None else None
+        ),
+    )
+
+    # Build the filter of known files if it's missing, for instance because
+    # redis has lost it.
+    config.add_periodic_task(crontab(minute="*/30"), build_known_files)
+
     if forklift:
         config.add_template_view(
             "forklift.index",
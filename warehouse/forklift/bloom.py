@@ -0,0 +1,170 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+
+import redis
+
+from warehouse import tasks
+from warehouse.packaging.models import File, Filename
+from warehouse.utils.redis import get_configured_redis
+
+
+# The key in redis that holds the bits of the filter of known files.
+KNOWN_FILES_KEY = "warehouse.forklift.known-files"
+
+# With 2 ** 28 bits (32MB) and 7 hashes, the filter gives a false positive
+# rate of around 1% with 25 million items in it, which is comfortably more
+# than the number of filenames and digests that we have.
+KNOWN_FILES_BITS = 2 ** 28
+KNOWN_FILES_HASHES = 7
+
+# How many rows build_known_files reads from the database at a time.
+BUILD_BATCH_SIZE = 10000
+
+
+class BloomFilter:
+    """
+    A Bloom filter, stored as a bitmap in redis, which can say for certain
+    that an item has never been added to it. Several lookups or additions can
+    be made at once, in a single round trip.
+
+    Until it has been marked as ready, the filter is assumed to be missing
+    items and so claims to contain everything. Whether it is ready is kept in
+    a bit just past the end of the filter, so that if the filter is ever lost
+    then so is that.
+    """
+
+    def __init__(self, redis_conn, key, *, size, hashes):
+        self.redis = redis_conn
+        self.key = key
+        self.size = size
+        self.hashes = hashes
+
+    def _offsets(self, item):
+        digest = hashlib.blake2b(item.encode("utf8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big")
+        return [
+            (first + i * second) % self.size for i in range(self.hashes)
+        ]
+
+    def add(self, *items, pipeline=None):
+        pipe = pipeline
+        if pipe is None:
+            pipe = self.redis.pipeline(transaction=False)
+        for item in items:
+            for offset in self._offsets(item):
+                pipe.setbit(self.key, offset, 1)
+        if pipeline is None:
+            pipe.execute()
+
+    def contains_any(self, *items):
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.getbit(self.key, self.size)
+        for item in items:
+            for offset in self._offsets(item):
+                pipe.getbit(self.key, offset)
+        ready, *bits = pipe.execute()
+
+        return not ready or any(
+            all(bits[i:i + self.hashes])
+            for i in range(0, len(bits), self.hashes)
+        )
+
+    def is_ready(self):
+        return bool(self.redis.getbit(self.key, self.size))
+
+    def set_ready(self, ready):
+        self.redis.setbit(self.key, self.size, 1 if ready else 0)
+
+
+def _filename_item(filename):
+    return "filename:" + filename
+
+
+def _digest_item(blake2_256_digest):
+    return "blake2_256:" + blake2_256_digest.lower()
+
+
+def _get_known_files(registry):
+    redis_conn = get_configured_redis(registry)
+    if redis_conn is None:
+        return None
+    return BloomFilter(
+        redis_conn,
+        KNOWN_FILES_KEY,
+        size=KNOWN_FILES_BITS,
+        hashes=KNOWN_FILES_HASHES,
+    )
+
+
+def might_be_known(request, filename, blake2_256_digest):
+    """
+    Return False if no file with the given filename or blake2 digest has ever
+    been uploaded, or True if one might have been.
+    """
+    known_files = _get_known_files(request.registry)
+    if known_files is None:
+        return True
+
+    try:
+        return known_files.contains_any(
+            _filename_item(filename),
+            _digest_item(blake2_256_digest),
+        )
+    except redis.exceptions.RedisError:
+        return True
+
+
+def add_known_file(request, filename, blake2_256_digest):
+    known_files = _get_known_files(request.registry)
+    if known_files is None:
+        return
+
+    try:
+        known_files.add(
+            _filename_item(filename),
+            _digest_item(blake2_256_digest),
+        )
+    except redis.exceptions.RedisError:
+        # A filter that's missing a file can't be trusted anymore, so make
+        # sure it isn't until build_known_files has run again.
+        try:
+            known_files.set_ready(False)
+        except redis.exceptions.RedisError:
+            pass
+
+
+@tasks.task(ignore_result=True, acks_late=True)
+def build_known_files(request):
+    """
+    Add every filename and digest that's ever been uploaded to the filter of
+    known files, if that hasn't been done already.
+    """
+    known_files = _get_known_files(request.registry)
+    if known_files is None or known_files.is_ready():
+        return
+
+    # Files that are uploaded while we're doing this add themselves, so once
+    # we've been through everything in the database the filter is complete.
+    for query, make_item in [
+            (request.db.query(Filename.filename), _filename_item),
+            (request.db.query(File.blake2_256_digest), _digest_item)]:
+        pipe = known_files.redis.pipeline(transaction=False)
+        for i, (value,) in enumerate(query.yield_per(BUILD_BATCH_SIZE), 1):
+            known_files.add(make_item(value), pipeline=pipe)
+            if not i % BUILD_BATCH_SIZE:
+                pipe.execute()
+        pipe.execute()
+
+    known_files.set_ready(True)
@@ -10,8 +10,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
 import email
-import hashlib
 import hmac
 import os.path
 import re
@@ -35,22 +35,30 @@ import wtforms.validators
 from pyramid.httpexceptions import HTTPBadRequest, HTTPForbidden, HTTPGone
 from pyramid.response import Response
 from pyramid.view import view_config
-from sqlalchemy import exists, func, orm
+from sqlalchemy import Text, exists, func, orm, sql
 from sqlalchemy.orm.exc import MultipleResultsFound, NoResultFound
 
 from warehouse import forms
-from warehouse.classifiers.models import Classifier
+from warehouse.classifiers.cache import get_classifiers
+from warehouse.forklift.bloom import add_known_file, might_be_known
 from warehouse.packaging.interfaces import IFileStorage
 from warehouse.packaging.models import (
     Project, Release, Dependency, DependencyKind, Role, File, Filename,
     JournalEntry, BlacklistedProject,
 )
 from warehouse.utils import http
+from warehouse.utils.hashing import MultiHasher, iter_chunks
+from warehouse.utils.version import sort_key
 
 
 MAX_FILESIZE = 60 * 1024 * 1024  # 60M
 MAX_SIGSIZE = 8 * 1024           # 8K
 
+# The size of the reads we make against the uploaded file, this is large
+# enough that a typical upload is consumed in a handful of reads rather than
+# thousands of them.
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1M
+
 PATH_HASHER = "blake2_256"
 
 
@@ -321,6 +329,24 @@ class ListField(wtforms.Field):
         self.data = [v.strip() for v in valuelist if v.strip()]
 
 
+class ClassifiersField(wtforms.fields.SelectMultipleField):
+    """
+    A SelectMultipleField whose valid choices are a set of values, rather than
+    a list of (value, label) pairs that gets searched for every value.
+    """
+
+    valid_choices = frozenset()
+
+    def pre_validate(self, form):
+        for value in self.data or []:
+            if value not in self.valid_choices:
+                raise ValueError(
+                    self.gettext(
+                        "'%(value)s' is not a valid choice for this field"
+                    ) % dict(value=value)
+                )
+
+
 # TODO: Eventually this whole validation thing should move to the packaging
 #       library and we should just call that. However until PEP 426 is done
 #       that library won't have an API for this.
@@ -421,7 +447,7 @@ class MetadataForm(forms.Form):
         description="Keywords",
         validators=[wtforms.validators.Optional()],
     )
-    classifiers = wtforms.fields.SelectMultipleField(
+    classifiers = ClassifiersField(
         description="Classifier",
     )
     platform = wtforms.StringField(
@@ -591,14 +617,22 @@ def _is_valid_dist_file(filename, filetype):
     a valid distribution file.
     """
 
+    # Parse the central directory of our file (if it is a zipfile) exactly
+    # once, all of the zip based checks below work off of this single listing
+    # rather than re-opening and re-parsing the file for every check.
+    try:
+        with zipfile.ZipFile(filename, "r") as zfp:
+            zip_members = zfp.infolist()
+    except (zipfile.BadZipFile, OSError):
+        zip_members = None
+
     # If our file is a zipfile, then ensure that it's members are only
     # compressed with supported compression methods.
-    if zipfile.is_zipfile(filename):
-        with zipfile.ZipFile(filename) as zfp:
-            for zinfo in zfp.infolist():
-                if zinfo.compress_type not in {zipfile.ZIP_STORED,
-                                               zipfile.ZIP_DEFLATED}:
-                    return False
+    if zip_members is not None:
+        for zinfo in zip_members:
+            if zinfo.compress_type not in {zipfile.ZIP_STORED,
+                                           zipfile.ZIP_DEFLATED}:
+                return False
 
     if filename.endswith(".exe"):
         # The only valid filetype for a .exe file is "bdist_wininst".
@@ -607,16 +641,14 @@ def _is_valid_dist_file(filename, filetype):
 
         # Ensure that the .exe is a valid zip file, and that all of the files
         # contained within it have safe filenames.
-        try:
-            with zipfile.ZipFile(filename, "r") as zfp:
-                # We need the no branch below to work around a bug in
-                # coverage.py where it's detecting a missed branch where there
-                # isn't one.
-                for zipname in zfp.namelist():  # pragma: no branch
-                    if not _safe_zipnames.match(zipname):
-                        return False
-        except zipfile.BadZipFile:
+        if zip_members is None:
             return False
+
+        # We need the no branch below to work around a bug in coverage.py
+        # where it's detecting a missed branch where there isn't one.
+        for zinfo in zip_members:  # pragma: no branch
+            if not _safe_zipnames.match(zinfo.filename):
+                return False
     elif filename.endswith(".msi"):
         # The only valid filetype for a .msi is "bdist_msi"
         if filetype != "bdist_msi":
@@ -631,34 +663,32 @@ def _is_valid_dist_file(filename, filetype):
     elif filename.endswith(".zip") or filename.endswith(".egg"):
         # Ensure that the .zip/.egg is a valid zip file, and that it has a
         # PKG-INFO file.
-        try:
-            with zipfile.ZipFile(filename, "r") as zfp:
-                for zipname in zfp.namelist():
-                    parts = os.path.split(zipname)
-                    if len(parts) == 2 and parts[1] == "PKG-INFO":
-                        # We need the no branch below to work around a bug in
-                        # coverage.py where it's detecting a missed branch
-                        # where there isn't one.
-                        break  # pragma: no branch
-                else:
-                    return False
-        except zipfile.BadZipFile:
+        if zip_members is None:
+            return False
+
+        for zinfo in zip_members:
+            parts = os.path.split(zinfo.filename)
+            if len(parts) == 2 and parts[1] == "PKG-INFO":
+                # We need the no branch below to work around a bug in
+                # coverage.py where it's detecting a missed branch
+                # where there isn't one.
+                break  # pragma: no branch
+        else:
             return False
     elif filename.endswith(".whl"):
         # Ensure that the .whl is a valid zip file, and that it has a WHEEL
         # file.
-        try:
-            with zipfile.ZipFile(filename, "r") as zfp:
-                for zipname in zfp.namelist():
-                    parts = os.path.split(zipname)
-                    if len(parts) == 2 and parts[1] == "WHEEL":
-                        # We need the no branch below to work around a bug in
-                        # coverage.py where it's detecting a missed branch
-                        # where there isn't one.
-                        break  # pragma: no branch
-                else:
-                    return False
-        except zipfile.BadZipFile:
+        if zip_members is None:
+            return False
+
+        for zinfo in zip_members:
+            parts = os.path.split(zinfo.filename)
+            if len(parts) == 2 and parts[1] == "WHEEL":
+                # We need the no branch below to work around a bug in
+                # coverage.py where it's detecting a missed branch
+                # where there isn't one.
+                break  # pragma: no branch
+        else:
             return False
 
     # If we haven't yet decided it's not valid, then we'll assume it is and
@@ -666,6 +696,27 @@ def _is_valid_dist_file(filename, filetype):
     return True
 
 
+def _duplicate_file_clause(filename, hashes):
+    # NULL if there is no such file, otherwise whether it's identical. Some of
+    # these columns are case insensitive, but whether the file is identical
+    # has to be decided case sensitively, so we compare them all as Text.
+    return (
+        sql.select([
+            (sql.cast(File.filename, Text) == filename) &
+            (sql.cast(File.sha256_digest, Text) == hashes["sha256"]) &
+            (sql.cast(File.md5_digest, Text) == hashes["md5"]) &
+            (sql.cast(File.blake2_256_digest, Text) == hashes["blake2_256"])
+        ])
+        .where(
+            (File.filename == filename) |
+            (File.blake2_256_digest_bytes ==
+                bytes.fromhex(hashes["blake2_256"]))
+        )
+        .limit(1)
+        .as_scalar()
+    )
+
+
 def _is_duplicate_file(db_session, filename, hashes):
     """
     Check to see if file already exists, and if it's content matches.
@@ -678,35 +729,41 @@ def _is_duplicate_file(db_session, filename, hashes):
     - None: This file does not exist.
     """
 
-    file_ = (
-        db_session.query(File)
-                  .filter(
-                        (File.filename == filename) |
-                        (File.blake2_256_digest == hashes["blake2_256"]))
-                  .first()
-    )
+    return db_session.query(_duplicate_file_clause(filename, hashes)).scalar()
 
-    if file_ is not None:
-        return (
-            file_.filename == filename and
-            file_.sha256_digest == hashes["sha256"] and
-            file_.md5_digest == hashes["md5"] and
-            file_.blake2_256_digest == hashes["blake2_256"]
-        )
 
-    return None
+FileConflicts = collections.namedtuple(
+    "FileConflicts",
+    ["is_duplicate", "filename_used", "has_sdist"],
+)
+
 
+def _file_conflicts(db_session, filename, hashes, release, packagetype, *,
+                    might_be_known=True):
+    """
+    Run every check that an uploaded file doesn't conflict with one that we
+    already have in a single query, skipping the ones about existing files if
+    the file can't be one of them.
+    """
 
-def _no_deprecated_classifiers(request):
-    deprecated_classifiers = {
-        classifier.classifier
-        for classifier in (
-            request.db.query(Classifier.classifier)
-            .filter(Classifier.deprecated.is_(True))
-            .all()
+    if not might_be_known and packagetype != "sdist":
+        return FileConflicts(None, False, False)
+
+    clauses = [
+        _duplicate_file_clause(filename, hashes)
+        if might_be_known else sql.null(),
+        exists().where(Filename.filename == filename)
+        if might_be_known else sql.false(),
+        exists().where(
+            (File.release == release) & (File.packagetype == "sdist")
         )
-    }
+        if packagetype == "sdist" else sql.false(),
+    ]
+
+    return FileConflicts(*db_session.query(*clauses).one())
+
 
+def _no_deprecated_classifiers(request, deprecated_classifiers):
     def validate_no_deprecated_classifiers(form, field):
         invalid_classifiers = set(field.data or []) & deprecated_classifiers
         if invalid_classifiers:
@@ -723,6 +780,53 @@ def _no_deprecated_classifiers(request):
     return validate_no_deprecated_classifiers
 
 
+def _order_release(session, project, release):
+    # The position of the new release depends on every other release of the
+    # project, and we shift them about to make room for it, so we hold a lock
+    # on the project to keep two uploads from placing releases at once.
+    (session.query(Project.name)
+            .filter(Project.name == project.name)
+            .with_for_update()
+            .one())
+
+    release.version_sort_key = sort_key(release.version)
+    siblings = (
+        session.query(Release)
+        .filter(Release.name == project.name)
+        .filter(Release.version != release.version)
+    )
+
+    position, unkeyed = (
+        siblings.with_entities(
+            func.max(Release._pypi_ordering)
+                .filter(Release.version_sort_key < release.version_sort_key),
+            func.count().filter(Release.version_sort_key.is_(None)),
+        )
+        .one()
+    )
+
+    if unkeyed:
+        # Some of these releases predate version_sort_key, so we fall back to
+        # sorting all of them, giving them their keys while we're at it.
+        releases = siblings.options(orm.load_only(
+            Release.version, Release._pypi_ordering, Release.version_sort_key,
+        )).all()
+        for r in releases:
+            if r.version_sort_key is None:
+                r.version_sort_key = sort_key(r.version)
+        releases.append(release)
+        for i, r in enumerate(
+                sorted(releases, key=lambda x: x.version_sort_key)):
+            r._pypi_ordering = i
+        return
+
+    position = 0 if position is None else position + 1
+    (siblings.filter(Release._pypi_ordering >= position)
+             .update({Release._pypi_ordering: Release._pypi_ordering + 1},
+                     synchronize_session="evaluate"))
+    release._pypi_ordering = position
+
+
 @view_config(
     route_name="forklift.legacy.file_upload",
     uses_session=True,
@@ -779,17 +883,17 @@ def file_upload(request):
             )
 
     # Look up all of the valid classifiers
-    all_classifiers = request.db.query(Classifier).all()
+    all_classifiers = get_classifiers(request)
 
     # Validate and process the incoming metadata.
     form = MetadataForm(request.POST)
 
     # Add a validator for deprecated classifiers
-    form.classifiers.validators.append(_no_deprecated_classifiers(request))
+    form.classifiers.validators.append(
+        _no_deprecated_classifiers(request, all_classifiers.deprecated)
+    )
 
-    form.classifiers.choices = [
-        (c.classifier, c.classifier) for c in all_classifiers
-    ]
+    form.classifiers.valid_choices = all_classifiers.names
     if not form.validate():
         for field_name in _error_message_order:
             if field_name in form.errors:
@@ -968,10 +1072,9 @@ def file_upload(request):
     except NoResultFound:
         release = Release(
             project=project,
-            _classifiers=[
-                c for c in all_classifiers
-                if c.classifier in form.classifiers.data
-            ],
+            _classifiers=all_classifiers.attach(
+                request.db, form.classifiers.data,
+            ),
             _pypi_hidden=False,
             dependencies=list(_construct_dependencies(
                 form,
@@ -1016,26 +1119,21 @@ def file_upload(request):
             ),
         )
 
-    # TODO: We need a better solution to this than to just do it inline inside
-    #       this method. Ideally the version field would just be sortable, but
-    #       at least this should be some sort of hook or trigger.
-    releases = (
-        request.db.query(Release)
-                  .filter(Release.project == project)
-                  .options(orm.load_only(
-                      Release._pypi_ordering,
-                      Release._pypi_hidden))
-                  .all()
-    )
-    for i, r in enumerate(sorted(
-            releases, key=lambda x: packaging.version.parse(x.version))):
-        r._pypi_ordering = i
+    # A new release needs to be slotted in amongst the existing releases of the
+    # project, which only means shifting the releases that sort after it.
+    if release._pypi_ordering is None:
+        _order_release(request.db, project, release)
 
-    # TODO: Again, we should figure out a better solution to doing this than
-    #       just inlining this inside this method.
+    # Likewise, hiding the other releases of the project only has to touch the
+    # ones that aren't hidden already.
     if project.autohide:
-        for r in releases:
-            r._pypi_hidden = bool(not r == release)
+        (request.db.query(Release)
+                   .filter(Release.name == project.name)
+                   .filter(Release.version != release.version)
+                   .filter(Release._pypi_hidden.isnot(True))
+                   .update({Release._pypi_hidden: True},
+                           synchronize_session="evaluate"))
+        release._pypi_hidden = False
 
     # Pull the filename out of our POST data.
     filename = request.POST["content"].filename
@@ -1087,17 +1185,16 @@ def file_upload(request):
     with tempfile.TemporaryDirectory() as tmpdir:
         temporary_filename = os.path.join(tmpdir, filename)
 
-        # Buffer the entire file onto disk, checking the hash of the file as we
-        # go along.
+        # Buffer the entire file onto disk, checking the size and the hash of
+        # the file as we go along. This is the only time that we read the
+        # uploaded data, everything after this works off of the buffered file
+        # and the hashes/size that we compute here.
         with open(temporary_filename, "wb") as fp:
             file_size = 0
-            file_hashes = {
-                "md5": hashlib.md5(),
-                "sha256": hashlib.sha256(),
-                "blake2_256": hashlib.blake2b(digest_size=256 // 8),
-            }
-            for chunk in iter(
-                    lambda: request.POST["content"].file.read(8096), b""):
+            file_hasher = MultiHasher()
+            for chunk in iter_chunks(
+                    request.POST["content"].file,
+                    chunk_size=UPLOAD_CHUNK_SIZE):
                 file_size += len(chunk)
                 if file_size > file_size_limit:
                     raise _exc_with_message(
@@ -1110,14 +1207,10 @@ def file_upload(request):
                         request.help_url(_anchor='file-size-limit'),
                     )
                 fp.write(chunk)
-                for hasher in file_hashes.values():
-                    hasher.update(chunk)
+                file_hasher.update(chunk)
 
         # Take our hash functions and compute the final hashes for them now.
-        file_hashes = {
-            k: h.hexdigest().lower()
-            for k, h in file_hashes.items()
-        }
+        file_hashes = file_hasher.hexdigests()
 
         # Actually verify the digests that we've gotten. We're going to use
         # hmac.compare_digest even though we probably don't actually need to
@@ -1137,11 +1230,20 @@ def file_upload(request):
                 "from the uploaded file."
             )
 
-        # Check to see if the file that was uploaded exists already or not.
-        is_duplicate = _is_duplicate_file(request.db, filename, file_hashes)
-        if is_duplicate:
+        # Check to see if the file that was uploaded conflicts with any of the
+        # files that we already have. Most uploads are of files that we've
+        # never seen before, which the filter of known files can tell us
+        # without having to look for them.
+        conflicts = _file_conflicts(
+            request.db, filename, file_hashes, release, form.filetype.data,
+            might_be_known=might_be_known(
+                request, filename, file_hashes["blake2_256"],
+            ),
+        )
+
+        if conflicts.is_duplicate:
             return Response()
-        elif is_duplicate is not None:
+        elif conflicts.is_duplicate is not None:
             raise _exc_with_message(
                 HTTPBadRequest,
                 # Note: Changing this error message to something that doesn't
@@ -1154,10 +1256,7 @@ def file_upload(request):
             )
 
         # Check to see if the file that was uploaded exists in our filename log
-        if (request.db.query(
-                request.db.query(Filename)
-                          .filter(Filename.filename == filename)
-                          .exists()).scalar()):
+        if conflicts.filename_used:
             raise _exc_with_message(
                 HTTPBadRequest,
                 "This filename has previously been used, you should use a "
@@ -1167,12 +1266,7 @@ def file_upload(request):
 
         # Check to see if uploading this file would create a duplicate sdist
         # for the current release.
-        if (form.filetype.data == "sdist" and
-                request.db.query(
-                    request.db.query(File)
-                              .filter((File.release == release) &
-                                      (File.packagetype == "sdist"))
-                              .exists()).scalar()):
+        if conflicts.has_sdist:
             raise _exc_with_message(
                 HTTPBadRequest,
                 "Only one sdist may be uploaded per release.",
@@ -1198,29 +1292,29 @@ def file_upload(request):
                         .format(filename=filename, plat=plat)
                     )
 
-        # Also buffer the entire signature file to disk.
+        # Also buffer the entire signature file to disk. Signatures are tiny,
+        # so we read it into memory once and check it there rather than
+        # reading it back off of the disk again.
         if "gpg_signature" in request.POST:
             has_signature = True
-            with open(os.path.join(tmpdir, filename + ".asc"), "wb") as fp:
-                signature_size = 0
-                for chunk in iter(
-                        lambda: request.POST["gpg_signature"].file.read(8096),
-                        b""):
-                    signature_size += len(chunk)
-                    if signature_size > MAX_SIGSIZE:
-                        raise _exc_with_message(
-                            HTTPBadRequest,
-                            "Signature too large.",
-                        )
-                    fp.write(chunk)
+            signature = request.POST["gpg_signature"].file.read(
+                MAX_SIGSIZE + 1,
+            )
+            if len(signature) > MAX_SIGSIZE:
+                raise _exc_with_message(
+                    HTTPBadRequest,
+                    "Signature too large.",
+                )
 
             # Check whether signature is ASCII armored
-            with open(os.path.join(tmpdir, filename + ".asc"), "rb") as fp:
-                if not fp.read().startswith(b"-----BEGIN PGP SIGNATURE-----"):
-                    raise _exc_with_message(
-                        HTTPBadRequest,
-                        "PGP signature is not ASCII armored.",
-                    )
+            if not signature.startswith(b"-----BEGIN PGP SIGNATURE-----"):
+                raise _exc_with_message(
+                    HTTPBadRequest,
+                    "PGP signature is not ASCII armored.",
+                )
+
+            with open(os.path.join(tmpdir, filename + ".asc"), "wb") as fp:
+                fp.write(signature)
         else:
             has_signature = False
 
@@ -1228,6 +1322,7 @@ def file_upload(request):
         #       SQLAlchemy hook or the like instead of doing it inline in this
         #       view.
         request.db.add(Filename(filename=filename))
+        add_known_file(request, filename, file_hashes["blake2_256"])
 
         # Store the information about the file in the database.
         file_ = File(
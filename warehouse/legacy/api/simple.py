@@ -11,15 +11,56 @@
 # limitations under the License.
 
 
+from celery.schedules import crontab
 from packaging.version import parse
 from pyramid.httpexceptions import HTTPMovedPermanently
+from pyramid.renderers import render
 from pyramid.view import view_config
-from sqlalchemy import func
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import joinedload
 
+from warehouse import db, tasks
 from warehouse.cache.http import cache_control
 from warehouse.cache.origin import origin_cache
-from warehouse.packaging.models import JournalEntry, File, Project, Release
+from warehouse.packaging.models import (
+    JournalEntry, File, Project, Release, SimplePage,
+)
+
+
+# How many projects without an up to date simple page to render each time
+# backfill_simple_pages runs.
+SIMPLE_PAGE_BATCH_SIZE = 500
+
+
+@db.listens_for(db.Session, "after_flush")
+def store_simple_pages(config, session, flush_context):
+    # We'll (ab)use the session.info dictionary to store a list of projects
+    # whose simple pages will need to be regenerated once the session has been
+    # committed.
+    projects = session.info.setdefault(
+        "warehouse.legacy.api.simple.projects",
+        set(),
+    )
+
+    # A stored page is only served while its serial matches the project's
+    # last_serial, which moves on with every journal entry for the project,
+    # not just the ones for file or release changes. So regenerate the page
+    # for any project that gets a new journal entry, as well as any whose
+    # files or releases have changed. All of these carry the name of their
+    # project, so we don't need to load anything to figure it out.
+    for obj in (session.new | session.dirty | session.deleted):
+        if (isinstance(obj, (File, Release, JournalEntry)) and
+                obj.name is not None):
+            projects.add(obj.name)
+
+
+@db.listens_for(db.Session, "after_commit")
+def execute_simple_pages(config, session):
+    projects = session.info.pop("warehouse.legacy.api.simple.projects", set())
+
+    if projects:
+        config.task(update_simple_pages).delay(sorted(projects))
 
 
 @view_config(
@@ -75,6 +116,23 @@ def simple_detail(project, request):
     # Get the latest serial number for this project.
     request.response.headers["X-PyPI-Last-Serial"] = str(project.last_serial)
 
+    # If we have a materialized copy of this page that is up to date, then we
+    # can serve that without having to query for, and sort, all of the files.
+    page = (
+        request.db.query(SimplePage)
+                  .filter(SimplePage.name == project.name,
+                          SimplePage.serial == project.last_serial)
+                  .first()
+    )
+    if page is not None:
+        request.response.content_type = "text/html"
+        request.response.text = page.html
+        return request.response
+
+    return _simple_detail(project, request)
+
+
+def _simple_detail(project, request):
     # Get all of the files for this project.
     files = sorted(
         request.db.query(File)
@@ -92,3 +150,61 @@ def simple_detail(project, request):
     )
 
     return {"project": project, "files": files}
+
+
+def render_simple_detail(project, request):
+    """
+    Render the HTML for the /simple/<project>/ page for the given project.
+    """
+    return render(
+        "legacy/api/simple/detail.html",
+        _simple_detail(project, request),
+        request=request,
+    )
+
+
+def _store_simple_pages(request, projects):
+    for project in projects:
+        values = {
+            "serial": project.last_serial,
+            "html": render_simple_detail(project, request),
+        }
+        request.db.execute(
+            insert(SimplePage.__table__)
+            .values(name=project.name, **values)
+            .on_conflict_do_update(index_elements=["name"], set_=values)
+        )
+
+
+@tasks.task(ignore_result=True, acks_late=True)
+def update_simple_pages(request, project_names):
+    # Any project which no longer exists will have had its page removed by the
+    # cascading delete, so we only need to deal with the ones we find.
+    _store_simple_pages(
+        request,
+        request.db.query(Project)
+                  .filter(Project.name.in_(project_names))
+                  .all(),
+    )
+
+
+@tasks.task(ignore_result=True, acks_late=True)
+def backfill_simple_pages(request):
+    # Projects that existed before simple pages were materialized don't have
+    # one, and a page can be left behind if the task to update it was lost, so
+    # render any that are missing or out of date a batch at a time.
+    _store_simple_pages(
+        request,
+        request.db.query(Project)
+                  .outerjoin(SimplePage, SimplePage.name == Project.name)
+                  .filter(or_(SimplePage.name.is_(None),
+                              SimplePage.serial != Project.last_serial))
+                  .limit(SIMPLE_PAGE_BATCH_SIZE)
+                  .all(),
+    )
+
+
+def includeme(config):
+    # Add a periodic task to render the simple pages of any projects whose page
+    # is missing or out of date.
+    config.add_periodic_task(crontab(minute="*/5"), backfill_simple_pages)
@@ -14,6 +14,7 @@ import collections
 
 from urllib.parse import urlparse
 
+from celery.schedules import crontab
 from pyramid.exceptions import ConfigurationError
 from sqlalchemy.orm.base import NO_VALUE
 from sqlalchemy.orm.session import Session
@@ -27,6 +28,7 @@ from warehouse.legacy.api.xmlrpc.cache.services import (
     RedisXMLRPCCache,
 )
 from warehouse.legacy.api.xmlrpc.cache.interfaces import IXMLRPCCache
+from warehouse.legacy.api.xmlrpc.cache.serials import update_serials
 
 __all__ = [
     "RedisLru",
@@ -134,3 +136,8 @@ def includeme(config):
     config.add_view_deriver(
         cached_return_view, under='rendered_view', over='mapped_view'
     )
+
+    # Keep the snapshot of every project's last serial up to date, if we have
+    # somewhere to keep it.
+    if xmlrpc_cache_class is RedisXMLRPCCache:
+        config.add_periodic_task(crontab(), update_serials)
@@ -28,6 +28,7 @@ def cached_return_view(view, info):
             'xmlrpc_cache_tag_processor',
             lambda x: str(x).lower()
         )
+        key_maker = info.options.get('xmlrpc_cache_key_maker', json.dumps)
 
         def wrapper_view(context, request):
             try:
@@ -35,7 +36,7 @@ def cached_return_view(view, info):
             except ValueError:
                 return view(context, request)
             try:
-                key = json.dumps(request.rpc_args[slice_obj])
+                key = key_maker(request.rpc_args[slice_obj])
                 _tag = None
                 if arg_index is not None:
                     _tag = tag % (tag_processor(request.rpc_args[arg_index]),)
@@ -55,4 +56,5 @@ cached_return_view.options = [
     'xmlrpc_cache_arg_index',
     'xmlrpc_cache_slice_obj',
     'xmlrpc_cache_tag_processor',
+    'xmlrpc_cache_key_maker',
 ]
@@ -11,12 +11,75 @@
 # limitations under the License.
 
 import json
+import time
+import uuid
+import zlib
+
+import msgpack
 import redis
 
 from warehouse.legacy.api.xmlrpc.cache.interfaces import CacheError
 
 DEFAULT_EXPIRES = 86400
 
+# Values larger than this many bytes once serialized will be compressed
+# before they're stored.
+COMPRESS_THRESHOLD = 1024
+
+# How long, in seconds, a single caller may hold the lock to compute a value,
+# and how long everyone else will wait for them before giving up and
+# computing it themselves.
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 5
+LOCK_POLL_INTERVAL = 0.05
+
+# How long, in seconds, a purged value may still be served to callers that
+# are waiting on someone else to compute its replacement.
+STALE_EXPIRES = 60
+
+
+class JSONCodec(object):
+    """
+    Serializes values as JSON text, which is how every value was stored
+    before codecs were configurable.
+    """
+
+    def dumps(self, value):
+        return json.dumps(value)
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class MsgpackCodec(object):
+    """
+    Serializes values with msgpack, compressing them with zlib when they're
+    larger than compress_threshold. Every value is prefixed with a marker
+    byte saying how it was encoded, and anything without one is assumed to
+    have been written by the JSONCodec.
+    """
+
+    MSGPACK = b"\x01"
+    MSGPACK_ZLIB = b"\x02"
+
+    def __init__(self, compress_threshold=COMPRESS_THRESHOLD, level=6):
+        self.compress_threshold = compress_threshold
+        self.level = level
+
+    def dumps(self, value):
+        data = msgpack.packb(value, use_bin_type=True)
+        if len(data) > self.compress_threshold:
+            return self.MSGPACK_ZLIB + zlib.compress(data, self.level)
+        return self.MSGPACK + data
+
+    def loads(self, data):
+        marker, payload = data[:1], data[1:]
+        if marker == self.MSGPACK_ZLIB:
+            payload = zlib.decompress(payload)
+        elif marker != self.MSGPACK:
+            return json.loads(data)
+        return msgpack.unpackb(payload, raw=False, use_list=True)
+
 
 class StubMetricReporter(object):
 
@@ -27,17 +90,27 @@ class StubMetricReporter(object):
 class RedisLru(object):
     """
     Redis backed LRU cache for functions which return an object which
-    can survive json.dumps() and json.loads() intact
+    can survive being serialized and deserialized by the codec intact
     """
 
-    def __init__(self, conn, name="lru", expires=None, metric_reporter=None):
+    def __init__(self, conn, name="lru", expires=None, metric_reporter=None,
+                 codec=None, serve_stale=False, lock_wait=LOCK_WAIT):
         """
         conn:            Redis Connection Object
         name:            Prefix for all keys in the cache
         expires:         Default expiration
         metric_reporter: Object implementing an `increment(<string>)` method
+        codec:           Object implementing `dumps(<object>)` and
+                         `loads(<bytes>)` methods, defaults to MsgpackCodec
+        serve_stale:     Keep purged values around for a short while, and
+                         serve them while a replacement is being computed
+        lock_wait:       How long to wait for another caller that is already
+                         computing the same value
         """
         self.conn = conn
+        self.codec = codec if codec is not None else MsgpackCodec()
+        self.serve_stale = serve_stale
+        self.lock_wait = lock_wait
         self.name = name
         self.expires = expires if expires else DEFAULT_EXPIRES
         if callable(getattr(metric_reporter, "increment", None)):
@@ -50,6 +123,23 @@ class RedisLru(object):
             return ':'.join([self.name, tag, func_name])
         return ':'.join([self.name, 'tag', func_name])
 
+    def format_stale_key(self, func_name, tag):
+        if tag is not None:
+            return ':'.join([self.name + '-stale', tag, func_name])
+        return ':'.join([self.name + '-stale', 'tag', func_name])
+
+    def format_lock_key(self, func_name, key, tag):
+        return f'{self.name}-locks:{self.format_key(func_name, tag)}:{key}'
+
+    def format_tag_key(self, tag):
+        # The index lives outside of our own "name:" namespace so that it can
+        # never collide with the key of a cached function for some tag.
+        return ':'.join([self.name + '-tags', tag])
+
+    def format_indexed_key(self):
+        # When we started keeping an index of the keys for each tag.
+        return self.name + '-indexed'
+
     def get(self, func_name, key, tag):
         try:
             value = self.conn.hget(self.format_key(func_name, tag), key)
@@ -58,7 +148,7 @@ class RedisLru(object):
             return None
         if value:
             self.metric_reporter.increment(f'{self.name}.cache.hit')
-            value = json.loads(value)
+            value = self.codec.loads(value)
         return value
 
     def add(self, func_name, key, value, tag, expires):
@@ -66,10 +156,21 @@ class RedisLru(object):
             self.metric_reporter.increment(f'{self.name}.cache.miss')
             pipeline = self.conn.pipeline()
             pipeline.hset(
-                self.format_key(func_name, tag), key, json.dumps(value)
+                self.format_key(func_name, tag), key, self.codec.dumps(value)
             )
             ttl = expires if expires else self.expires
             pipeline.expire(self.format_key(func_name, tag), ttl)
+            if tag is not None:
+                # Keep an index of every key stored for this tag, so that we
+                # can purge them without having to scan the entire keyspace.
+                # Each tag is only used for entries sharing one TTL, so the
+                # index can expire along with the keys that it points to.
+                tag_key = self.format_tag_key(tag)
+                pipeline.sadd(tag_key, self.format_key(func_name, tag))
+                pipeline.expire(tag_key, ttl)
+                pipeline.set(
+                    self.format_indexed_key(), int(time.time()), nx=True,
+                )
             pipeline.execute()
             return value
         except (redis.exceptions.RedisError, redis.exceptions.ConnectionError):
@@ -77,19 +178,115 @@ class RedisLru(object):
             return value
 
     def purge(self, tag):
+        self.purge_tags([tag])
+
+    def purge_tags(self, tags):
+        tag_keys = [self.format_tag_key(tag) for tag in tags]
         try:
-            keys = self.conn.scan_iter(":".join([self.name, tag, '*']))
             pipeline = self.conn.pipeline()
-            for key in keys:
-                pipeline.delete(key)
-            pipeline.execute()
-            self.metric_reporter.increment(f'{self.name}.cache.purge')
+            pipeline.get(self.format_indexed_key())
+            for tag_key in tag_keys:
+                pipeline.smembers(tag_key)
+            indexed, *members = pipeline.execute()
+
+            # Anything cached before we kept an index for each tag can only
+            # be found by scanning for it, which we have to keep doing until
+            # all of it will have expired.
+            if indexed is None or time.time() - int(indexed) < self.expires:
+                members = [
+                    keys | set(
+                        self.conn.scan_iter(':'.join([self.name, tag, '*']))
+                    )
+                    for tag, keys in zip(tags, members)
+                ]
+
+            # We only remove the keys we're deleting from each index, rather
+            # than the index itself, so that anything added to it since we
+            # read it will still be purged next time.
+            pipeline = self.conn.pipeline()
+            for tag_key, keys in zip(tag_keys, members):
+                if not keys:
+                    continue
+                if self.serve_stale:
+                    prefix = len(self.name.encode('utf8'))
+                    for key in keys:
+                        stale_key = (
+                            (self.name + '-stale').encode('utf8') +
+                            key[prefix:]
+                        )
+                        pipeline.rename(key, stale_key)
+                        pipeline.expire(stale_key, STALE_EXPIRES)
+                else:
+                    pipeline.delete(*keys)
+                pipeline.srem(tag_key, *keys)
+            # A key may have expired since we read the index, which will make
+            # renaming it fail, but there's nothing left to purge then anyway.
+            pipeline.execute(raise_on_error=not self.serve_stale)
         except (redis.exceptions.RedisError, redis.exceptions.ConnectionError):
             self.metric_reporter.increment(f'{self.name}.cache.error')
             raise CacheError()
 
+        for _ in tag_keys:
+            self.metric_reporter.increment(f'{self.name}.cache.purge')
+
+    def get_stale(self, func_name, key, tag):
+        try:
+            value = self.conn.hget(self.format_stale_key(func_name, tag), key)
+        except (redis.exceptions.RedisError, redis.exceptions.ConnectionError):
+            self.metric_reporter.increment(f'{self.name}.cache.error')
+            return None
+        if value is not None:
+            self.metric_reporter.increment(f'{self.name}.cache.stale')
+            value = self.codec.loads(value)
+        return value
+
+    def wait(self, func_name, key, tag):
+        if self.serve_stale:
+            value = self.get_stale(func_name, key, tag)
+            if value is not None:
+                return value
+
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            value = self.get(func_name, key, tag)
+            if value is not None:
+                return value
+
     def fetch(self, func, args, kwargs, key, tag, expires):
-        return self.get(func.__name__, key, tag) or \
-            self.add(
-                func.__name__, key, func(*args, **kwargs), tag, expires
-        )
+        func_name = func.__name__
+        value = self.get(func_name, key, tag)
+        if value is not None:
+            return value
+
+        # Only let one caller at a time compute any given value, everyone else
+        # waits for them to have added it to the cache.
+        lock_key = self.format_lock_key(func_name, key, tag)
+        token = uuid.uuid4().hex
+        try:
+            locked = self.conn.set(lock_key, token, nx=True, ex=LOCK_TIMEOUT)
+        except (redis.exceptions.RedisError, redis.exceptions.ConnectionError):
+            # If we can't talk to Redis, then there isn't anyone to coordinate
+            # with, so we'll just go ahead and compute the value ourselves.
+            locked, token = False, None
+
+        if not locked and token is not None:
+            value = self.wait(func_name, key, tag)
+            if value is not None:
+                self.metric_reporter.increment(f'{self.name}.cache.coalesced')
+                return value
+
+        try:
+            value = func(*args, **kwargs)
+            return self.add(func_name, key, value, tag, expires)
+        finally:
+            if locked:
+                self.release(lock_key, token)
+
+    def release(self, lock_key, token):
+        try:
+            if self.conn.get(lock_key) == token.encode('utf8'):
+                self.conn.delete(lock_key)
+        except (redis.exceptions.RedisError, redis.exceptions.ConnectionError):
+            # The lock will expire on its own soon enough.
+            pass
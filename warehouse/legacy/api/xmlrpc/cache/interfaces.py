@@ -34,14 +34,14 @@ class IXMLRPCCache(Interface):
         expiration.
         """
 
-    def purge(self, tag):
+    def purge(self, *tags):
         """
-        Issues a purge, clearing all cached objects associated with the tag
-        from the cache.
+        Issues a purge, clearing all cached objects associated with any of the
+        tags from the cache.
         """
 
     def purge_tags(self, tags):
         """
-        Issues a purge, clearing all cached objects associated with each tag
-        in the iterable tags.
+        Queues a single purge, clearing all cached objects associated with
+        each tag in the iterable tags.
         """
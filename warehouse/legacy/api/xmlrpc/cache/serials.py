@@ -0,0 +1,147 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import redis
+
+from sqlalchemy import func
+
+from warehouse import tasks
+from warehouse.legacy.api.xmlrpc.cache.services import redis_options
+from warehouse.packaging.models import JournalEntry, Project
+from warehouse.search.tasks import SERIAL_LOOKBACK
+from warehouse.utils.redis import get_configured_redis
+
+
+SERIALS_KEY = "warehouse.xmlrpc.serials"
+LAST_SERIAL_KEY = "warehouse.xmlrpc.serials.last_serial"
+
+# How many projects to write to Redis in each command when rebuilding the
+# snapshot from scratch.
+REBUILD_CHUNK_SIZE = 10000
+
+
+def _get_redis(registry):
+    # Share the same connection pool as the cache itself.
+    return get_configured_redis(
+        registry,
+        "warehouse.xmlrpc.cache.url",
+        **redis_options(registry.settings),
+    )
+
+
+def changed_serials(db, since):
+    """
+    Return the names of every project that has had something happen to it
+    since the given serial, along with a mapping of those that still exist to
+    their current serial.
+    """
+    changed = (
+        db.query(JournalEntry.name)
+          .filter(JournalEntry.id > since, JournalEntry.name.isnot(None))
+          .distinct()
+          .subquery()
+    )
+    rows = (
+        db.query(changed.c.name, Project.last_serial)
+          .outerjoin(Project, Project.name == changed.c.name)
+          .all()
+    )
+    names = {name for name, _ in rows}
+    serials = {name: serial for name, serial in rows if serial is not None}
+    return names, serials
+
+
+def get_serials(request):
+    """
+    Return a mapping of every project name to its last serial, served from
+    the snapshot in Redis with any changes since it was taken applied on top,
+    or None if there isn't a snapshot available.
+    """
+    redis_conn = _get_redis(request.registry)
+    if redis_conn is None:
+        return None
+
+    try:
+        pipeline = redis_conn.pipeline()
+        pipeline.get(LAST_SERIAL_KEY)
+        pipeline.hgetall(SERIALS_KEY)
+        last_serial, snapshot = pipeline.execute()
+    except (redis.exceptions.RedisError, redis.exceptions.ConnectionError):
+        return None
+
+    if last_serial is None:
+        return None
+
+    serials = {
+        name.decode("utf8"): int(serial) for name, serial in snapshot.items()
+    }
+
+    names, changed = changed_serials(request.db, int(last_serial))
+    for name in names - set(changed):
+        serials.pop(name, None)
+    serials.update(changed)
+
+    return serials
+
+
+@tasks.task(ignore_result=True, acks_late=True)
+def update_serials(request):
+    redis_conn = _get_redis(request.registry)
+    if redis_conn is None:
+        return
+
+    current_serial = request.db.query(func.max(JournalEntry.id)).scalar()
+    if current_serial is None:
+        return
+
+    last_serial = redis_conn.get(LAST_SERIAL_KEY)
+
+    if last_serial is None:
+        # There isn't a snapshot yet, so we'll build one from scratch under a
+        # temporary name and then swap it into place all at once.
+        tmp_key = f"{SERIALS_KEY}.rebuild"
+        redis_conn.delete(tmp_key)
+        batch, written = {}, False
+        query = request.db.query(Project.name, Project.last_serial)
+        for name, serial in query.yield_per(REBUILD_CHUNK_SIZE):
+            batch[name] = serial
+            if len(batch) >= REBUILD_CHUNK_SIZE:
+                redis_conn.hmset(tmp_key, batch)
+                batch, written = {}, True
+        if batch:
+            redis_conn.hmset(tmp_key, batch)
+            written = True
+
+        pipeline = redis_conn.pipeline()
+        if written:
+            pipeline.rename(tmp_key, SERIALS_KEY)
+        else:
+            pipeline.delete(SERIALS_KEY)
+        pipeline.set(LAST_SERIAL_KEY, current_serial)
+        pipeline.execute()
+        return
+
+    if current_serial <= int(last_serial):
+        return
+
+    names, serials = changed_serials(
+        request.db, int(last_serial) - SERIAL_LOOKBACK,
+    )
+    deleted = names - set(serials)
+
+    pipeline = redis_conn.pipeline()
+    if serials:
+        pipeline.hmset(SERIALS_KEY, serials)
+    if deleted:
+        pipeline.hdel(SERIALS_KEY, *deleted)
+    pipeline.set(LAST_SERIAL_KEY, current_serial)
+    pipeline.execute()
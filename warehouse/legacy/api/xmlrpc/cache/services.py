@@ -10,15 +10,49 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import redis
-
+from pyramid.settings import asbool
 from zope.interface import implementer
 
 from warehouse import tasks
 from warehouse.legacy.api.xmlrpc import cache
 from warehouse.legacy.api.xmlrpc.cache import interfaces
+from warehouse.utils.redis import get_redis
+
+
+# The settings that are passed through as options to the connection pool
+# shared by every RedisXMLRPCCache in this process.
+REDIS_OPTIONS = {
+    "max_connections": int,
+    "socket_timeout": float,
+    "socket_connect_timeout": float,
+}
+
+
+def redis_options(settings):
+    """
+    Return the connection options for the xmlrpc cache's Redis that have
+    been set in the given settings.
+    """
+    return {
+        option: coercer(settings[f'warehouse.xmlrpc.cache.{option}'])
+        for option, coercer in REDIS_OPTIONS.items()
+        if f'warehouse.xmlrpc.cache.{option}' in settings
+    }
+
+
+@tasks.task(bind=True, ignore_result=True, acks_late=True)
+def purge_tags(task, request, tags):
+    service = request.find_service(interfaces.IXMLRPCCache)
+    request.log.info('Purging %s', ', '.join(tags))
+    try:
+        service.purge(*tags)
+    except (interfaces.CacheError) as exc:
+        request.log.error('Error purging %s: %s', ', '.join(tags), str(exc))
+        raise task.retry(exc=exc)
 
 
+# Purges are queued with purge_tags now, this is only kept so that any that
+# were queued one tag at a time before that still get run.
 @tasks.task(bind=True, ignore_result=True, acks_late=True)
 def purge_tag(task, request, tag):
     service = request.find_service(interfaces.IXMLRPCCache)
@@ -34,33 +68,42 @@ def purge_tag(task, request, tag):
 class RedisXMLRPCCache:
 
     def __init__(self, redis_url, purger, redis_db=0, name="lru", expires=None,
-                 metric_reporter=None):
-        self.redis_conn = redis.StrictRedis.from_url(redis_url, db=redis_db)
+                 metric_reporter=None, redis_options=None, serve_stale=False):
+        if redis_options is None:
+            redis_options = {}
+
+        self.redis_conn = get_redis(redis_url, db=redis_db, **redis_options)
         self.redis_lru = cache.RedisLru(self.redis_conn, name=name,
                                         expires=expires,
-                                        metric_reporter=metric_reporter)
+                                        metric_reporter=metric_reporter,
+                                        serve_stale=serve_stale)
         self._purger = purger
 
     @classmethod
     def create_service(cls, context, request):
+        settings = request.registry.settings
         return cls(
-            request.registry.settings.get('warehouse.xmlrpc.cache.url'),
-            request.task(purge_tag).delay,
-            name=request.registry.settings.get(
-                'warehouse.xmlrpc.cache.name', 'xmlrpc'),
-            expires=int(request.registry.settings.get(
-                'warehouse.xmlrpc.cache.expires', 25 * 60 * 60))
+            settings.get('warehouse.xmlrpc.cache.url'),
+            request.task(purge_tags).delay,
+            name=settings.get('warehouse.xmlrpc.cache.name', 'xmlrpc'),
+            expires=int(settings.get(
+                'warehouse.xmlrpc.cache.expires', 25 * 60 * 60)),
+            redis_options=redis_options(settings),
+            serve_stale=asbool(
+                settings.get('warehouse.xmlrpc.cache.serve_stale', False)
+            ),
         )
 
     def fetch(self, func, args, kwargs, key, tag, expires):
         return self.redis_lru.fetch(func, args, kwargs, key, tag, expires)
 
-    def purge(self, tag):
-        return self.redis_lru.purge(tag)
+    def purge(self, *tags):
+        return self.redis_lru.purge_tags(tags)
 
     def purge_tags(self, tags):
-        for tag in tags:
-            self._purger(tag)
+        tags = sorted(tags)
+        if tags:
+            self._purger(tags)
 
 
 @implementer(interfaces.IXMLRPCCache)
@@ -73,15 +116,16 @@ class NullXMLRPCCache:
     def create_service(cls, context, request):
         return cls(
             request.registry.settings.get('warehouse.xmlrpc.cache.url'),
-            request.task(purge_tag).delay,
+            request.task(purge_tags).delay,
         )
 
     def fetch(self, func, args, kwargs, key, tag, expires):
         return func(*args, **kwargs)
 
-    def purge(self, tag):
+    def purge(self, *tags):
         return
 
     def purge_tags(self, tags):
-        for tag in tags:
-            self._purger(tag)
+        tags = sorted(tags)
+        if tags:
+            self._purger(tags)
@@ -13,6 +13,8 @@
 import collections.abc
 import datetime
 import functools
+import hashlib
+import json
 import xmlrpc.client
 import xmlrpc.server
 
@@ -27,6 +29,9 @@ from sqlalchemy.orm.exc import NoResultFound
 
 from warehouse.accounts.models import User
 from warehouse.classifiers.models import Classifier
+from warehouse.legacy.api.xmlrpc.cache.serials import (
+    changed_serials, get_serials
+)
 from warehouse.packaging.models import (
     Role, Project, Release, File, JournalEntry, release_classifiers,
 )
@@ -35,6 +40,14 @@ from warehouse.search.queries import SEARCH_BOOSTS
 
 _MAX_MULTICALLS = 20
 
+# How many journal entries to fetch from the database at a time when streaming
+# the changelog.
+_CHANGELOG_BATCH_SIZE = 1000
+
+# How many journal entries back list_packages_with_serial_since will look,
+# anything older than that has to sync from list_packages_with_serial instead.
+_MAX_SERIAL_LOOKBACK = 100000
+
 
 def xmlrpc_method(**kwargs):
     """
@@ -81,7 +94,51 @@ def exception_view(exc, request):
     return _exception_view(exc, request)
 
 
-@xmlrpc_method(method="search")
+# The fields of a project that can be searched on through the XML-RPC API.
+_SEARCH_SPEC_FIELDS = {
+    "name", "version", "author", "author_email", "maintainer",
+    "maintainer_email", "home_page", "license", "summary", "description",
+    "keywords", "platform", "download_url",
+}
+
+
+def _normalize_search_spec(spec):
+    # Remove any invalid spec fields
+    return {
+        k: [v] if isinstance(v, str) else v
+        for k, v in spec.items()
+        if v and k in _SEARCH_SPEC_FIELDS
+    }
+
+
+def _search_cache_key(args):
+    spec, operator, *_ = tuple(args) + ("and",)
+    if isinstance(spec, collections.abc.Mapping):
+        # Neither the order of the fields nor the order of the values for a
+        # field changes the results, so neither should change the key.
+        spec = {
+            k: sorted(v, key=str) if isinstance(v, list) else v
+            for k, v in _normalize_search_spec(spec).items()
+        }
+    return json.dumps([spec, operator], sort_keys=True, default=str)
+
+
+def _search_cache_tag(spec):
+    # Each distinct search gets a hash of its own, so that it expires on its
+    # own schedule rather than every search sharing one ever growing hash.
+    key = _search_cache_key((spec,))
+    return hashlib.sha256(key.encode("utf8")).hexdigest()
+
+
+@xmlrpc_method(
+    method="search",
+    xmlrpc_cache=True,
+    xmlrpc_cache_expires=10 * 60,  # 10 minutes
+    xmlrpc_cache_tag="search/%s",
+    xmlrpc_cache_arg_index=0,
+    xmlrpc_cache_tag_processor=_search_cache_tag,
+    xmlrpc_cache_key_maker=_search_cache_key,
+)
 def search(request, spec, operator="and"):
     if not isinstance(spec, collections.abc.Mapping):
         raise XMLRPCWrappedError(
@@ -93,16 +150,7 @@ def search(request, spec, operator="and"):
             ValueError("Invalid operator, must be one of 'and' or 'or'.")
         )
 
-    # Remove any invalid spec fields
-    spec = {
-        k: [v] if isinstance(v, str) else v
-        for k, v in spec.items()
-        if v and k in {
-            "name", "version", "author", "author_email", "maintainer",
-            "maintainer_email", "home_page", "license", "summary",
-            "description", "keywords", "platform", "download_url",
-        }
-    }
+    spec = _normalize_search_spec(spec)
 
     queries = []
     for field, value in sorted(spec.items()):
@@ -122,6 +170,12 @@ def search(request, spec, operator="and"):
     else:
         query = request.es.query("bool", should=queries)
 
+    # Only fetch the fields of each hit that we're going to return.
+    if "version" in spec.keys():
+        query = query.source(["name", "summary", "version"])
+    else:
+        query = query.source(["latest_version", "name", "summary"])
+
     results = query[:100].execute()
 
     request.registry.datadog.histogram('warehouse.xmlrpc.search.results',
@@ -158,8 +212,33 @@ def list_packages(request):
 
 @xmlrpc_method(method="list_packages_with_serial")
 def list_packages_with_serial(request):
-    serials = request.db.query(Project.name, Project.last_serial).all()
-    return dict((serial[0], serial[1]) for serial in serials)
+    serials = get_serials(request)
+    if serials is None:
+        serials = request.db.query(Project.name, Project.last_serial).all()
+        return dict((serial[0], serial[1]) for serial in serials)
+    return serials
+
+
+@xmlrpc_method(method="list_packages_with_serial_since")
+def list_packages_with_serial_since(request, serial):
+    if not isinstance(serial, int) or isinstance(serial, bool):
+        raise XMLRPCWrappedError(
+            TypeError("Invalid serial, must be an integer.")
+        )
+
+    last_serial = request.db.query(func.max(JournalEntry.id)).scalar() or 0
+    if serial < last_serial - _MAX_SERIAL_LOOKBACK:
+        raise XMLRPCWrappedError(
+            ValueError(
+                "Serial is too old, use list_packages_with_serial to get "
+                "every project instead."
+            )
+        )
+
+    # Projects that have been deleted since the given serial are included
+    # with a serial of None, so that they can be removed.
+    names, serials = changed_serials(request.db, serial)
+    return {name: serials.get(name) for name in names}
 
 
 @xmlrpc_method(method="package_hosting_mode")
@@ -367,60 +446,86 @@ def changelog_last_serial(request):
     return request.db.query(func.max(JournalEntry.id)).scalar()
 
 
-@xmlrpc_method(method="changelog_since_serial")
-def changelog_since_serial(request, serial):
+def _changelog_entries(request, *criterion):
+    # We only select the columns that we actually need, and we stream them
+    # from the database in batches, rather than loading every JournalEntry at
+    # once, since mirrors will regularly request tens of thousands of them.
+    batch_size = int(
+        request.registry.settings.get(
+            "warehouse.xmlrpc.changelog.batch_size",
+            _CHANGELOG_BATCH_SIZE,
+        )
+    )
     entries = (
-        request.db.query(JournalEntry)
-                  .filter(JournalEntry.id > serial)
-                  .order_by(JournalEntry.id)
-                  .limit(50000)
+        request.db.query(
+            JournalEntry.name,
+            JournalEntry.version,
+            JournalEntry.submitted_date,
+            JournalEntry.action,
+            JournalEntry.id,
+        )
+        .filter(*criterion)
+        .order_by(JournalEntry.id)
+        .limit(50000)
+        .yield_per(batch_size)
     )
 
-    return [
-        (
-            e.name,
-            e.version,
+    for name, version, submitted_date, action, id_ in entries:
+        yield (
+            name,
+            version,
             int(
-                e.submitted_date
-                 .replace(tzinfo=datetime.timezone.utc)
-                 .timestamp()
+                submitted_date
+                .replace(tzinfo=datetime.timezone.utc)
+                .timestamp()
             ),
-            e.action,
-            e.id,
+            action,
+            id_,
         )
-        for e in entries
+
+
+def _array_response(request, values):
+    """
+    Render an XML-RPC response containing an array of the given values,
+    marshalling each of them as they come in so that they don't all have to
+    be loaded first. The rendered body is still built up in full, since the
+    values come from the database and the transaction is over by the time an
+    app_iter would be iterated.
+    """
+    marshaller = xmlrpc.client.Marshaller(allow_none=True)
+    parts = [
+        "<?xml version='1.0'?>\n",
+        "<methodResponse>\n<params>\n<param>\n",
+        "<value><array><data>\n",
     ]
+    for value in values:
+        marshaller.dump_array(value, parts.append)
+    parts.append("</data></array></value>\n")
+    parts.append("</param>\n</params>\n</methodResponse>\n")
+
+    response = request.response
+    response.content_type = "text/xml"
+    response.text = "".join(parts)
+    return response
+
+
+@xmlrpc_method(method="changelog_since_serial")
+def changelog_since_serial(request, serial):
+    return _array_response(
+        request,
+        _changelog_entries(request, JournalEntry.id > serial),
+    )
 
 
 @xmlrpc_method(method="changelog")
 def changelog(request, since, with_ids=False):
     since = datetime.datetime.utcfromtimestamp(since)
-    entries = (
-        request.db.query(JournalEntry)
-                  .filter(JournalEntry.submitted_date > since)
-                  .order_by(JournalEntry.id)
-                  .limit(50000)
-    )
+    results = _changelog_entries(request, JournalEntry.submitted_date > since)
 
-    results = (
-        (
-            e.name,
-            e.version,
-            int(
-                e.submitted_date
-                 .replace(tzinfo=datetime.timezone.utc)
-                 .timestamp()
-            ),
-            e.action,
-            e.id,
-        )
-        for e in entries
-    )
+    if not with_ids:
+        results = (r[:-1] for r in results)
 
-    if with_ids:
-        return list(results)
-    else:
-        return [r[:-1] for r in results]
+    return _array_response(request, results)
 
 
 @xmlrpc_method(method="browse")
@@ -12,7 +12,7 @@
 
 from collections import defaultdict
 
-from pyramid.httpexceptions import HTTPSeeOther
+from pyramid.httpexceptions import HTTPBadRequest, HTTPSeeOther
 from pyramid.security import Authenticated
 from pyramid.view import view_config, view_defaults
 from sqlalchemy import func
@@ -33,6 +33,7 @@ from warehouse.manage.forms import (
 from warehouse.packaging.models import (
     File, JournalEntry, Project, Release, Role,
 )
+from warehouse.utils.paginate import KeysetPage, keyset_url_factory
 from warehouse.utils.project import (
     confirm_project,
     destroy_docs,
@@ -796,12 +797,19 @@ def delete_project_role(project, request):
     permission="manage",
 )
 def manage_project_history(project, request):
-    journals = (
-        request.db.query(JournalEntry)
-        .filter(JournalEntry.name == project.name)
-        .order_by(JournalEntry.submitted_date.desc(), JournalEntry.id.desc())
-        .all()
-    )
+    try:
+        journals = KeysetPage(
+            request.db.query(JournalEntry)
+                      .filter(JournalEntry.name == project.name),
+            keys=(JournalEntry.submitted_date, JournalEntry.id),
+            after=request.params.get("after"),
+            before=request.params.get("before"),
+            items_per_page=100,
+            url_maker=keyset_url_factory(request),
+        )
+    except ValueError:
+        raise HTTPBadRequest("Invalid page cursor.") from None
+
     return {
         'project': project,
         'journals': journals,
@@ -0,0 +1,41 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Index release file blake2 digests as bytes
+
+Revision ID: 5d1e2f7b8c90
+Revises: c4f5bd3a9e21
+Create Date: 2018-06-20 09:47:12.118344
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "5d1e2f7b8c90"
+down_revision = "c4f5bd3a9e21"
+
+
+def upgrade():
+    op.create_index(
+        "release_files_blake2_256_digest_bytes_idx",
+        "release_files",
+        [sa.text("decode(CAST(blake2_256_digest AS TEXT), 'hex')")],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "release_files_blake2_256_digest_bytes_idx",
+        table_name="release_files",
+    )
@@ -0,0 +1,50 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Store rendered descriptions on releases
+
+Revision ID: 798e051b6d4d
+Revises: 674548df65d6
+Create Date: 2018-05-15 10:21:07.813022
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "798e051b6d4d"
+down_revision = "674548df65d6"
+
+
+def upgrade():
+    op.add_column(
+        "releases",
+        sa.Column("description_html", sa.Text(), nullable=True),
+    )
+    op.add_column(
+        "releases",
+        sa.Column("description_html_digest", sa.Text(), nullable=True),
+    )
+    op.add_column(
+        "releases",
+        sa.Column(
+            "description_html_renderer_version",
+            sa.Text(),
+            nullable=True,
+        ),
+    )
+
+
+def downgrade():
+    op.drop_column("releases", "description_html_renderer_version")
+    op.drop_column("releases", "description_html_digest")
+    op.drop_column("releases", "description_html")
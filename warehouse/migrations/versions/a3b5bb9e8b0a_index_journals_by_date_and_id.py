@@ -0,0 +1,37 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Index journals by submitted date and id
+
+Revision ID: a3b5bb9e8b0a
+Revises: 798e051b6d4d
+Create Date: 2018-06-14 13:02:41.628913
+"""
+
+from alembic import op
+
+
+revision = "a3b5bb9e8b0a"
+down_revision = "798e051b6d4d"
+
+
+def upgrade():
+    op.create_index(
+        "journals_submitted_date_id_idx",
+        "journals",
+        ["submitted_date", "id"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("journals_submitted_date_id_idx", table_name="journals")
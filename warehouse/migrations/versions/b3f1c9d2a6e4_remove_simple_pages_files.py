@@ -0,0 +1,43 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Remove the unused list of files from simple pages
+
+Revision ID: b3f1c9d2a6e4
+Revises: e2b4a1c7d3f6
+Create Date: 2018-06-25 10:41:17.520934
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "b3f1c9d2a6e4"
+down_revision = "e2b4a1c7d3f6"
+
+
+def upgrade():
+    op.drop_column("simple_pages", "files")
+
+
+def downgrade():
+    op.add_column(
+        "simple_pages",
+        sa.Column(
+            "files",
+            postgresql.JSONB(astext_type=sa.Text()),
+            server_default=sa.text("'[]'"),
+            nullable=False,
+        ),
+    )
+    op.alter_column("simple_pages", "files", server_default=None)
@@ -0,0 +1,48 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Add a sortable version key to releases
+
+Revision ID: c4f5bd3a9e21
+Revises: a3b5bb9e8b0a
+Create Date: 2018-06-18 10:21:07.402316
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "c4f5bd3a9e21"
+down_revision = "a3b5bb9e8b0a"
+
+
+def upgrade():
+    # Existing releases are given their key by the backfill_version_sort_keys
+    # task, or the next time a file is uploaded to their project.
+    op.add_column(
+        "releases",
+        sa.Column("version_sort_key", sa.LargeBinary(), nullable=True),
+    )
+    op.create_index(
+        "release_name_version_sort_key_idx",
+        "releases",
+        ["name", "version_sort_key"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "release_name_version_sort_key_idx",
+        table_name="releases",
+    )
+    op.drop_column("releases", "version_sort_key")
@@ -0,0 +1,44 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Index SES emails by status and created, and events by email
+
+Revision ID: e2b4a1c7d3f6
+Revises: 5d1e2f7b8c90
+Create Date: 2018-06-22 14:03:51.402117
+"""
+
+from alembic import op
+
+
+revision = "e2b4a1c7d3f6"
+down_revision = "5d1e2f7b8c90"
+
+
+def upgrade():
+    op.create_index(
+        "ses_emails_status_created_idx",
+        "ses_emails",
+        ["status", "created"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_ses_events_email_id"),
+        "ses_events",
+        ["email_id"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(op.f("ix_ses_events_email_id"), table_name="ses_events")
+    op.drop_index("ses_emails_status_created_idx", table_name="ses_emails")
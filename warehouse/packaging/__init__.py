@@ -11,6 +11,7 @@
 # limitations under the License.
 
 from celery.schedules import crontab
+from sqlalchemy import inspect
 from sqlalchemy.orm.base import NO_VALUE
 
 from warehouse import db
@@ -18,7 +19,12 @@ from warehouse.accounts.models import User, Email
 from warehouse.cache.origin import key_factory, receive_set
 from warehouse.packaging.interfaces import IFileStorage, IDocsStorage
 from warehouse.packaging.models import File, Project, Release, Role
-from warehouse.packaging.tasks import compute_trending
+from warehouse.packaging.tasks import (
+    backfill_version_sort_keys,
+    compute_trending,
+    render_description,
+    rerender_descriptions,
+)
 
 
 @db.listens_for(User.name, 'set')
@@ -33,6 +39,34 @@ def email_primary_receive_set(config, target, value, oldvalue, initiator):
         receive_set(Email.primary, config, target)
 
 
+@db.listens_for(db.Session, "after_flush")
+def store_description_renders(config, session, flush_context):
+    renders = session.info.setdefault(
+        "warehouse.packaging.description_renders", set()
+    )
+
+    for obj in session.new:
+        if isinstance(obj, Release):
+            renders.add((obj.name, obj.version))
+
+    for obj in session.dirty:
+        if isinstance(obj, Release):
+            attrs = inspect(obj).attrs
+            if (attrs.description.history.has_changes() or
+                    attrs.description_content_type.history.has_changes()):
+                renders.add((obj.name, obj.version))
+
+
+@db.listens_for(db.Session, "after_commit")
+def execute_description_renders(config, session):
+    renders = session.info.pop(
+        "warehouse.packaging.description_renders", set()
+    )
+
+    for name, version in sorted(renders):
+        config.task(render_description).delay(name, version)
+
+
 def includeme(config):
     # Register whatever file storage backend has been configured for storing
     # our package files.
@@ -109,3 +143,14 @@ def includeme(config):
     # been configured to be able to access BigQuery.
     if config.get_settings().get("warehouse.trending_table"):
         config.add_periodic_task(crontab(minute=0, hour=3), compute_trending)
+
+    # Add a periodic task to render any descriptions that have been rendered by
+    # an older version of readme_renderer, or that have never been rendered.
+    config.add_periodic_task(crontab(minute="*/10"), rerender_descriptions)
+
+    # Add a periodic task to give any releases that predate version_sort_key
+    # one of their own.
+    config.add_periodic_task(
+        crontab(minute="*/10"),
+        backfill_version_sort_keys,
+    )
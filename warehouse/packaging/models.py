@@ -22,7 +22,7 @@ from pyramid.security import Allow
 from pyramid.threadlocal import get_current_request
 from sqlalchemy import (
     CheckConstraint, Column, Enum, ForeignKey, ForeignKeyConstraint, Index,
-    Boolean, DateTime, Integer, Float, Table, Text,
+    Boolean, DateTime, Integer, Float, LargeBinary, Table, Text,
 )
 from sqlalchemy import func, orm, sql
 from sqlalchemy.dialects.postgresql import UUID
@@ -36,6 +36,7 @@ from warehouse import db
 from warehouse.accounts.models import User
 from warehouse.classifiers.models import Classifier
 from warehouse.sitemap.models import SitemapMixin
+from warehouse.utils import version as version_utils
 from warehouse.utils.attrs import make_repr
 
 
@@ -288,6 +289,10 @@ class Release(db.ModelBase):
             Index("release_created_idx", cls.created.desc()),
             Index("release_name_created_idx", cls.name, cls.created.desc()),
             Index("release_name_idx", cls.name),
+            Index(
+                "release_name_version_sort_key_idx",
+                cls.name, cls.version_sort_key,
+            ),
             Index("release_pypi_hidden_idx", cls._pypi_hidden),
             Index("release_version_idx", cls.version),
         )
@@ -314,6 +319,14 @@ class Release(db.ModelBase):
     platform = Column(Text)
     download_url = Column(Text)
     _pypi_ordering = Column(Integer)
+    # The version, encoded so that sorting the bytes sorts the versions the
+    # same way that packaging would, see warehouse.utils.version.sort_key.
+    version_sort_key = Column(
+        LargeBinary,
+        default=lambda ctx: version_utils.sort_key(
+            ctx.get_current_parameters()["version"]
+        ),
+    )
     _pypi_hidden = Column(Boolean)
     cheesecake_installability_id = Column(
         Integer,
@@ -342,7 +355,15 @@ class Release(db.ModelBase):
     # of playing whack-a-mole and using load_only() or defer() on each of
     # those queries, deferring this here makes the default case more
     # performant.
-    description = orm.deferred(Column(Text))
+    description = orm.deferred(Column(Text), group="description")
+
+    # The rendered form of the description, along with what it was rendered
+    # from, so that we can tell when it needs to be rendered again. It's in
+    # its own deferred group so that loading the description (for instance to
+    # check whether the rendered form is current) doesn't also pull the HTML.
+    description_html = orm.deferred(Column(Text), group="description_html")
+    description_html_digest = Column(Text)
+    description_html_renderer_version = Column(Text)
 
     _classifiers = orm.relationship(
         Classifier,
@@ -478,6 +499,10 @@ class File(db.Model):
             CheckConstraint("sha256_digest ~* '^[A-F0-9]{64}$'"),
             CheckConstraint("blake2_256_digest ~* '^[A-F0-9]{64}$'"),
 
+            Index(
+                "release_files_blake2_256_digest_bytes_idx",
+                func.decode(sql.cast(cls.blake2_256_digest, Text), "hex"),
+            ),
             Index("release_files_name_version_idx", "name", "version"),
             Index("release_files_packagetype_idx", "packagetype"),
             Index("release_files_version_idx", "version"),
@@ -534,6 +559,16 @@ class File(db.Model):
     def pgp_path(self):
         return func.concat(self.path, ".asc")
 
+    @hybrid_property
+    def blake2_256_digest_bytes(self):
+        return bytes.fromhex(self.blake2_256_digest)
+
+    @blake2_256_digest_bytes.expression
+    def blake2_256_digest_bytes(self):
+        # This matches the release_files_blake2_256_digest_bytes_idx index,
+        # which is far cheaper to look a digest up in than the citext one.
+        return func.decode(sql.cast(self.blake2_256_digest, Text), "hex")
+
     @validates("requires_python")
     def validates_requires_python(self, *args, **kwargs):
         raise RuntimeError("Cannot set File.requires_python")
@@ -547,6 +582,26 @@ class Filename(db.ModelBase):
     filename = Column(Text, unique=True, nullable=False)
 
 
+class SimplePage(db.ModelBase):
+    """
+    A materialized copy of the /simple/<project>/ page for a project, which is
+    only valid for as long as the serial matches the project's last_serial.
+    """
+
+    __tablename__ = "simple_pages"
+
+    __repr__ = make_repr("name", "serial")
+
+    name = Column(
+        Text,
+        ForeignKey("packages.name", onupdate="CASCADE", ondelete="CASCADE"),
+        primary_key=True,
+        nullable=False,
+    )
+    serial = Column(Integer, nullable=False)
+    html = Column(Text, nullable=False)
+
+
 release_classifiers = Table(
     "release_classifiers",
     db.metadata,
@@ -581,6 +636,7 @@ class JournalEntry(db.ModelBase):
                 "submitted_date", "name", "version", "action",
             ),
             Index("journals_id_idx", "id"),
+            Index("journals_submitted_date_id_idx", "submitted_date", "id"),
             Index("journals_name_idx", "name"),
             Index("journals_version_idx", "version"),
             Index(
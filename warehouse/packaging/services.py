@@ -50,7 +50,7 @@ class LocalFileStorage:
         os.makedirs(os.path.dirname(destination), exist_ok=True)
         with open(destination, "wb") as dest_fp:
             with open(file_path, "rb") as src_fp:
-                dest_fp.write(src_fp.read())
+                shutil.copyfileobj(src_fp, dest_fp)
 
 
 @implementer(IDocsStorage)
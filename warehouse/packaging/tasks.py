@@ -10,9 +10,82 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import html
+import logging
+
+from sqlalchemy import bindparam
+
 from warehouse import tasks
 from warehouse.cache.origin import IOriginCache
-from warehouse.packaging.models import Project
+from warehouse.packaging.models import Project, Release
+from warehouse.utils import readme
+from warehouse.utils.version import sort_key
+
+
+# How many releases with an out of date rendered description to render again
+# each time rerender_descriptions runs.
+RERENDER_BATCH_SIZE = 500
+
+# How many releases without a version_sort_key to give one each time
+# backfill_version_sort_keys runs.
+SORT_KEY_BATCH_SIZE = 5000
+
+
+logger = logging.getLogger(__name__)
+
+
+def description_is_current(release):
+    return (
+        release.description_html_renderer_version ==
+        readme.renderer_version() and
+        release.description_html_digest ==
+        readme.digest(release.description, release.description_content_type)
+    )
+
+
+def _render_description(name, version, description, content_type):
+    try:
+        rendered = readme.render(description, content_type)
+    except Exception:
+        # A description that readme_renderer chokes on would otherwise abort
+        # the whole batch and be picked up again on every run, so log it and
+        # store it as escaped plain text, marked as rendered by this version.
+        logger.exception(
+            "Unable to render description for %s %s", name, version,
+        )
+        rendered = "<pre>{}</pre>".format(html.escape(description or ""))
+
+    return {
+        "_name": name,
+        "_version": version,
+        "description_html": rendered,
+        "description_html_digest": readme.digest(description, content_type),
+        "description_html_renderer_version": readme.renderer_version(),
+    }
+
+
+def _store_rendered_descriptions(session, rendered):
+    # Rendering a description again doesn't change anything that users can
+    # see, so we write it with a plain UPDATE rather than by dirtying the
+    # Release, which would purge the project from our caches and regenerate
+    # its simple page.
+    if not rendered:
+        return
+    releases = Release.__table__
+    query = (
+        releases.update()
+        .where(releases.c.name == bindparam("_name"))
+        .where(releases.c.version == bindparam("_version"))
+        .values({
+            column: bindparam(column)
+            for column in [
+                "description_html",
+                "description_html_digest",
+                "description_html_renderer_version",
+            ]
+        })
+    )
+    session.execute(query, rendered)
 
 
 @tasks.task(ignore_result=True, acks_late=True)
@@ -90,3 +163,83 @@ def compute_trending(request):
         pass
     else:
         cacher.purge(["trending"])
+
+
+@tasks.task(ignore_result=True, acks_late=True)
+def render_description(request, name, version):
+    release = (
+        request.db.query(
+            Release.name, Release.version,
+            Release.description, Release.description_content_type,
+            Release.description_html_digest,
+            Release.description_html_renderer_version,
+        )
+        .filter(Release.name == name, Release.version == version)
+        .first()
+    )
+    if release is not None and not description_is_current(release):
+        _store_rendered_descriptions(
+            request.db,
+            [
+                _render_description(
+                    release.name, release.version,
+                    release.description, release.description_content_type,
+                ),
+            ],
+        )
+
+
+@tasks.task(ignore_result=True, acks_late=True)
+def rerender_descriptions(request):
+    # Work through any releases that were last rendered by some other version
+    # of readme_renderer, or that have never been rendered at all, a batch at
+    # a time so that an upgrade doesn't tie up a worker for hours.
+    # We only need the columns that the rendering depends on, and we load
+    # them up front rather than one deferred description at a time.
+    releases = (
+        request.db.query(
+            Release.name, Release.version,
+            Release.description, Release.description_content_type,
+        )
+        .filter(
+            Release.description_html_renderer_version
+            .is_distinct_from(readme.renderer_version())
+        )
+        .limit(RERENDER_BATCH_SIZE)
+        .all()
+    )
+    _store_rendered_descriptions(
+        request.db,
+        [_render_description(*release) for release in releases],
+    )
+
+
+@tasks.task(ignore_result=True, acks_late=True)
+def backfill_version_sort_keys(request):
+    # Releases created before version_sort_key existed don't have one, so give
+    # them one a batch at a time until there are none left.
+    # Like the rendered descriptions, this is written with a plain UPDATE so
+    # that it doesn't purge every one of these projects from our caches.
+    releases = (
+        request.db.query(Release.name, Release.version)
+                  .filter(Release.version_sort_key.is_(None))
+                  .limit(SORT_KEY_BATCH_SIZE)
+                  .all()
+    )
+    if not releases:
+        return
+    table = Release.__table__
+    request.db.execute(
+        table.update()
+        .where(table.c.name == bindparam("_name"))
+        .where(table.c.version == bindparam("_version"))
+        .values(version_sort_key=bindparam("version_sort_key")),
+        [
+            {
+                "_name": name,
+                "_version": version,
+                "version_sort_key": sort_key(version),
+            }
+            for name, version in releases
+        ],
+    )
@@ -18,6 +18,10 @@ from warehouse.utils import readme
 from warehouse.accounts.models import User
 from warehouse.cache.origin import origin_cache
 from warehouse.packaging.models import Project, Release, Role
+from warehouse.packaging.tasks import (
+    description_is_current,
+    render_description,
+)
 
 
 @view_config(
@@ -90,9 +94,14 @@ def release_detail(release, request):
             request.current_route_path(name=project.name),
         )
 
-    # Render the release description.
-    description = readme.render(
-        release.description, release.description_content_type)
+    # Use the release description that was rendered ahead of time if we can,
+    # otherwise render it now and have it stored for next time.
+    if description_is_current(release):
+        description = release.description_html
+    else:
+        description = readme.render(
+            release.description, release.description_content_type)
+        request.task(render_description).delay(release.name, release.version)
 
     # Get all of the maintainers for this project.
     maintainers = [
@@ -18,6 +18,7 @@ import elasticsearch
 from celery.schedules import crontab
 from elasticsearch_dsl import serializer
 
+from warehouse.search.facets import FacetCache
 from warehouse.search.utils import get_index
 
 
@@ -52,5 +53,16 @@ def includeme(config):
         int(qs.get("replicas", ["0"])[0])
     config.add_request_method(es, name="es", reify=True)
 
-    from warehouse.search.tasks import reindex
-    config.add_periodic_task(crontab(minute=0, hour='*/3'), reindex)
+    config.registry["warehouse.search.facets.cache"] = FacetCache()
+
+    # Keep the index up to date by applying changes from the journal every
+    # minute, with a full rebuild once a day to repair anything that the
+    # incremental updates might have missed.
+    from warehouse.search.tasks import reindex, reindex_incremental
+    config.add_periodic_task(crontab(), reindex_incremental)
+    config.add_periodic_task(crontab(minute=0, hour=6), reindex)
+
+    # Recompute the classifier facets shown on the search page, and how many
+    # projects use each classifier, rather than doing so on every search.
+    from warehouse.search.facets import update_facets
+    config.add_periodic_task(crontab(minute="*/15"), update_facets)
@@ -0,0 +1,183 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import json
+
+import elasticsearch
+import redis
+
+from sqlalchemy.sql import exists
+
+from warehouse import db, tasks
+from warehouse.classifiers.models import Classifier
+from warehouse.packaging.models import release_classifiers
+from warehouse.search.queries import SEARCH_FILTER_ORDER
+from warehouse.utils.cache import TTLCache, has_changes
+from warehouse.utils.redis import get_configured_redis
+
+
+# The key in redis under which update_facets stores the facets it computed.
+FACETS_KEY = "warehouse.search.facets"
+
+# How long the facets stored in redis stay around if update_facets stops
+# running for some reason, after which we go back to the database.
+FACETS_EXPIRES = 24 * 60 * 60  # 24 hours
+
+# How long, in seconds, a process will serve its own copy of the facets before
+# looking for a newer one.
+FACETS_CACHE_TTL = 5 * 60  # 5 minutes
+
+# The most classifiers that we'll ask Elasticsearch to count, comfortably more
+# than the number of trove classifiers that exist.
+MAX_CLASSIFIER_BUCKETS = 5000
+
+
+Facets = collections.namedtuple("Facets", ["filters", "counts"])
+
+
+def _filter_key(item):
+    try:
+        return 0, SEARCH_FILTER_ORDER.index(item[0]), item[0]
+    except ValueError:
+        return 1, 0, item[0]
+
+
+def available_filters(session):
+    """
+    Return every classifier that is in use by at least one release and has not
+    been deprecated, grouped by their top level and in the order that the
+    search page displays them.
+    """
+    classifiers_q = (
+        session.query(Classifier)
+        .with_entities(Classifier.classifier)
+        .filter(Classifier.deprecated.is_(False))
+        .filter(
+            exists([release_classifiers.c.trove_id])
+            .where(release_classifiers.c.trove_id == Classifier.id)
+        )
+        .order_by(Classifier.classifier)
+    )
+
+    filters = collections.defaultdict(list)
+    for cls in classifiers_q:
+        first, *_ = cls.classifier.split(' :: ')
+        filters[first].append(cls.classifier)
+
+    return sorted(filters.items(), key=_filter_key)
+
+
+def classifier_counts(es):
+    """
+    Return how many projects in the search index use each classifier.
+    """
+    query = es.extra(size=0)
+    query.aggs.bucket(
+        "classifiers", "terms",
+        field="classifiers", size=MAX_CLASSIFIER_BUCKETS,
+    )
+    response = query.execute()
+    return {
+        bucket.key: bucket.doc_count
+        for bucket in response.aggregations.classifiers.buckets
+    }
+
+
+def load_facets(request):
+    """
+    Load the facets that update_facets last stored, falling back to computing
+    them from the database (without any counts) if there are none.
+    """
+    redis_conn = get_configured_redis(request.registry)
+    if redis_conn is not None:
+        try:
+            data = redis_conn.get(FACETS_KEY)
+        except redis.exceptions.RedisError:
+            data = None
+
+        if data is not None:
+            data = json.loads(data)
+            filters = [(first, items) for first, items in data["filters"]]
+            return Facets(filters, data["counts"])
+
+    return Facets(available_filters(request.db), {})
+
+
+class FacetCache(TTLCache):
+    """
+    A process local copy of the search facets, which is reloaded once it is
+    older than ``ttl`` seconds or has been invalidated.
+    """
+
+    def __init__(self, ttl=FACETS_CACHE_TTL, **kwargs):
+        super().__init__(ttl, **kwargs)
+
+    def load(self, request):
+        return load_facets(request)
+
+
+def get_facets(request):
+    cache = request.registry.get("warehouse.search.facets.cache")
+    if cache is None:
+        return load_facets(request)
+    return cache.get(request)
+
+
+@tasks.task(ignore_result=True, acks_late=True)
+def update_facets(request):
+    """
+    Compute the search facets, along with how many projects use each of the
+    classifiers, and store them for every process to share.
+    """
+    redis_conn = get_configured_redis(request.registry)
+    if redis_conn is None:
+        return
+
+    try:
+        counts = classifier_counts(request.es)
+    except elasticsearch.ElasticsearchException:
+        counts = {}
+
+    redis_conn.setex(
+        FACETS_KEY,
+        FACETS_EXPIRES,
+        json.dumps({
+            "filters": available_filters(request.db),
+            "counts": counts,
+        }),
+    )
+
+
+@db.listens_for(db.Session, "after_flush")
+def store_classifier_changes(config, session, flush_context):
+    if has_changes(session, Classifier):
+        session.info["warehouse.search.facets.changed"] = True
+
+
+@db.listens_for(db.Session, "after_commit")
+def execute_facets_update(config, session):
+    if session.info.pop("warehouse.search.facets.changed", False):
+        # Until update_facets has run again, every process should go back to
+        # the database rather than keep serving what is now out of date.
+        redis_conn = get_configured_redis(config.registry)
+        if redis_conn is not None:
+            try:
+                redis_conn.delete(FACETS_KEY)
+            except redis.exceptions.RedisError:
+                pass
+
+        cache = config.registry.get("warehouse.search.facets.cache")
+        if cache is not None:
+            cache.invalidate()
+
+        config.task(update_facets).delay()
@@ -22,6 +22,9 @@ SEARCH_BOOSTS = {
     "keywords": 5,
     "summary": 5,
 }
+# The fields of each hit that the search results actually render, everything
+# else (most notably the description) is left out of the response.
+SEARCH_RESULT_FIELDS = ["latest_version", "name", "normalized_name", "summary"]
 SEARCH_FILTER_ORDER = (
     "Framework",
     "Topic",
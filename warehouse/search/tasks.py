@@ -20,19 +20,34 @@ from sqlalchemy import and_, func
 from sqlalchemy.orm import aliased
 import certifi
 import elasticsearch
+import redis
 
 from warehouse.packaging.models import (
-    Classifier, Project, Release, release_classifiers)
+    Classifier, JournalEntry, Project, Release, release_classifiers)
 from warehouse.packaging.search import Project as ProjectDocType
 from warehouse.search.utils import get_index
 from warehouse import tasks
 from warehouse.utils.db import windowed_query
 
 
-def _project_docs(db):
+# The key in redis under which we store the serial of the last journal entry
+# that has been reflected into the search index.
+LAST_SERIAL_KEY = "warehouse.search.last_serial"
 
+# Journal entries get their serial when they are inserted, not when they are
+# committed, so an entry with a lower serial can become visible after one with
+# a higher serial. To avoid missing these we always look back this many serials
+# when looking for projects to update; reindexing a project is idempotent.
+SERIAL_LOOKBACK = 100
+
+
+def _project_docs(db, project_names=None):
+
+    releases_list = db.query(Release.name, Release.version)
+    if project_names is not None:
+        releases_list = releases_list.filter(Release.name.in_(project_names))
     releases_list = (
-        db.query(Release.name, Release.version)
+        releases_list
         .order_by(
             Release.name,
             Release.is_prerelease.nullslast(),
@@ -97,13 +112,9 @@ def _project_docs(db):
         yield p.to_dict(include_meta=True)
 
 
-@tasks.task(ignore_result=True, acks_late=True)
-def reindex(request):
-    """
-    Recreate the Search Index.
-    """
+def _get_client(request):
     p = urllib.parse.urlparse(request.registry.settings["elasticsearch.url"])
-    client = elasticsearch.Elasticsearch(
+    return elasticsearch.Elasticsearch(
         [urllib.parse.urlunparse(p[:2] + ("",) * 4)],
         verify_certs=True,
         ca_certs=certifi.where(),
@@ -111,6 +122,20 @@ def reindex(request):
         retry_on_timeout=True,
         serializer=serializer.serializer,
     )
+
+
+def _get_redis(request):
+    return redis.StrictRedis.from_url(
+        request.registry.settings["celery.scheduler_url"],
+    )
+
+
+@tasks.task(ignore_result=True, acks_late=True)
+def reindex(request):
+    """
+    Recreate the Search Index.
+    """
+    client = _get_client(request)
     number_of_replicas = request.registry.get("elasticsearch.replicas", 0)
     refresh_interval = request.registry.get("elasticsearch.interval", "1s")
 
@@ -143,6 +168,10 @@ def reindex(request):
     try:
         request.db.execute("SET statement_timeout = '600s'")
 
+        # Record how far through the journal we were when we started, any
+        # changes after this point will be picked up by reindex_incremental.
+        serial = request.db.query(func.max(JournalEntry.id)).scalar() or 0
+
         for _ in parallel_bulk(client, _project_docs(request.db)):
             pass
     except:  # noqa
@@ -177,3 +206,64 @@ def reindex(request):
         client.indices.delete(",".join(to_delete))
     else:
         client.indices.put_alias(name=index_base, index=new_index_name)
+
+    _get_redis(request).set(LAST_SERIAL_KEY, serial)
+
+
+@tasks.task(ignore_result=True, acks_late=True)
+def reindex_incremental(request):
+    """
+    Update the Search Index for every project that has had a journal entry
+    since the last time that the index was updated.
+    """
+    r = _get_redis(request)
+
+    # If we've never done a full reindex, then there is nothing for us to
+    # incrementally update.
+    last_serial = r.get(LAST_SERIAL_KEY)
+    if last_serial is None:
+        return
+    last_serial = int(last_serial)
+
+    # Bail out early if nothing has happened since the last time we ran.
+    current_serial = request.db.query(func.max(JournalEntry.id)).scalar()
+    if current_serial is None or current_serial <= last_serial:
+        return
+
+    changes = (
+        request.db.query(
+            JournalEntry.name,
+            func.normalize_pep426_name(JournalEntry.name),
+            func.max(JournalEntry.id),
+        )
+        .filter(JournalEntry.id > last_serial - SERIAL_LOOKBACK)
+        .filter(JournalEntry.name != None)  # noqa
+        .group_by(JournalEntry.name)
+        .all()
+    )
+
+    client = _get_client(request)
+    index_name = request.registry["elasticsearch.index"]
+
+    # Write our documents to the alias, so that they end up in whatever index
+    # is currently live.
+    docs = [
+        dict(doc, _index=index_name)
+        for doc in _project_docs(request.db, [name for name, _, _ in changes])
+    ]
+    for _ in parallel_bulk(client, docs):
+        pass
+
+    # Any project which no longer has any releases (or which no longer exists
+    # at all) should no longer be in the index.
+    indexed = {doc["_id"] for doc in docs}
+    for _, normalized_name, _ in changes:
+        if normalized_name not in indexed:
+            client.delete(
+                index=index_name,
+                doc_type=ProjectDocType._doc_type.name,
+                id=normalized_name,
+                ignore=404,
+            )
+
+    r.set(LAST_SERIAL_KEY, current_serial)
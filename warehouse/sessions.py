@@ -15,7 +15,6 @@ import time
 
 import msgpack
 import msgpack.exceptions
-import redis
 
 from pyramid import viewderivers
 from pyramid.interfaces import ISession, ISessionFactory
@@ -23,6 +22,7 @@ from zope.interface import implementer
 
 from warehouse.cache.http import add_vary
 from warehouse.utils import crypto
+from warehouse.utils.redis import get_redis
 
 
 def _invalid_method(method):
@@ -174,7 +174,7 @@ class SessionFactory:
     max_age = 12 * 60 * 60  # 12 hours
 
     def __init__(self, secret, url):
-        self.redis = redis.StrictRedis.from_url(url)
+        self.redis = get_redis(url)
         self.signer = crypto.TimestampSigner(secret, salt="session")
 
     def __call__(self, request):
@@ -9,3 +9,30 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+
+from celery.schedules import crontab
+
+from warehouse.sitemap.interfaces import ISitemapStorage
+
+
+def includeme(config):
+    # Register whatever storage backend has been configured for storing our
+    # rendered sitemaps, which are kept apart from our package files. Without
+    # one, the sitemap views just render the sitemaps on every request.
+    sitemap_backend = config.registry.settings.get("sitemap.backend")
+    if sitemap_backend is None:
+        return
+
+    sitemap_storage_class = config.maybe_dotted(sitemap_backend)
+    config.register_service_factory(
+        sitemap_storage_class.create_service, ISitemapStorage
+    )
+
+    # Our tasks need the models that use SitemapMixin, which would be a
+    # circular import up at the top of this module.
+    from warehouse.sitemap.tasks import rebuild_sitemaps, update_sitemaps
+
+    # Render any sitemap buckets that have changed every few minutes, and all
+    # of them once a day in case we've missed a change somewhere.
+    config.add_periodic_task(crontab(minute="*/5"), update_sitemaps)
+    config.add_periodic_task(crontab(minute=30, hour=4), rebuild_sitemaps)
@@ -0,0 +1,182 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import os.path
+import tempfile
+
+import redis
+
+from pyramid.renderers import render
+from pyramid.request import Request
+from sqlalchemy.orm.attributes import get_history
+
+from warehouse import db, tasks
+from warehouse.accounts.models import User
+from warehouse.cache.origin import IOriginCache
+from warehouse.packaging.models import Project
+from warehouse.sitemap.interfaces import ISitemapStorage
+from warehouse.sitemap.views import bucket_urls, sitemap_buckets, sitemap_path
+from warehouse.utils.redis import get_configured_redis
+
+
+# The set in redis of sitemap buckets that have changed since update_sitemaps
+# last rendered them.
+CHANGED_BUCKETS_KEY = "warehouse.sitemap.changed-buckets"
+
+
+def sitemap_bucket(value):
+    # This mirrors the sitemap_bucket() function in the database, which is
+    # what maintains the sitemap_bucket columns.
+    return hashlib.sha512(value.encode("utf8")).hexdigest()[:1]
+
+
+def _public_request(request):
+    # Sitemaps are full of absolute URLs, which need to point at our public
+    # domain rather than at wherever this task happens to be running.
+    domain = request.registry.settings.get("warehouse.domain")
+    if domain is None:
+        return request
+    public = Request.blank("/", base_url="https://{}".format(domain))
+    public.registry = request.registry
+    return public
+
+
+def _store(storage, name, body):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, "{}.xml".format(name))
+        with open(filename, "w", encoding="utf8") as fp:
+            fp.write(body)
+        storage.store(
+            sitemap_path(name),
+            filename,
+            content_type="text/xml",
+        )
+
+
+def _render_sitemaps(request, storage, changed=None):
+    # Render the given buckets, or all of them if we weren't given any, along
+    # with the index that lists them.
+    public = _public_request(request)
+    public.db = request.db
+
+    buckets = sitemap_buckets(request.db)
+    if changed is None:
+        changed = {bucket.name for bucket in buckets}
+
+    for bucket in sorted(changed):
+        _store(
+            storage,
+            bucket,
+            render(
+                "sitemap/bucket.xml",
+                {"urls": bucket_urls(public, bucket)},
+                request=public,
+            ),
+        )
+
+    _store(
+        storage,
+        "index",
+        render("sitemap/index.xml", {"buckets": buckets}, request=public),
+    )
+
+    try:
+        cacher = request.find_service(IOriginCache)
+    except ValueError:
+        pass
+    else:
+        cacher.purge(["sitemap"])
+
+
+@tasks.task(ignore_result=True, acks_late=True)
+def update_sitemaps(request):
+    """
+    Render the sitemap buckets that have changed since this last ran, along
+    with the sitemap index, into file storage for the sitemap views to serve.
+    """
+    storage = request.find_service(ISitemapStorage)
+    redis_conn = get_configured_redis(request.registry)
+
+    # Without redis we can't tell what has changed, so we leave it to
+    # rebuild_sitemaps.
+    if redis_conn is None:
+        return
+
+    members = redis_conn.smembers(CHANGED_BUCKETS_KEY)
+
+    # If the sitemaps have never been rendered, then we render all of them.
+    try:
+        storage.get(sitemap_path("index")).close()
+    except FileNotFoundError:
+        _render_sitemaps(request, storage)
+    else:
+        if not members:
+            return
+        _render_sitemaps(
+            request, storage, {m.decode("utf8") for m in members},
+        )
+
+    # Anything that has changed since we looked will be rendered next time.
+    if members:
+        redis_conn.srem(CHANGED_BUCKETS_KEY, *members)
+
+
+@tasks.task(ignore_result=True, acks_late=True)
+def rebuild_sitemaps(request):
+    """
+    Render every sitemap bucket, to catch any changes that update_sitemaps
+    wasn't told about.
+    """
+    _render_sitemaps(request, request.find_service(ISitemapStorage))
+
+
+@db.listens_for(db.Session, "after_flush")
+def store_sitemap_changes(config, session, flush_context):
+    # Every project and user is listed under its name, so the buckets that
+    # have changed are those of any that have been added or removed, or have
+    # been renamed.
+    changed = set()
+    for obj in (session.new | session.dirty | session.deleted):
+        if isinstance(obj, Project):
+            attr = "name"
+        elif isinstance(obj, User):
+            attr = "username"
+        else:
+            continue
+
+        if obj in session.dirty:
+            history = get_history(obj, attr)
+            names = list(history.added or ()) + list(history.deleted or ())
+        else:
+            names = [getattr(obj, attr)]
+
+        changed.update(sitemap_bucket(name) for name in names if name)
+
+    if changed:
+        session.info.setdefault("warehouse.sitemap.changed", set()).update(
+            changed
+        )
+
+
+@db.listens_for(db.Session, "after_commit")
+def execute_sitemap_update(config, session):
+    changed = session.info.pop("warehouse.sitemap.changed", set())
+    if not changed:
+        return
+
+    redis_conn = get_configured_redis(config.registry)
+    if redis_conn is not None:
+        try:
+            redis_conn.sadd(CHANGED_BUCKETS_KEY, *sorted(changed))
+        except redis.exceptions.RedisError:
+            pass
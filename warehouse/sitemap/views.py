@@ -11,6 +11,7 @@
 # limitations under the License.
 
 import collections
+import contextlib
 import itertools
 
 from pyramid.view import view_config
@@ -20,6 +21,7 @@ from warehouse.accounts.models import User
 from warehouse.cache.origin import origin_cache
 from warehouse.cache.http import cache_control
 from warehouse.packaging.models import Project
+from warehouse.sitemap.interfaces import ISitemapStorage
 from warehouse.xml import XML_CSP
 
 
@@ -29,23 +31,11 @@ SITEMAP_MAXSIZE = 50000
 Bucket = collections.namedtuple("Bucket", ["name", "modified"])
 
 
-@view_config(
-    route_name="index.sitemap.xml",
-    renderer="sitemap/index.xml",
-    decorator=[
-        cache_control(1 * 60 * 60),              # 1 hour
-        origin_cache(
-            1 * 24 * 60 * 60,                    # 1 day
-            stale_while_revalidate=6 * 60 * 60,  # 6 hours
-            stale_if_error=1 * 24 * 60 * 60,     # 1 day
-            keys=["all-projects"],
-        ),
-    ],
-)
-def sitemap_index(request):
-    request.response.content_type = "text/xml"
-
-    request.find_service(name="csp").merge(XML_CSP)
+def sitemap_buckets(session):
+    """
+    Return every sitemap bucket, along with when the newest thing in it was
+    created.
+    """
 
     # We have > 50,000 URLs on PyPI and a single sitemap file can only support
     # a maximum of 50,000 URLs. We need to split our URLs up into multiple
@@ -63,16 +53,20 @@ def sitemap_index(request):
     # property of the URL what bucket an URL goes into won't be influenced by
     # what other URLs exist in the system.
     projects = (
-        request.db.query(Project.sitemap_bucket,
-                         func.max(Project.created).label("modified"))
-                  .group_by(Project.sitemap_bucket)
-                  .all()
+        session.query(
+            Project.sitemap_bucket,
+            func.max(Project.created).label("modified"),
+        )
+        .group_by(Project.sitemap_bucket)
+        .all()
     )
     users = (
-        request.db.query(User.sitemap_bucket,
-                         func.max(User.date_joined).label("modified"))
-                  .group_by(User.sitemap_bucket)
-                  .all()
+        session.query(
+            User.sitemap_bucket,
+            func.max(User.date_joined).label("modified"),
+        )
+        .group_by(User.sitemap_bucket)
+        .all()
     )
     buckets = {}
     for b in itertools.chain(projects, users):
@@ -83,28 +77,13 @@ def sitemap_index(request):
     buckets = [Bucket(name=k, modified=v) for k, v in buckets.items()]
     buckets.sort(key=lambda x: x.name)
 
-    return {"buckets": buckets}
+    return buckets
 
 
-@view_config(
-    route_name="bucket.sitemap.xml",
-    renderer="sitemap/bucket.xml",
-    decorator=[
-        cache_control(1 * 60 * 60),              # 1 hour
-        origin_cache(
-            1 * 24 * 60 * 60,                    # 1 day
-            stale_while_revalidate=6 * 60 * 60,  # 6 hours
-            stale_if_error=1 * 24 * 60 * 60,     # 1 day
-            keys=["all-projects"],
-        ),
-    ],
-)
-def sitemap_bucket(request):
-    request.response.content_type = "text/xml"
-
-    request.find_service(name="csp").merge(XML_CSP)
-
-    bucket = request.matchdict["bucket"]
+def bucket_urls(request, bucket):
+    """
+    Return the URL of every project and user in the given bucket, in order.
+    """
 
     projects = (
         request.db.query(Project.normalized_name)
@@ -132,9 +111,82 @@ def sitemap_bucket(request):
     # more buckets.
     if len(urls) > SITEMAP_MAXSIZE:
         raise ValueError(
-            "Too many URLs in the sitemap for bucket: {!r}.".format(
-                request.matchdict["bucket"],
-            ),
+            "Too many URLs in the sitemap for bucket: {!r}.".format(bucket),
         )
 
-    return {"urls": sorted(urls)}
+    return sorted(urls)
+
+
+def sitemap_path(name):
+    return "sitemap/{}.xml".format(name)
+
+
+def _stored_sitemap(request, name):
+    # Sitemaps are normally rendered ahead of time by update_sitemaps, and we
+    # only render them ourselves if that hasn't happened yet, or if there's
+    # nowhere configured to store them.
+    try:
+        storage = request.find_service(ISitemapStorage)
+    except ValueError:
+        return None
+
+    try:
+        with contextlib.closing(storage.get(sitemap_path(name))) as fp:
+            body = fp.read()
+    except FileNotFoundError:
+        return None
+
+    request.response.body = body
+    return request.response
+
+
+@view_config(
+    route_name="index.sitemap.xml",
+    renderer="sitemap/index.xml",
+    decorator=[
+        cache_control(1 * 60 * 60),              # 1 hour
+        origin_cache(
+            1 * 24 * 60 * 60,                    # 1 day
+            stale_while_revalidate=6 * 60 * 60,  # 6 hours
+            stale_if_error=1 * 24 * 60 * 60,     # 1 day
+            keys=["all-projects", "sitemap"],
+        ),
+    ],
+)
+def sitemap_index(request):
+    request.response.content_type = "text/xml"
+
+    request.find_service(name="csp").merge(XML_CSP)
+
+    response = _stored_sitemap(request, "index")
+    if response is not None:
+        return response
+
+    return {"buckets": sitemap_buckets(request.db)}
+
+
+@view_config(
+    route_name="bucket.sitemap.xml",
+    renderer="sitemap/bucket.xml",
+    decorator=[
+        cache_control(1 * 60 * 60),              # 1 hour
+        origin_cache(
+            1 * 24 * 60 * 60,                    # 1 day
+            stale_while_revalidate=6 * 60 * 60,  # 6 hours
+            stale_if_error=1 * 24 * 60 * 60,     # 1 day
+            keys=["all-projects", "sitemap"],
+        ),
+    ],
+)
+def sitemap_bucket(request):
+    request.response.content_type = "text/xml"
+
+    request.find_service(name="csp").merge(XML_CSP)
+
+    bucket = request.matchdict["bucket"]
+
+    response = _stored_sitemap(request, bucket)
+    if response is not None:
+        return response
+
+    return {"urls": bucket_urls(request, bucket)}
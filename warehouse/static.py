@@ -13,16 +13,21 @@
 import json
 import os.path
 
+from email.utils import mktime_tz, parsedate_tz
+
 from pyramid.httpexceptions import HTTPMethodNotAllowed
 from pyramid.path import AssetResolver
 from pyramid.tweens import INGRESS, EXCVIEW
-from pyramid.response import FileResponse
+from pyramid.response import FileIter, Response
 from webob.multidict import MultiDict
 from whitenoise import WhiteNoise as _WhiteNoise
 
 
 resolver = AssetResolver()
 
+# The same block size that pyramid's FileResponse uses.
+_BLOCK_SIZE = 4096 * 64  # 256K
+
 
 class WhiteNoise(_WhiteNoise):
 
@@ -52,15 +57,62 @@ class WhiteNoise(_WhiteNoise):
         else:
             return self._manifest
 
-    def is_immutable_file(self, path, url):
+    def _manifest_file(self, path):
+        # Return the path of the given file within our manifest, if it is in
+        # it at all.
         if self.manifest_path is not None:
             manifest_dir = os.path.dirname(self.manifest_path)
             if os.path.commonpath([self.manifest_path, path]) == manifest_dir:
-                if os.path.relpath(path, manifest_dir) in self.manifest:
-                    return True
+                relpath = os.path.relpath(path, manifest_dir)
+                if relpath in self.manifest:
+                    return relpath
+
+    def is_immutable_file(self, path, url):
+        if self._manifest_file(path) is not None:
+            return True
 
         return super().is_immutable_file(path, url)
 
+    def add_extra_headers(self, headers, path, url):
+        super().add_extra_headers(headers, path, url)
+
+        # Files in our manifest have the hash of their contents in their name,
+        # (e.g. warehouse.6b3c8a2f.css), which makes for a perfectly good ETag.
+        # Anything else gets one from the size and modification time that we
+        # already know, the same way that most web servers do it, so that we
+        # never have to read a file to work out its ETag.
+        relpath = self._manifest_file(path)
+        if relpath is not None:
+            name, _ = os.path.splitext(os.path.basename(relpath))
+            headers["ETag"] = '"{}"'.format(name.rsplit(".", 1)[-1])
+        else:
+            headers["ETag"] = '"{:x}-{:x}"'.format(
+                mktime_tz(parsedate_tz(headers["Last-Modified"])),
+                int(headers["Content-Length"]),
+            )
+
+    def get_static_file(self, path, url):
+        static_file = super().get_static_file(path, url)
+
+        # Each pre-compressed variant of a file is a different representation
+        # of it, and so needs an ETag of its own.
+        for attr in ["gzip_file", "brotli_file"]:
+            variant = getattr(static_file, attr)
+            if variant is not None:
+                variant_path, variant_headers = variant
+                variant_headers = MultiDict(variant_headers)
+                variant_headers["ETag"] = '{}-{}"'.format(
+                    variant_headers["ETag"][:-1],
+                    variant_headers["Content-Encoding"],
+                )
+                setattr(
+                    static_file,
+                    attr,
+                    (variant_path, tuple(variant_headers.items())),
+                )
+
+        return static_file
+
 
 def whitenoise_tween_factory(handler, registry):
 
@@ -83,16 +135,21 @@ def whitenoise_tween_factory(handler, registry):
         if request.method not in {"GET", "HEAD"}:
             return HTTPMethodNotAllowed()
         else:
+            # Everything we need to know about the file, including its ETag,
+            # was worked out when WhiteNoise found it, so all that's left to do
+            # is to hand the file itself to the WSGI server, which can send it
+            # with sendfile() if it supports wsgi.file_wrapper.
             path, headers = static_file.get_path_and_headers(request_headers)
             headers = MultiDict(headers)
 
-            resp = FileResponse(
-                path,
-                request=request,
+            file_wrapper = request.environ.get("wsgi.file_wrapper", FileIter)
+            resp = Response(
+                app_iter=file_wrapper(open(path, "rb"), _BLOCK_SIZE),
                 content_type=headers.pop("Content-Type", None),
                 content_encoding=headers.pop("Content-Encoding", None),
+                content_length=int(headers.pop("Content-Length")),
+                conditional_response=True,
             )
-            resp.md5_etag()
             resp.headers.update(headers)
 
             return resp
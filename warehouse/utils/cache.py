@@ -0,0 +1,107 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+import redis
+
+
+# How long, in seconds, a TTLCache will go between checking redis for whether
+# it has been invalidated by some other process.
+VERSION_CHECK_INTERVAL = 2
+
+
+class TTLCache:
+    """
+    A process local copy of some value, which is loaded again once it is older
+    than ``ttl`` seconds or has been invalidated. Subclasses implement
+    ``load()``, which is given whatever arguments were passed to ``get()``.
+
+    If the subclass names a ``version_key`` and we're given a redis
+    connection, then invalidating the cache in one process also invalidates
+    it in every other process: invalidating bumps the version stored in redis,
+    and reads compare that version, checked at most every ``check_interval``
+    seconds, with the one that the value was loaded at.
+    """
+
+    version_key = None
+
+    def __init__(self, ttl, *, redis_conn=None,
+                 check_interval=VERSION_CHECK_INTERVAL, clock=time.monotonic):
+        self.ttl = ttl
+        self.redis_conn = redis_conn if self.version_key is not None else None
+        self.check_interval = check_interval
+        self._clock = clock
+        self._value = None
+        self._version = None
+        self._expires = 0
+        self._next_check = 0
+
+    def load(self, *args, **kwargs):
+        raise NotImplementedError
+
+    def _current_version(self):
+        if self.redis_conn is None:
+            return None
+        try:
+            return self.redis_conn.get(self.version_key)
+        except redis.exceptions.RedisError:
+            # We can't tell whether anything has changed, so carry on with
+            # what we have until it expires.
+            return self._version
+
+    def get(self, *args, **kwargs):
+        # We're not bothering with a lock here, the worst that can happen is
+        # that two threads both load the value at around the same time.
+        value, now = self._value, self._clock()
+
+        # Most reads are served from memory without asking redis anything, so
+        # that the cache doesn't just trade a database round trip for a redis
+        # one (or a stall, should redis be slow).
+        if now >= self._next_check:
+            version = self._current_version()
+            self._next_check = now + self.check_interval
+        else:
+            version = self._version
+
+        if value is None or now >= self._expires or version != self._version:
+            value = self.load(*args, **kwargs)
+            self._value, self._expires = value, now + self.ttl
+            self._version = version
+        return value
+
+    def invalidate(self):
+        self._value = None
+        self._next_check = 0
+        if self.redis_conn is not None:
+            try:
+                self.redis_conn.incr(self.version_key)
+            except redis.exceptions.RedisError:
+                pass
+
+
+def has_changes(session, model):
+    """
+    Return whether the given session has added, deleted, or changed the
+    columns of any instance of the given model.
+    """
+    # Changing a relationship on one side can dirty the objects on the other
+    # side by way of a backref (adding a release with some classifiers dirties
+    # the classifiers, for instance), so we only count changes to the object's
+    # own columns.
+    return any(
+        isinstance(obj, model) and (
+            obj not in session.dirty or
+            session.is_modified(obj, include_collections=False)
+        )
+        for obj in (session.new | session.dirty | session.deleted)
+    )
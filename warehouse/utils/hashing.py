@@ -0,0 +1,115 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import concurrent.futures
+import functools
+import hashlib
+import threading
+
+
+# All of the digests that we compute for a distribution file, keyed by the
+# name that we use for them in the database and in the upload API.
+DIGESTS = {
+    "md5": hashlib.md5,
+    "sha256": hashlib.sha256,
+    "blake2_256": functools.partial(hashlib.blake2b, digest_size=256 // 8),
+}
+
+CHUNK_SIZE = 1024 * 1024  # 1M
+
+# Below this many bytes it is cheaper to just update each hasher in turn than
+# it is to hand the chunk off to our thread pool.
+PARALLEL_THRESHOLD = 64 * 1024  # 64K
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+
+    # We share a single thread pool across the entire process, hashlib releases
+    # the GIL while hashing large buffers so one thread per digest lets all of
+    # them make progress at the same time.
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=len(DIGESTS),
+                    thread_name_prefix="warehouse-hashing",
+                )
+    return _executor
+
+
+class MultiHasher:
+    """
+    Compute several digests of the same data at once, updating each of them
+    concurrently whenever the data being fed in is large enough to benefit.
+    """
+
+    def __init__(self, digests=None, *, executor=None,
+                 parallel_threshold=PARALLEL_THRESHOLD):
+        if digests is None:
+            digests = DIGESTS.keys()
+
+        self._hashers = {name: DIGESTS[name]() for name in digests}
+        self._executor = executor
+        self._parallel_threshold = parallel_threshold
+
+    def update(self, data):
+        if len(self._hashers) < 2 or len(data) < self._parallel_threshold:
+            for hasher in self._hashers.values():
+                hasher.update(data)
+            return
+
+        executor = (
+            self._executor if self._executor is not None else _get_executor()
+        )
+
+        # The caller is free to reuse the buffer behind data as soon as we
+        # return, so we have to wait for every hasher to have consumed it.
+        futures = [
+            executor.submit(hasher.update, data)
+            for hasher in self._hashers.values()
+        ]
+        for future in futures:
+            future.result()
+
+    def hexdigests(self):
+        return {
+            name: hasher.hexdigest().lower()
+            for name, hasher in self._hashers.items()
+        }
+
+
+def iter_chunks(fp, *, chunk_size=CHUNK_SIZE):
+    """
+    Read the given binary file object into a single reusable buffer, yielding
+    a memoryview of each chunk that has been read. Each chunk is only valid
+    until the next one has been requested.
+    """
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    for size in iter(lambda: fp.readinto(buf), 0):
+        yield view[:size]
+
+
+def hash_file(fp, digests=None, *, chunk_size=CHUNK_SIZE):
+    """
+    Compute the hex digests of everything that can be read from the given
+    binary file object, returning them as a dictionary keyed by digest name.
+    """
+    hasher = MultiHasher(digests)
+    for chunk in iter_chunks(fp, chunk_size=chunk_size):
+        hasher.update(chunk)
+    return hasher.hexdigests()
@@ -10,7 +10,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import datetime
+import json
+
 from paginate import Page
+from sqlalchemy import tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
 
 
 class _ElasticsearchWrapper:
@@ -73,3 +79,138 @@ def paginate_url_factory(request, query_arg="page"):
         query_seq += [(query_arg, page)]
         return request.current_route_path(_query=query_seq)
     return make_url
+
+
+def keyset_url_factory(request, query_args=("after", "before")):
+    def make_url(**cursor):
+        query_seq = [
+            (k, v)
+            for k, vs in request.GET.dict_of_lists().items()
+            for v in vs
+            if k not in query_args
+        ]
+        query_seq += sorted(cursor.items())
+        return request.current_route_path(_query=query_seq)
+    return make_url
+
+
+class _Explain(Executable, ClauseElement):
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def estimate_count(query):
+    """
+    Return the number of rows that the query planner expects the given query
+    to return, which is far cheaper than a COUNT(*) over a large table but is
+    only ever an estimate.
+    """
+    plan = query.session.execute(_Explain(query.order_by(None).statement))
+    plan = plan.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+_CURSOR_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+
+class KeysetPage(list):
+    """
+    A page of results that is located by seeking past the keys of a row on a
+    neighbouring page, rather than by an OFFSET, so that fetching a page costs
+    the same no matter how deep into the results it is.
+
+    The keys must uniquely identify a row, are ordered descending, and are
+    encoded into an opaque cursor which is passed back to us as either the
+    ``after`` or the ``before`` query argument.
+    """
+
+    def __init__(self, query, *, keys, after=None, before=None,
+                 items_per_page=25, url_maker=None):
+        if after is not None and before is not None:
+            raise ValueError("Cannot page both after and before a cursor.")
+
+        self.keys = keys
+        self.items_per_page = items_per_page
+        self.url_maker = url_maker
+        self._query = query
+        self._item_count = None
+
+        query = query.order_by(None)
+        if before is not None:
+            query = (
+                query.filter(tuple_(*keys) > tuple_(*self.decode(before)))
+                     .order_by(*[key.asc() for key in keys])
+            )
+        else:
+            if after is not None:
+                query = query.filter(
+                    tuple_(*keys) < tuple_(*self.decode(after))
+                )
+            query = query.order_by(*[key.desc() for key in keys])
+
+        # We fetch one more row than we need so that we can tell whether or not
+        # there is another page in the direction that we're paging.
+        items = query.limit(items_per_page + 1).all()
+        more = len(items) > items_per_page
+        items = items[:items_per_page]
+
+        if before is not None:
+            items.reverse()
+            self.has_previous, self.has_next = more, True
+        else:
+            self.has_previous, self.has_next = after is not None, more
+
+        super().__init__(items)
+
+    @property
+    def items(self):
+        return list(self)
+
+    @property
+    def item_count(self):
+        if self._item_count is None:
+            self._item_count = estimate_count(self._query)
+        return self._item_count
+
+    def encode(self, item):
+        values = []
+        for key in self.keys:
+            value = getattr(item, key.key)
+            if isinstance(value, datetime.datetime):
+                value = value.strftime(_CURSOR_DATETIME_FORMAT)
+            values.append(str(value))
+        return ",".join(values)
+
+    def decode(self, cursor):
+        values = cursor.split(",", len(self.keys) - 1)
+        if len(values) != len(self.keys):
+            raise ValueError("Invalid cursor: {!r}".format(cursor))
+
+        decoded = []
+        for key, value in zip(self.keys, values):
+            python_type = key.type.python_type
+            if python_type is datetime.datetime:
+                decoded.append(
+                    datetime.datetime.strptime(value, _CURSOR_DATETIME_FORMAT)
+                )
+            else:
+                decoded.append(python_type(value))
+        return decoded
+
+    @property
+    def next_url(self):
+        if self and self.has_next:
+            return self.url_maker(after=self.encode(self[-1]))
+
+    @property
+    def previous_url(self):
+        if self and self.has_previous:
+            return self.url_maker(before=self.encode(self[0]))
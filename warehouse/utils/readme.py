@@ -13,6 +13,8 @@
 """Utils for rendering and updating package descriptions (READMEs)."""
 
 import cgi
+import functools
+import hashlib
 
 import pkg_resources
 import readme_renderer.markdown
@@ -51,5 +53,18 @@ def render(value, content_type=None):
     return rendered
 
 
+def digest(value, content_type=None):
+    """
+    Return a digest of everything that the result of rendering the given value
+    depends on, other than the version of readme_renderer itself.
+    """
+    hasher = hashlib.sha256()
+    hasher.update((content_type or '').encode('utf8'))
+    hasher.update(b'\0')
+    hasher.update((value or '').encode('utf8'))
+    return hasher.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
 def renderer_version():
     return pkg_resources.get_distribution('readme-renderer').version
@@ -0,0 +1,62 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import threading
+
+from urllib.parse import urlparse
+
+import redis
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_redis(url, **options):
+    """
+    Return a client for the Redis server at the given url. Every caller in
+    this process that asks for the same url and connection options gets the
+    same client back, and thus shares a single connection pool.
+    """
+    pool = redis.ConnectionPool.from_url(url, **options)
+
+    # Key our clients on what the pool will actually connect with, rather
+    # than on the url itself, so that equivalent urls share a pool.
+    connection_kwargs = dict(pool.connection_kwargs)
+    connection_kwargs.setdefault("db", 0)
+    key = (
+        pool.connection_class,
+        frozenset(connection_kwargs.items()),
+        pool.max_connections,
+    )
+
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = redis.StrictRedis(
+                    connection_pool=pool,
+                )
+    return client
+
+
+def get_configured_redis(registry, setting="celery.scheduler_url", **options):
+    """
+    Return the shared client for the Redis server whose url is in the given
+    setting, or None if that hasn't been set to the url of a Redis server.
+    """
+    url = (registry.settings or {}).get(setting)
+    if url is None or urlparse(url).scheme not in {"redis", "rediss", "unix"}:
+        return None
+    return get_redis(url, **options)
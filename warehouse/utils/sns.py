@@ -11,8 +11,11 @@
 # limitations under the License.
 
 import base64
+import collections
 import datetime
 import re
+import threading
+import time
 import urllib.parse
 
 import requests
@@ -29,15 +32,74 @@ _signing_url_host_re = re.compile(
 )
 
 
+# AWS signs every message with one of a handful of certificates, and each one
+# has a URL of its own, so we don't need to remember many of them, and can
+# remember them for a while.
+PUBKEY_CACHE_SIZE = 32
+PUBKEY_CACHE_TTL = 24 * 60 * 60  # 24 hours
+
+
 class InvalidMessage(Exception):
     pass
 
 
+class PublicKeyCache:
+    """
+    A bounded cache of the public keys of the certificates that messages are
+    signed with, keyed by the URL of the certificate, each of which is kept
+    for at most ``ttl`` seconds.
+    """
+
+    def __init__(self, maxsize=PUBKEY_CACHE_SIZE, ttl=PUBKEY_CACHE_TTL, *,
+                 clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._keys = collections.OrderedDict()
+
+    def get(self, cert_url, load):
+        """
+        Return the public key for the given URL, calling ``load`` with the URL
+        to get it if we don't already have it.
+        """
+        now = self._clock()
+        with self._lock:
+            cached = self._keys.get(cert_url)
+            if cached is not None and now < cached[1]:
+                self._keys.move_to_end(cert_url)
+                return cached[0]
+
+        # We don't hold the lock while loading the key, so that one slow fetch
+        # doesn't hold up messages signed with some other certificate.
+        pubkey = load(cert_url)
+
+        with self._lock:
+            self._keys[cert_url] = (pubkey, now + self.ttl)
+            self._keys.move_to_end(cert_url)
+            while len(self._keys) > self.maxsize:
+                self._keys.popitem(last=False)
+
+        return pubkey
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+
+# Shared by every MessageVerifier in this process, since a new one is created
+# for each message that we receive.
+_pubkey_cache = PublicKeyCache()
+
+
 class MessageVerifier:
 
-    def __init__(self, *, topics, session=None):
+    def __init__(self, *, topics, session=None, pubkey_cache=None):
         self.topics = topics
         self.http = session if session is not None else requests.session()
+        self.pubkey_cache = (
+            pubkey_cache if pubkey_cache is not None else _pubkey_cache
+        )
 
     def verify(self, message):
         if message.get("SignatureVersion") != "1":
@@ -87,6 +149,9 @@ class MessageVerifier:
         if _signing_url_host_re.fullmatch(cert_host) is None:
             raise InvalidMessage("Invalid location for SigningCertURL")
 
+        return self.pubkey_cache.get(cert_url, self._load_pubkey)
+
+    def _load_pubkey(self, cert_url):
         resp = self.http.get(cert_url)
         resp.raise_for_status()
 
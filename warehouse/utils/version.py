@@ -0,0 +1,119 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import re
+
+import packaging.version
+
+
+# The pieces of a version that doesn't conform to PEP 440, and what some of
+# them are treated as, mirroring packaging's LegacyVersion.
+_legacy_component_re = re.compile(r"(\d+ | [a-z]+ | \.| -)", re.VERBOSE)
+_legacy_replacements = {
+    "pre": "c", "preview": "c", "-": "final-", "rc": "c", "dev": "@",
+}
+
+_PRE_RELEASE_LETTERS = {"a": 0, "b": 1, "rc": 2}
+
+
+def _int(value):
+    # Non-negative integers of any size, prefixed by their length so that
+    # comparing the bytes compares the integers.
+    data = value.to_bytes((value.bit_length() + 7) // 8, "big")
+    return bytes([len(data)]) + data
+
+
+def _legacy_parts(version):
+    parts = []
+    for part in _legacy_component_re.split(version.lower()):
+        part = _legacy_replacements.get(part, part)
+        if not part or part == ".":
+            continue
+
+        part = part.zfill(8) if part[:1] in "0123456789" else "*" + part
+        if part.startswith("*"):
+            if part < "*final":
+                while parts and parts[-1] == "*final-":
+                    parts.pop()
+            while parts and parts[-1] == "00000000":
+                parts.pop()
+        parts.append(part)
+
+    # Mirror the trailing "*final" that packaging adds to every legacy version.
+    while parts and parts[-1] == "00000000":
+        parts.pop()
+    parts.append("*final")
+    return parts
+
+
+def _legacy_sort_key(version):
+    # Legacy versions sort before every PEP 440 version, and amongst
+    # themselves by their parts.
+    return b"\x00" + b"".join(
+        part.encode("utf8") + b"\x00" for part in _legacy_parts(version)
+    ) + b"\x00"
+
+
+def sort_key(version):
+    """
+    Return a key for the given version string, whose bytes sort in the same
+    order as the versions do under PEP 440 (with anything that isn't a valid
+    PEP 440 version sorting before every version that is). This lets the
+    database order versions without having to understand them.
+    """
+    try:
+        parsed = packaging.version.Version(version)
+    except packaging.version.InvalidVersion:
+        return _legacy_sort_key(version)
+
+    # This follows the same rules that packaging uses to compare two versions,
+    # see packaging.version._cmpkey.
+    key = [b"\x01", _int(parsed.epoch)]
+
+    release = list(parsed.release)
+    while release and release[-1] == 0:
+        release.pop()
+    key.extend(b"\x01" + _int(part) for part in release)
+    key.append(b"\x00")
+
+    if parsed.pre is not None:
+        letter, number = parsed.pre
+        key.append(
+            b"\x01" + bytes([_PRE_RELEASE_LETTERS[letter]]) + _int(number)
+        )
+    elif parsed.post is None and parsed.dev is not None:
+        key.append(b"\x00")
+    else:
+        key.append(b"\x02")
+
+    if parsed.post is not None:
+        key.append(b"\x01" + _int(parsed.post))
+    else:
+        key.append(b"\x00")
+
+    if parsed.dev is not None:
+        key.append(b"\x01" + _int(parsed.dev))
+    else:
+        key.append(b"\x02")
+
+    if parsed.local is not None:
+        key.append(b"\x01")
+        for part in parsed.local.split("."):
+            if part.isdigit():
+                key.append(b"\x02" + _int(int(part)))
+            else:
+                key.append(b"\x01" + part.encode("utf8") + b"\x00")
+        key.append(b"\x00")
+    else:
+        key.append(b"\x00")
+
+    return b"".join(key)
@@ -10,8 +10,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import collections
-
 from pyramid.httpexceptions import (
     HTTPException, HTTPSeeOther, HTTPMovedPermanently, HTTPNotFound,
     HTTPBadRequest, exception_response,
@@ -26,7 +24,6 @@ from pyramid.view import (
 from elasticsearch_dsl import Q
 from sqlalchemy import func
 from sqlalchemy.orm import aliased, joinedload
-from sqlalchemy.sql import exists
 
 from warehouse.accounts import REDIRECT_FIELD_NAME
 from warehouse.accounts.models import User
@@ -34,13 +31,14 @@ from warehouse.cache.origin import origin_cache
 from warehouse.cache.http import cache_control
 from warehouse.classifiers.models import Classifier
 from warehouse.packaging.models import (
-    Project, Release, File, release_classifiers,
+    Project, Release, File,
 )
 from warehouse.search.queries import (
     SEARCH_BOOSTS,
     SEARCH_FIELDS,
-    SEARCH_FILTER_ORDER,
+    SEARCH_RESULT_FIELDS,
 )
+from warehouse.search.facets import get_facets
 from warehouse.utils.row_counter import RowCount
 from warehouse.utils.paginate import ElasticsearchPage, paginate_url_factory
 
@@ -288,6 +286,8 @@ def search(request):
     for classifier in request.params.getall("c"):
         query = query.filter("terms", classifiers=[classifier])
 
+    query = query.source(SEARCH_RESULT_FIELDS)
+
     try:
         page_num = int(request.params.get("page", 1))
     except ValueError:
@@ -302,28 +302,7 @@ def search(request):
     if page.page_count and page_num > page.page_count:
         return HTTPNotFound()
 
-    available_filters = collections.defaultdict(list)
-
-    classifiers_q = (
-        request.db.query(Classifier)
-        .with_entities(Classifier.classifier)
-        .filter(Classifier.deprecated.is_(False))
-        .filter(
-            exists([release_classifiers.c.trove_id])
-            .where(release_classifiers.c.trove_id == Classifier.id)
-        )
-        .order_by(Classifier.classifier)
-    )
-
-    for cls in classifiers_q:
-        first, *_ = cls.classifier.split(' :: ')
-        available_filters[first].append(cls.classifier)
-
-    def filter_key(item):
-        try:
-            return 0, SEARCH_FILTER_ORDER.index(item[0]), item[0]
-        except ValueError:
-            return 1, 0, item[0]
+    facets = get_facets(request)
 
     request.registry.datadog.histogram('warehouse.views.search.results',
                                        page.item_count)
@@ -332,7 +311,8 @@ def search(request):
         "page": page,
         "term": q,
         "order": request.params.get("o", ''),
-        "available_filters": sorted(available_filters.items(), key=filter_key),
+        "available_filters": facets.filters,
+        "facet_counts": facets.counts,
         "applied_filters": request.params.getall("c"),
     }
 